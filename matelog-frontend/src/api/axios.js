@@ -12,7 +12,7 @@ const api = axios.create({
 
 
 // Función para obtener el token CSRF de las cookies
-function getCookie(name) {
+export function getCookie(name) {
   let cookieValue = null;
   if (document.cookie && document.cookie !== '') {
     const cookies = document.cookie.split(';');
@@ -1,4 +1,80 @@
-import api from './axios';
+import api, { getCookie } from './axios';
+
+
+// ==================== BUFFER LOCAL DE TRACKING ====================
+// Los tiempos en pantalla y clics se acumulan localmente y se envían en lote
+// a /tracking/lote/ cada pocos segundos, en lugar de una petición por evento.
+
+const INTERVALO_ENVIO_MS = 5000;
+const MAX_REGISTROS_LOTE = 500; // Debe coincidir con MAX_REGISTROS_LOTE del backend
+
+let bufferRegistros = [];
+let intervaloEnvio = null;
+
+const encolarRegistro = (registro) => {
+  bufferRegistros.push(registro);
+
+  if (bufferRegistros.length >= MAX_REGISTROS_LOTE) {
+    flushTracking();
+  } else if (!intervaloEnvio) {
+    intervaloEnvio = setInterval(flushTracking, INTERVALO_ENVIO_MS);
+  }
+};
+
+// Enviar los registros pendientes al backend
+export const flushTracking = async () => {
+  if (bufferRegistros.length === 0) {
+    return null;
+  }
+
+  const registros = bufferRegistros.slice(0, MAX_REGISTROS_LOTE);
+  bufferRegistros = bufferRegistros.slice(MAX_REGISTROS_LOTE);
+
+  try {
+    const response = await api.post('/tracking/lote/', { registros });
+    return response.data;
+  } catch (error) {
+    // Error de red o del servidor: devolver los registros al buffer para reintentar
+    if (!error.response || error.response.status >= 500) {
+      bufferRegistros = registros.concat(bufferRegistros);
+    }
+    console.error('Error al enviar lote de tracking:', error);
+    return null;
+  }
+};
+
+// Envío de último recurso al cerrar la pestaña (la página puede no esperar a axios)
+const flushTrackingAlSalir = () => {
+  if (bufferRegistros.length === 0) {
+    return;
+  }
+
+  const registros = bufferRegistros.slice(0, MAX_REGISTROS_LOTE);
+  bufferRegistros = bufferRegistros.slice(MAX_REGISTROS_LOTE);
+
+  const headers = { 'Content-Type': 'application/json' };
+  const csrftoken = getCookie('csrftoken');
+  if (csrftoken) {
+    headers['X-CSRFToken'] = csrftoken;
+  }
+
+  fetch(`${api.defaults.baseURL}/tracking/lote/`, {
+    method: 'POST',
+    body: JSON.stringify({ registros }),
+    headers,
+    credentials: 'include',
+    keepalive: true,
+  }).catch(() => {});
+};
+
+if (typeof window !== 'undefined') {
+  document.addEventListener('visibilitychange', () => {
+    if (document.hidden) {
+      flushTracking();
+    }
+  });
+  window.addEventListener('pagehide', flushTrackingAlSalir);
+}
 
 
 // Servicios de tracking
@@ -69,11 +145,11 @@ export const trackingService = {
   // ==================== NUEVOS ENDPOINTS - Sistema de tracking mejorado ====================
 
   // Actualizar actividad de sesión (heartbeat cada 2 minutos)
+  // Usa la ingesta rápida del backend: responde 204 sin cuerpo
   updateSessionActivity: async (sessionId) => {
-    const response = await api.post('/tracking/sesion/actividad/', {
+    await api.post('/tracking/ingesta/sesion/actividad/', {
       sesion_id: sessionId
     });
-    return response.data;
   },
 
   // Finalizar sesión con tipo de cierre mejorado
@@ -86,8 +162,10 @@ export const trackingService = {
   },
 
   // Registrar tiempo en pantalla específica (Teoría, Ejemplo, Ejercicio)
+  // Se encola en el buffer local y se envía en el siguiente lote
   registerScreenTime: async (data) => {
-    const response = await api.post('/tracking/tiempo-pantalla/', {
+    encolarRegistro({
+      tipo: 'TIEMPO_PANTALLA',
       tema_id: data.temaId,
       tipo_contenido: data.tipoContenido, // TEORIA, EJEMPLO, EJERCICIO
       numero: data.numero, // Número del contenido dentro del tema
@@ -96,17 +174,22 @@ export const trackingService = {
       ejercicio_id: data.ejercicioId, // Opcional
       cambio_pestana: data.cambioPestana || false
     });
-    return response.data;
+    return { encolado: true };
   },
 
   // Registrar clic en botón específico
+  // Se encola en el buffer local y se envía en el siguiente lote
   registerButtonClick: async (data) => {
-    const response = await api.post('/tracking/clic-boton/', {
+    encolarRegistro({
+      tipo: 'CLIC_BOTON',
       tema_id: data.temaId,
       tipo_boton: data.tipoBoton // REGRESAR, IR_EJERCICIOS, VOLVER, OTRO_EJEMPLO, VER_AYUDA
     });
-    return response.data;
+    return { encolado: true };
   },
+
+  // Forzar el envío inmediato de los registros pendientes (ej. antes de logout)
+  flushTracking,
 };
 
 
@@ -74,6 +74,9 @@ export const AuthProvider = ({ children }) => {
 
   const logout = async () => {
     try {
+      // Enviar registros de tracking pendientes antes de cerrar la sesión
+      await trackingService.flushTracking();
+
       // Finalizar sesión de estudio con tipo de cierre LOGOUT
       if (sessionId) {
         await trackingService.endSessionImproved(sessionId, 'LOGOUT');
@@ -0,0 +1,142 @@
+"""
+Benchmark: ValidarRespuestaView bajo concurrencia, para comparar perfiles de
+conexión a SQLite (ver DATABASES y SQLITE_PRAGMAS en settings.py).
+
+Varios hilos, cada uno con su estudiante y su sesión, envían respuestas al
+mismo tiempo como en una clase. Cada hilo usa su propia conexión, igual que
+los workers con hilos de gunicorn. Se informan los errores "database is
+locked", otros errores, el throughput y la latencia p50/p95/máxima.
+
+Usa bases de datos de prueba temporales en archivo (WAL no aplica a bases
+en memoria); no toca db.sqlite3. El throttle de la vista se desactiva para
+medir solo la base de datos.
+
+Uso: python benchmark_concurrencia_respuestas.py [hilos] [peticiones_por_hilo]
+Perfil anterior (journal por defecto, sin busy_timeout ni transacciones
+inmediatas, una conexión por petición):
+    SQLITE_PRAGMAS=False SQLITE_TRANSACTION_MODE= DB_CONN_MAX_AGE=0 \\
+        python benchmark_concurrencia_respuestas.py
+"""
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import django
+
+# Configurar Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matelog_backend.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connections, OperationalError
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema, Ejercicio
+from lessons.views import ValidarRespuestaView
+
+User = get_user_model()
+HILOS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+PETICIONES = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+EJERCICIOS = 10
+
+
+def percentil(valores, p):
+    indice = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[indice]
+
+
+def estudiante(usuario, ejercicio_ids, barrera, resultados):
+    """Un hilo: inicia sesión y responde PETICIONES veces, midiendo cada una."""
+    client = Client()
+    client.force_login(usuario)
+    latencias, bloqueos, otros = [], 0, 0
+    barrera.wait()
+    for numero in range(PETICIONES):
+        cuerpo = json.dumps({
+            'ejercicio_id': ejercicio_ids[numero % len(ejercicio_ids)],
+            'respuesta': 'verdadero' if numero % 3 else 'falso',
+            'tiempo_respuesta_segundos': 5,
+        })
+        inicio = time.perf_counter()
+        try:
+            response = client.post('/api/lessons/ejercicios/validar/', cuerpo, content_type='application/json')
+            if response.status_code != 200:
+                otros += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            bloqueos += 1
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    connections.close_all()
+    resultados.append((latencias, bloqueos, otros))
+
+
+print("=" * 80)
+print(f"BENCHMARK CONCURRENCIA VALIDAR RESPUESTA ({HILOS} hilos x {PETICIONES} peticiones)")
+print("=" * 80)
+opciones = settings.DATABASES['default'].get('OPTIONS', {})
+print(f"  PRAGMA:           {settings.SQLITE_PRAGMAS or 'valores de SQLite'}")
+print(f"  transaction_mode: {opciones.get('transaction_mode', 'DEFERRED')}")
+print(f"  CONN_MAX_AGE:     {settings.DATABASES['default']['CONN_MAX_AGE']}")
+
+setup_test_environment()
+ValidarRespuestaView.throttle_classes = []
+nombres_bd = {}
+for alias in connections:
+    conexion = connections[alias]
+    if conexion.vendor == 'sqlite':
+        conexion.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.gettempdir(), f'benchmark_concurrencia_{alias}.sqlite3'
+        )
+    nombres_bd[alias] = conexion.creation.create_test_db(verbosity=0, autoclobber=True)
+try:
+    leccion = Leccion.objects.create(orden=1, titulo='Bench', descripcion='Bench')
+    tema = Tema.objects.create(leccion=leccion, orden=1, titulo='Bench', descripcion='Bench')
+    ejercicio_ids = [
+        Ejercicio.objects.create(
+            tema=tema, orden=orden, tipo='ABIERTO', dificultad='FACIL',
+            instruccion='Resuelve', enunciado='p o q', respuesta_correcta='verdadero'
+        ).id
+        for orden in range(1, EJERCICIOS + 1)
+    ]
+    usuarios = [
+        User.objects.create_user(username=f'bench{numero}', password='bench')
+        for numero in range(HILOS)
+    ]
+    # Los hilos abren sus propias conexiones; la del hilo principal no debe
+    # retener el candado de escritura
+    connections.close_all()
+
+    resultados = []
+    barrera = threading.Barrier(HILOS)
+    hilos = [
+        threading.Thread(target=estudiante, args=(usuario, ejercicio_ids, barrera, resultados))
+        for usuario in usuarios
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    segundos = time.perf_counter() - inicio
+
+    latencias = sorted(latencia for lista, _, _ in resultados for latencia in lista)
+    bloqueos = sum(bloqueos for _, bloqueos, _ in resultados)
+    otros = sum(otros for _, _, otros in resultados)
+    total = len(latencias)
+    print(f"  {'Peticiones':<28} {total:>10}")
+    print(f"  {'Errores database is locked':<28} {bloqueos:>10}")
+    print(f"  {'Otros errores':<28} {otros:>10}")
+    print(f"  {'Throughput':<28} {total / segundos:>10.1f} peticiones/s")
+    print(f"  {'Latencia p50':<28} {percentil(latencias, 50):>10.2f} ms")
+    print(f"  {'Latencia p95':<28} {percentil(latencias, 95):>10.2f} ms")
+    print(f"  {'Latencia máxima':<28} {latencias[-1]:>10.2f} ms")
+finally:
+    connections.close_all()
+    for alias, nombre_bd in nombres_bd.items():
+        connections[alias].creation.destroy_test_db(nombre_bd, verbosity=0)
@@ -0,0 +1,112 @@
+"""
+Benchmark: costo por petición de las vistas DRF de tracking contra las vistas
+de ingesta rápida de tracking/ingesta.py (clic, tiempo de pantalla y
+heartbeat de sesión).
+
+Usa el cliente de pruebas de Django con una sesión real (sin servidor HTTP)
+y una base de datos de prueba temporal; no toca db.sqlite3. La cache se
+limpia entre rondas, fuera del tiempo medido, para que el throttle por
+usuario de DRF no corte la medición. Las vistas de ingesta usan la escritura
+diferida (tracking/escritura_diferida.py) si TRACKING_ESCRITURA_DIFERIDA está
+activa, así que su tiempo no incluye el INSERT.
+
+Uso: python benchmark_ingesta_tracking.py [peticiones_por_endpoint]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import django
+
+# Configurar Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matelog_backend.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema, ContenidoTema
+from tracking.models import SesionEstudio, TiempoPantalla, ClicBoton
+from tracking import escritura_diferida
+
+User = get_user_model()
+PETICIONES = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+RONDA = 50
+
+
+def medir(nombre, client, url, cuerpo, esperado):
+    """Envía PETICIONES POST en rondas y devuelve los ms por petición."""
+    datos = json.dumps(cuerpo)
+    segundos = 0.0
+    enviadas = 0
+    while enviadas < PETICIONES:
+        cache.clear()
+        lote = min(RONDA, PETICIONES - enviadas)
+        inicio = time.perf_counter()
+        for _ in range(lote):
+            response = client.post(url, datos, content_type='application/json')
+        segundos += time.perf_counter() - inicio
+        assert response.status_code == esperado, (url, response.status_code)
+        enviadas += lote
+    ms = segundos / PETICIONES * 1000
+    print(f"  {nombre:<40} {ms:7.3f} ms/petición")
+    return ms
+
+
+print("=" * 80)
+print(f"BENCHMARK INGESTA DE TRACKING ({PETICIONES} peticiones por endpoint)")
+print("=" * 80)
+
+setup_test_environment()
+# Bases de prueba en archivo (default y, si existe, tracking): la escritura
+# diferida usa otra conexión desde su hilo y la base en memoria compartida de
+# SQLite bloquea tablas entre conexiones
+nombres_bd = {}
+for alias in connections:
+    conexion = connections[alias]
+    if conexion.vendor == 'sqlite':
+        conexion.settings_dict['TEST']['NAME'] = os.path.join(
+            tempfile.gettempdir(), f'benchmark_ingesta_tracking_{alias}.sqlite3'
+        )
+    nombres_bd[alias] = conexion.creation.create_test_db(verbosity=0)
+try:
+    usuario = User.objects.create_user(username='bench', password='bench')
+    leccion = Leccion.objects.create(orden=1, titulo='Bench', descripcion='Bench')
+    tema = Tema.objects.create(leccion=leccion, orden=1, titulo='Bench', descripcion='Bench')
+    contenido = ContenidoTema.objects.create(
+        tema=tema, orden=1, tipo='TEORIA', contenido_texto='<p>Bench</p>'
+    )
+    sesion = SesionEstudio.objects.create(usuario=usuario)
+    client = Client()
+    client.force_login(usuario)
+
+    casos = [
+        ('Clic de botón', 'clic-boton/',
+         {'tipo_boton': 'VER_AYUDA', 'tema_id': tema.id}),
+        ('Tiempo de pantalla', 'tiempo-pantalla/',
+         {'tema_id': tema.id, 'tipo_contenido': 'TEORIA', 'numero': 1,
+          'contenido_id': contenido.id, 'tiempo_segundos': 30}),
+        ('Heartbeat de sesión', 'sesion/actividad/',
+         {'sesion_id': sesion.id}),
+    ]
+    for titulo, ruta, cuerpo in casos:
+        print(titulo)
+        antes = medir('DRF APIView (/api/tracking/...)', client,
+                      f'/api/tracking/{ruta}', cuerpo,
+                      200 if ruta.startswith('sesion') else 201)
+        ahora = medir('Ingesta (/api/tracking/ingesta/...)', client,
+                      f'/api/tracking/ingesta/{ruta}', cuerpo, 204)
+        print(f"  {'Ahorro':<40} {antes - ahora:7.3f} ms/petición ({(1 - ahora / antes) * 100:.0f}%)")
+
+    # Las vistas de ingesta escriben en diferido: vaciar la cola antes de contar
+    escritura_diferida.obtener_escritor().detener()
+    print(f"Escritura diferida: {escritura_diferida.estadisticas()}")
+    assert ClicBoton.objects.count() == PETICIONES * 2
+    assert TiempoPantalla.objects.count() == PETICIONES * 2
+finally:
+    for alias, nombre_bd in nombres_bd.items():
+        connections[alias].creation.destroy_test_db(nombre_bd, verbosity=0)
@@ -0,0 +1,81 @@
+"""
+Benchmark: guardado de respuestas de escala con update_or_create por pregunta
+(implementación anterior) contra un solo bulk_create con update_conflicts.
+
+Simula a un grupo que envía la escala de autoeficacia (10 preguntas) y luego
+la reenvía. Usa una base de datos de prueba temporal; no toca db.sqlite3.
+
+Uso: python benchmark_respuestas_escala.py [numero_de_estudiantes]
+"""
+import os
+import sys
+import time
+import django
+
+# Configurar Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'matelog_backend.settings')
+django.setup()
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.contrib.auth import get_user_model
+from ml_adaptive.models import RespuestaEscala
+from ml_adaptive.views import guardar_respuestas_escala
+
+User = get_user_model()
+ESTUDIANTES = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+PREGUNTAS = 10
+
+
+def guardar_antes(usuario, tipo_escala, respuestas):
+    """Implementación anterior: un update_or_create por pregunta."""
+    for pregunta_numero, respuesta in respuestas.items():
+        RespuestaEscala.objects.update_or_create(
+            usuario=usuario,
+            tipo_escala=tipo_escala,
+            pregunta_numero=pregunta_numero,
+            defaults={'respuesta': respuesta}
+        )
+
+
+def medir(nombre, funcion, usuarios, tipo_escala):
+    """Dos envíos por estudiante (alta y reenvío), cada uno en su transacción."""
+    sentencias = 0
+    inicio = time.perf_counter()
+    for valor in (3, 4):
+        respuestas = {numero: valor for numero in range(1, PREGUNTAS + 1)}
+        for usuario in usuarios:
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as contexto:
+                with transaction.atomic():
+                    funcion(usuario, tipo_escala, respuestas)
+            sentencias += len([
+                q for q in contexto.captured_queries
+                if q['sql'].startswith(('SELECT', 'INSERT', 'UPDATE'))
+            ])
+    segundos = time.perf_counter() - inicio
+    envios = len(usuarios) * 2
+    print(f"  {nombre:<28} {segundos:8.3f} s   "
+          f"{segundos / envios * 1000:7.2f} ms/envío   "
+          f"{sentencias / envios:5.1f} sentencias/envío")
+
+
+print("=" * 80)
+print(f"BENCHMARK RESPUESTAS DE ESCALA ({ESTUDIANTES} estudiantes x {PREGUNTAS} preguntas)")
+print("=" * 80)
+
+setup_test_environment()
+nombre_bd = connection.creation.create_test_db(verbosity=0)
+try:
+    usuarios = [
+        User.objects.create(username=f'bench_{i}')
+        for i in range(ESTUDIANTES)
+    ]
+    medir('update_or_create (antes)', guardar_antes, usuarios, 'AUTOEFICACIA_PRE')
+    medir('bulk_create upsert (ahora)', guardar_respuestas_escala, usuarios, 'AUTOEFICACIA_POST')
+
+    assert RespuestaEscala.objects.count() == ESTUDIANTES * PREGUNTAS * 2
+    assert set(RespuestaEscala.objects.values_list('respuesta', flat=True)) == {4}
+finally:
+    connection.creation.destroy_test_db(nombre_bd, verbosity=0)
@@ -0,0 +1,413 @@
+# lessons/bundle_contenido.py
+"""
+Exportación e importación declarativa del contenido del curso.
+
+Un bundle es un JSON versionado con la jerarquía
+Leccion -> Tema -> ContenidoTema -> Ejercicio -> OpcionMultiple:
+
+    {"version": 1, "lecciones": [
+        {"orden": 1, "titulo": "...", "descripcion": "...", "temas": [
+            {"orden": 1, "titulo": "...", "descripcion": "...",
+             "contenidos": [{"orden": 1, "tipo": "TEORIA", "contenido_texto": "..."}],
+             "ejercicios": [{"orden": 1, "tipo": "MULTIPLE", ..., "opciones": [
+                 {"letra": "A", "texto": "..."}]}]}]}]}
+
+Las claves naturales son el orden: lección por orden, tema por (lección,
+orden), contenido y ejercicio por (tema, orden) y opción por (ejercicio,
+letra).
+
+sincronizar_bundle() compara el bundle con la base de datos y aplica solo
+inserciones, actualizaciones y desactivaciones (is_active=False de
+lecciones y temas) con bulk_create/bulk_update dentro de una transacción.
+Nunca borra filas, así que el progreso de los estudiantes queda intacto;
+los contenidos, ejercicios y opciones que ya no están en el bundle se
+informan como sobrantes para revisarlos desde el admin.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from .ejercicios_visibles import invalidar_tema
+from .contenido_cache import marcar_modificado
+from . import indice_contenido
+
+
+VERSION_BUNDLE = 1
+TAMANO_LOTE = 500
+
+CAMPOS_LECCION = ['titulo', 'descripcion', 'is_active']
+CAMPOS_TEMA = ['titulo', 'descripcion', 'is_active']
+CAMPOS_CONTENIDO = ['tipo', 'contenido_texto']
+CAMPOS_EJERCICIO = [
+    'tipo', 'dificultad', 'instruccion', 'enunciado', 'respuesta_correcta',
+    'respuestas_alternativas', 'modo_validacion', 'texto_ayuda',
+    'retroalimentacion_correcta', 'retroalimentacion_incorrecta',
+    'mostrar_dificultad', 'obligatorio',
+]
+CAMPOS_OPCION = ['texto']
+
+# Campos de Ejercicio que se derivan en save() y que bulk_update también debe escribir
+CAMPOS_EJERCICIO_DERIVADOS = ['respuesta_normalizada', 'claves_alternativas']
+
+
+class BundleInvalido(ValueError):
+    """El bundle no tiene el formato esperado. `errores` lista cada problema."""
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__('\n'.join(errores))
+
+
+# ==================== EXPORTACIÓN ====================
+
+def exportar_bundle():
+    """Contenido completo del curso como bundle (cinco consultas)."""
+    opciones = defaultdict(list)
+    for fila in OpcionMultiple.objects.order_by('ejercicio_id', 'letra').values(
+        'ejercicio_id', 'letra', *CAMPOS_OPCION
+    ):
+        opciones[fila.pop('ejercicio_id')].append(fila)
+
+    ejercicios = defaultdict(list)
+    for fila in Ejercicio.objects.order_by('tema_id', 'orden').values(
+        'id', 'tema_id', 'orden', *CAMPOS_EJERCICIO
+    ):
+        fila['opciones'] = opciones.get(fila.pop('id'), [])
+        ejercicios[fila.pop('tema_id')].append(fila)
+
+    contenidos = defaultdict(list)
+    for fila in ContenidoTema.objects.order_by('tema_id', 'orden').values(
+        'tema_id', 'orden', *CAMPOS_CONTENIDO
+    ):
+        contenidos[fila.pop('tema_id')].append(fila)
+
+    temas = defaultdict(list)
+    for fila in Tema.objects.order_by('leccion_id', 'orden').values(
+        'id', 'leccion_id', 'orden', *CAMPOS_TEMA
+    ):
+        tema_id = fila.pop('id')
+        fila['contenidos'] = contenidos.get(tema_id, [])
+        fila['ejercicios'] = ejercicios.get(tema_id, [])
+        temas[fila.pop('leccion_id')].append(fila)
+
+    lecciones = []
+    for fila in Leccion.objects.order_by('orden').values('id', 'orden', *CAMPOS_LECCION):
+        fila['temas'] = temas.get(fila.pop('id'), [])
+        lecciones.append(fila)
+
+    return {'version': VERSION_BUNDLE, 'lecciones': lecciones}
+
+
+# ==================== VALIDACIÓN ====================
+
+def _hijos(datos, clave, ruta, errores):
+    hijos = datos.get(clave, [])
+    if not isinstance(hijos, list):
+        errores.append(f'{ruta}.{clave}: debe ser una lista')
+        return []
+    return hijos
+
+
+def _construir(modelo, datos, campos, hijos, clave_natural, ruta, errores, vistos):
+    """
+    Crea una instancia sin guardar a partir de un elemento del bundle.
+    Devuelve None (y agrega el error) si el elemento no es válido.
+    """
+    if not isinstance(datos, dict):
+        errores.append(f'{ruta}: debe ser un objeto')
+        return None
+    desconocidos = set(datos) - {clave_natural, *campos, *hijos}
+    if desconocidos:
+        errores.append(f'{ruta}: campos desconocidos {sorted(desconocidos)}')
+        return None
+    if clave_natural not in datos:
+        errores.append(f'{ruta}: falta "{clave_natural}"')
+        return None
+    clave = datos[clave_natural]
+    if isinstance(clave, bool) or not isinstance(clave, (int, str)):
+        errores.append(f'{ruta}: "{clave_natural}" debe ser un número o un texto')
+        return None
+    if clave in vistos:
+        errores.append(f'{ruta}: {clave_natural} {clave!r} repetido')
+        return None
+    vistos.add(clave)
+    return modelo(**{clave_natural: clave}, **{c: datos[c] for c in campos if c in datos})
+
+
+def _validar(instancia, ruta, errores, excluir):
+    try:
+        instancia.clean_fields(exclude=excluir)
+    except ValidationError as e:
+        for campo, mensajes in e.message_dict.items():
+            errores.append(f'{ruta}.{campo}: {" ".join(mensajes)}')
+        return False
+    return True
+
+
+def construir_arbol(bundle):
+    """
+    Valida el bundle completo sin consultar la base de datos y devuelve el
+    árbol de instancias sin guardar:
+    [(leccion, [(tema, [contenido, ...], [(ejercicio, [opcion, ...]), ...]), ...]), ...]
+    Lanza BundleInvalido con todos los errores encontrados.
+    """
+    errores = []
+    if not isinstance(bundle, dict) or bundle.get('version') != VERSION_BUNDLE:
+        raise BundleInvalido([f'Se esperaba un objeto con "version": {VERSION_BUNDLE}'])
+
+    arbol = []
+    ordenes_leccion = set()
+    for i, datos_leccion in enumerate(_hijos(bundle, 'lecciones', 'bundle', errores)):
+        ruta_leccion = f'lecciones[{i}]'
+        leccion = _construir(
+            Leccion, datos_leccion, CAMPOS_LECCION, ['temas'], 'orden',
+            ruta_leccion, errores, ordenes_leccion
+        )
+        if leccion is None or not _validar(leccion, ruta_leccion, errores, []):
+            continue
+
+        temas = []
+        ordenes_tema = set()
+        for j, datos_tema in enumerate(_hijos(datos_leccion, 'temas', ruta_leccion, errores)):
+            ruta_tema = f'{ruta_leccion}.temas[{j}]'
+            tema = _construir(
+                Tema, datos_tema, CAMPOS_TEMA, ['contenidos', 'ejercicios'], 'orden',
+                ruta_tema, errores, ordenes_tema
+            )
+            if tema is None or not _validar(tema, ruta_tema, errores, ['leccion']):
+                continue
+
+            contenidos = []
+            ordenes_contenido = set()
+            for k, datos in enumerate(_hijos(datos_tema, 'contenidos', ruta_tema, errores)):
+                ruta = f'{ruta_tema}.contenidos[{k}]'
+                contenido = _construir(
+                    ContenidoTema, datos, CAMPOS_CONTENIDO, [], 'orden',
+                    ruta, errores, ordenes_contenido
+                )
+                if contenido is not None and _validar(contenido, ruta, errores, ['tema']):
+                    contenidos.append(contenido)
+
+            ejercicios = []
+            ordenes_ejercicio = set()
+            for k, datos in enumerate(_hijos(datos_tema, 'ejercicios', ruta_tema, errores)):
+                ruta = f'{ruta_tema}.ejercicios[{k}]'
+                ejercicio = _construir(
+                    Ejercicio, datos, CAMPOS_EJERCICIO, ['opciones'], 'orden',
+                    ruta, errores, ordenes_ejercicio
+                )
+                if ejercicio is None:
+                    continue
+
+                opciones = []
+                letras = set()
+                for m, datos_opcion in enumerate(_hijos(datos, 'opciones', ruta, errores)):
+                    ruta_opcion = f'{ruta}.opciones[{m}]'
+                    opcion = _construir(
+                        OpcionMultiple, datos_opcion, CAMPOS_OPCION, [], 'letra',
+                        ruta_opcion, errores, letras
+                    )
+                    if opcion is not None and _validar(opcion, ruta_opcion, errores, ['ejercicio']):
+                        opciones.append(opcion)
+
+                ejercicio.normalizar_respuesta_correcta()
+                if not _validar(ejercicio, ruta, errores, ['tema']):
+                    continue
+                try:
+                    ejercicio.validar_respuesta_correcta(
+                        letras if ejercicio.tipo == 'MULTIPLE' else None
+                    )
+                except ValidationError as e:
+                    for campo, mensajes in e.message_dict.items():
+                        errores.append(f'{ruta}.{campo}: {" ".join(mensajes)}')
+                    continue
+                ejercicio.calcular_claves()
+                ejercicios.append((ejercicio, opciones))
+
+            temas.append((tema, contenidos, ejercicios))
+        arbol.append((leccion, temas))
+
+    if errores:
+        raise BundleInvalido(errores)
+    return arbol
+
+
+# ==================== SINCRONIZACIÓN ====================
+
+def _nuevo_resumen():
+    return {
+        nombre: {'creados': 0, 'actualizados': 0, 'desactivados': 0, 'sobrantes': 0}
+        for nombre in ('lecciones', 'temas', 'contenidos', 'ejercicios', 'opciones')
+    }
+
+
+def _aplicar(modelo, existentes, deseados, campos, contador, ahora):
+    """
+    Inserta los deseados que no existen y actualiza los que cambiaron.
+    existentes y deseados son {clave_natural: instancia}. Devuelve
+    {clave_natural: instancia guardada} y las claves que cambiaron.
+    """
+    con_fecha = hasattr(modelo, 'fecha_modificacion')
+    guardados = {}
+    cambiados = set()
+    crear = []
+    actualizar = []
+    for clave, nuevo in deseados.items():
+        actual = existentes.get(clave)
+        if actual is None:
+            crear.append(nuevo)
+            guardados[clave] = nuevo
+            cambiados.add(clave)
+            continue
+        cambios = [c for c in campos if getattr(actual, c) != getattr(nuevo, c)]
+        if cambios:
+            for campo in campos:
+                setattr(actual, campo, getattr(nuevo, campo))
+            if con_fecha:
+                actual.fecha_modificacion = ahora
+            actualizar.append(actual)
+            cambiados.add(clave)
+        guardados[clave] = actual
+
+    if crear:
+        modelo.objects.bulk_create(crear, batch_size=TAMANO_LOTE)
+    if actualizar:
+        modelo.objects.bulk_update(
+            actualizar, campos + (['fecha_modificacion'] if con_fecha else []),
+            batch_size=TAMANO_LOTE
+        )
+    contador['creados'] += len(crear)
+    contador['actualizados'] += len(actualizar)
+    return guardados, cambiados
+
+
+def _desactivar(modelo, faltantes, contador, ahora):
+    """Soft delete: is_active=False en lugar de borrar (conserva el progreso)."""
+    faltantes = [obj for obj in faltantes if obj.is_active]
+    for obj in faltantes:
+        obj.is_active = False
+        obj.fecha_modificacion = ahora
+    if faltantes:
+        modelo.objects.bulk_update(faltantes, ['is_active', 'fecha_modificacion'], batch_size=TAMANO_LOTE)
+    contador['desactivados'] += len(faltantes)
+    return faltantes
+
+
+def sincronizar_bundle(bundle, desactivar=True, simular=False):
+    """
+    Aplica el bundle a la base de datos en una sola transacción.
+    desactivar=False no toca las lecciones/temas ausentes del bundle.
+    simular=True hace todo y revierte la transacción al final.
+    Devuelve el resumen {modelo: {creados, actualizados, desactivados, sobrantes}}.
+    """
+    arbol = construir_arbol(bundle)
+    resumen = _nuevo_resumen()
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        # Lecciones por orden
+        existentes = {leccion.orden: leccion for leccion in Leccion.objects.all()}
+        deseadas = {leccion.orden: leccion for leccion, _ in arbol}
+        lecciones, _ = _aplicar(
+            Leccion, existentes, deseadas, CAMPOS_LECCION, resumen['lecciones'], ahora
+        )
+        if desactivar:
+            _desactivar(
+                Leccion, [obj for orden, obj in existentes.items() if orden not in deseadas],
+                resumen['lecciones'], ahora
+            )
+
+        # Temas por (lección, orden)
+        existentes = {
+            (tema.leccion_id, tema.orden): tema
+            for tema in Tema.objects.filter(leccion_id__in=[l.id for l in lecciones.values()])
+        }
+        deseados = {}
+        hijos_tema = {}
+        for leccion, temas in arbol:
+            leccion_id = lecciones[leccion.orden].id
+            for tema, contenidos, ejercicios in temas:
+                tema.leccion_id = leccion_id
+                deseados[(leccion_id, tema.orden)] = tema
+                hijos_tema[(leccion_id, tema.orden)] = (contenidos, ejercicios)
+        temas, temas_cambiados = _aplicar(
+            Tema, existentes, deseados, CAMPOS_TEMA, resumen['temas'], ahora
+        )
+        if desactivar:
+            _desactivar(
+                Tema, [obj for clave, obj in existentes.items() if clave not in deseados],
+                resumen['temas'], ahora
+            )
+        tema_ids = [tema.id for tema in temas.values()]
+        temas_modificados = {temas[clave].id for clave in temas_cambiados}
+
+        # Contenidos y ejercicios por (tema, orden)
+        contenidos_existentes = {
+            (c.tema_id, c.orden): c for c in ContenidoTema.objects.filter(tema_id__in=tema_ids)
+        }
+        ejercicios_existentes = {
+            (e.tema_id, e.orden): e for e in Ejercicio.objects.filter(tema_id__in=tema_ids)
+        }
+        contenidos_deseados = {}
+        ejercicios_deseados = {}
+        opciones_por_ejercicio = {}
+        for clave, (contenidos, ejercicios) in hijos_tema.items():
+            tema_id = temas[clave].id
+            for contenido in contenidos:
+                contenido.tema_id = tema_id
+                contenidos_deseados[(tema_id, contenido.orden)] = contenido
+            for ejercicio, opciones in ejercicios:
+                ejercicio.tema_id = tema_id
+                ejercicios_deseados[(tema_id, ejercicio.orden)] = ejercicio
+                opciones_por_ejercicio[(tema_id, ejercicio.orden)] = opciones
+
+        _, contenidos_cambiados = _aplicar(
+            ContenidoTema, contenidos_existentes, contenidos_deseados, CAMPOS_CONTENIDO,
+            resumen['contenidos'], ahora
+        )
+        ejercicios, ejercicios_cambiados = _aplicar(
+            Ejercicio, ejercicios_existentes, ejercicios_deseados,
+            CAMPOS_EJERCICIO + CAMPOS_EJERCICIO_DERIVADOS, resumen['ejercicios'], ahora
+        )
+        resumen['contenidos']['sobrantes'] += len(set(contenidos_existentes) - set(contenidos_deseados))
+        resumen['ejercicios']['sobrantes'] += len(set(ejercicios_existentes) - set(ejercicios_deseados))
+        temas_modificados |= {tema_id for tema_id, _ in contenidos_cambiados | ejercicios_cambiados}
+
+        # Opciones por (ejercicio, letra)
+        ejercicio_ids = {ejercicio.id: clave for clave, ejercicio in ejercicios.items()}
+        opciones_existentes = {
+            (o.ejercicio_id, o.letra): o
+            for o in OpcionMultiple.objects.filter(ejercicio_id__in=ejercicio_ids)
+        }
+        opciones_deseadas = {}
+        for clave, opciones in opciones_por_ejercicio.items():
+            ejercicio_id = ejercicios[clave].id
+            for opcion in opciones:
+                opcion.ejercicio_id = ejercicio_id
+                opciones_deseadas[(ejercicio_id, opcion.letra)] = opcion
+        _, opciones_cambiadas = _aplicar(
+            OpcionMultiple, opciones_existentes, opciones_deseadas, CAMPOS_OPCION,
+            resumen['opciones'], ahora
+        )
+        resumen['opciones']['sobrantes'] += len(set(opciones_existentes) - set(opciones_deseadas))
+        temas_modificados |= {
+            ejercicios[ejercicio_ids[ejercicio_id]].tema_id for ejercicio_id, _ in opciones_cambiadas
+        }
+
+        # Las operaciones masivas no disparan las señales de lessons/signals.py
+        if temas_modificados:
+            Tema.recalcular_contadores(temas_modificados)
+            marcar_modificado(temas_modificados)
+            for tema_id in temas_modificados:
+                invalidar_tema(tema_id)
+        if any(conteos['creados'] or conteos['actualizados'] or conteos['desactivados']
+               for conteos in resumen.values()):
+            indice_contenido.invalidar()
+
+        if simular:
+            transaction.set_rollback(True)
+
+    return resumen
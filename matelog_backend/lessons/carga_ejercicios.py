@@ -0,0 +1,62 @@
+# lessons/carga_ejercicios.py
+"""
+Carga de los ejercicios de un tema como diccionarios listos para la API.
+
+Produce la misma forma que EjercicioSerializer (sin respuesta correcta),
+pero con dos consultas fijas: una para los ejercicios y otra para todas
+sus opciones, sin importar cuántos ejercicios haya ni qué variante
+(grupo/clasificación) se pidió.
+"""
+from .models import Ejercicio, OpcionMultiple
+
+
+CAMPOS_EJERCICIO = (
+    'id', 'orden', 'tipo', 'dificultad', 'mostrar_dificultad',
+    'instruccion', 'enunciado', 'texto_ayuda',
+)
+
+_TIPOS = dict(Ejercicio.TIPO_CHOICES)
+_DIFICULTADES = dict(Ejercicio.DIFICULTAD_CHOICES)
+
+
+def cargar_ejercicios(ejercicio_ids):
+    """
+    Lista de ejercicios (dicts) con sus opciones, ordenada por orden.
+    ejercicio_ids suele venir de ejercicios_visibles.ids_visibles().
+    """
+    ejercicio_ids = list(ejercicio_ids)
+    if not ejercicio_ids:
+        return []
+
+    filas = (
+        Ejercicio.objects.filter(id__in=ejercicio_ids)
+        .order_by('orden')
+        .values(*CAMPOS_EJERCICIO)
+    )
+
+    opciones = {}
+    for ejercicio_id, letra, texto in (
+        OpcionMultiple.objects.filter(ejercicio_id__in=ejercicio_ids)
+        .order_by('ejercicio_id', 'letra')
+        .values_list('ejercicio_id', 'letra', 'texto')
+    ):
+        opciones.setdefault(ejercicio_id, []).append({'letra': letra, 'texto': texto})
+
+    ejercicios = []
+    for fila in filas:
+        ejercicios.append({
+            'id': fila['id'],
+            'orden': fila['orden'],
+            'tipo': fila['tipo'],
+            'tipo_display': _TIPOS.get(fila['tipo'], fila['tipo']),
+            'dificultad': fila['dificultad'],
+            'dificultad_display': _DIFICULTADES.get(fila['dificultad'], fila['dificultad']),
+            'mostrar_dificultad': fila['mostrar_dificultad'],
+            'instruccion': fila['instruccion'],
+            'enunciado': fila['enunciado'],
+            'opciones': opciones.get(fila['id'], []),
+            'texto_ayuda': fila['texto_ayuda'],
+            'tiene_ayuda': bool(fila['texto_ayuda']),
+        })
+    return ejercicios
+
@@ -0,0 +1,223 @@
+# lessons/clonar_contenido.py
+"""
+Clonación de contenido para preparar una nueva cohorte o semestre.
+
+Copia un subárbol completo (lecciones -> temas -> contenidos -> ejercicios
+-> opciones) nivel por nivel: se leen las filas originales con una consulta
+por modelo, se validan todas en memoria y se insertan con bulk_create,
+reasignando las llaves foráneas con los ids que devuelve cada nivel. El
+número de consultas no depende del tamaño del curso.
+
+bulk_create no pasa por Ejercicio.save() (que llama a full_clean y consulta
+las opciones) ni dispara las señales de lessons/signals.py, así que aquí se
+hace lo equivalente en lote:
+- las validaciones de Ejercicio con las letras de opciones ya cargadas;
+- los contadores desnormalizados de Tema se copian del original, porque el
+  tema clonado tiene exactamente los mismos contenidos y ejercicios;
+- una sola invalidación del índice en memoria (lessons/indice_contenido.py).
+
+Lección.orden es único y los temas son únicos por (lección, orden), así que
+los clones se ubican a continuación de los existentes con un desplazamiento
+de orden. Los hijos de un tema clonado conservan su orden.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from .bundle_contenido import TAMANO_LOTE
+from . import indice_contenido
+
+
+class ClonacionInvalida(ValueError):
+    """No se puede clonar. `errores` lista cada problema encontrado."""
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__('\n'.join(errores))
+
+
+def _copia(obj, **valores):
+    """
+    Instancia nueva (sin guardar) con los campos de obj, sin id ni fechas
+    automáticas. `valores` reemplaza campos, típicamente la llave foránea.
+    """
+    campos = {}
+    for campo in obj._meta.concrete_fields:
+        if campo.primary_key or getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False):
+            continue
+        campos[campo.attname] = getattr(obj, campo.attname)
+    campos.update(valores)
+    return type(obj)(**campos)
+
+
+def _nuevos_ordenes(originales, ocupados, desplazamiento, etiqueta):
+    """
+    Calcula {orden original: orden nuevo}. Sin desplazamiento, los clones se
+    ubican justo después del mayor orden ocupado. Lanza ClonacionInvalida si
+    algún orden nuevo ya está ocupado.
+    """
+    originales = sorted(set(originales))
+    if desplazamiento is None:
+        desplazamiento = max(ocupados, default=0) - originales[0] + 1
+    nuevos = {orden: orden + desplazamiento for orden in originales}
+    errores = [
+        f'{etiqueta}: el orden {nuevo} ya está ocupado'
+        for nuevo in nuevos.values() if nuevo in ocupados
+    ]
+    errores += [
+        f'{etiqueta}: el orden {nuevo} no es válido'
+        for nuevo in nuevos.values() if nuevo < 1
+    ]
+    if errores:
+        raise ClonacionInvalida(errores)
+    return nuevos
+
+
+def _validar_ejercicios(ejercicios, opciones):
+    """
+    Lo que haría Ejercicio.save() por cada fila, pero en memoria: normaliza,
+    valida con las letras de opciones ya cargadas y precalcula las claves.
+    Devuelve la lista de errores.
+    """
+    letras = defaultdict(set)
+    for opcion in opciones:
+        letras[opcion.ejercicio_id].add(opcion.letra)
+
+    errores = []
+    for ejercicio in ejercicios:
+        try:
+            ejercicio.normalizar_respuesta_correcta()
+            ejercicio.clean_fields(exclude=['tema'])
+            ejercicio.validar_respuesta_correcta(letras[ejercicio.id])
+            ejercicio.calcular_claves()
+        except ValidationError as e:
+            for campo, mensajes in e.message_dict.items():
+                errores.append(f'Ejercicio {ejercicio.id}.{campo}: {" ".join(mensajes)}')
+    return errores
+
+
+def _clonar_temas(temas, leccion_de, orden_de, activos):
+    """
+    Clona los temas indicados con todos sus hijos. leccion_de(tema) y
+    orden_de(tema) dan la lección y el orden del clon. Devuelve
+    (resumen, {id original: tema clonado}).
+    """
+    tema_ids = [tema.id for tema in temas]
+    contenidos = list(ContenidoTema.objects.filter(tema_id__in=tema_ids))
+    ejercicios = list(Ejercicio.objects.filter(tema_id__in=tema_ids))
+    opciones = list(OpcionMultiple.objects.filter(ejercicio__tema_id__in=tema_ids))
+
+    errores = _validar_ejercicios(ejercicios, opciones)
+    if errores:
+        raise ClonacionInvalida(errores)
+
+    clones_tema = {}
+    for tema in temas:
+        clones_tema[tema.id] = _copia(
+            tema, leccion_id=leccion_de(tema), orden=orden_de(tema),
+            is_active=tema.is_active and activos
+        )
+    Tema.objects.bulk_create(clones_tema.values(), batch_size=TAMANO_LOTE)
+
+    ContenidoTema.objects.bulk_create(
+        [_copia(contenido, tema_id=clones_tema[contenido.tema_id].id) for contenido in contenidos],
+        batch_size=TAMANO_LOTE
+    )
+
+    clones_ejercicio = {
+        ejercicio.id: _copia(ejercicio, tema_id=clones_tema[ejercicio.tema_id].id)
+        for ejercicio in ejercicios
+    }
+    Ejercicio.objects.bulk_create(clones_ejercicio.values(), batch_size=TAMANO_LOTE)
+
+    OpcionMultiple.objects.bulk_create(
+        [_copia(opcion, ejercicio_id=clones_ejercicio[opcion.ejercicio_id].id) for opcion in opciones],
+        batch_size=TAMANO_LOTE
+    )
+    indice_contenido.invalidar()
+
+    resumen = {
+        'temas': len(clones_tema),
+        'contenidos': len(contenidos),
+        'ejercicios': len(ejercicios),
+        'opciones': len(opciones),
+    }
+    return resumen, clones_tema
+
+
+def clonar_lecciones(leccion_ids=None, desplazamiento=None, activas=False):
+    """
+    Clona las lecciones indicadas (todas si leccion_ids es None) con todo su
+    contenido. El orden de cada clon es el original más `desplazamiento`;
+    por defecto, a continuación de la última lección existente.
+    activas=False crea los clones desactivados para revisarlos antes de
+    publicarlos; activas=True conserva el estado de los originales.
+    Devuelve {'lecciones': {id original: id nuevo}, 'temas': n, ...}.
+    """
+    with transaction.atomic():
+        lecciones = Leccion.objects.order_by('orden')
+        if leccion_ids is not None:
+            lecciones = lecciones.filter(id__in=leccion_ids)
+        lecciones = list(lecciones)
+        if not lecciones:
+            raise ClonacionInvalida(['No hay lecciones para clonar'])
+
+        ocupados = set(Leccion.objects.values_list('orden', flat=True))
+        ordenes = _nuevos_ordenes(
+            [leccion.orden for leccion in lecciones], ocupados, desplazamiento, 'Lección'
+        )
+
+        clones = {
+            leccion.id: _copia(
+                leccion, orden=ordenes[leccion.orden],
+                is_active=leccion.is_active and activas
+            )
+            for leccion in lecciones
+        }
+        Leccion.objects.bulk_create(clones.values(), batch_size=TAMANO_LOTE)
+
+        temas = list(Tema.objects.filter(leccion_id__in=clones))
+        resumen, _ = _clonar_temas(
+            temas,
+            leccion_de=lambda tema: clones[tema.leccion_id].id,
+            orden_de=lambda tema: tema.orden,
+            activos=True,
+        )
+
+    resumen['lecciones'] = {original: clon.id for original, clon in clones.items()}
+    return resumen
+
+
+def clonar_temas(tema_ids, leccion_destino_id, desplazamiento=None, activos=False):
+    """
+    Clona temas (con su contenido) dentro de otra lección o de la misma.
+    El orden de cada clon es el original más `desplazamiento`; por defecto,
+    a continuación del último tema de la lección destino.
+    Devuelve {'temas': {id original: id nuevo}, 'contenidos': n, ...}.
+    """
+    with transaction.atomic():
+        temas = list(Tema.objects.filter(id__in=tema_ids).order_by('orden'))
+        if not temas:
+            raise ClonacionInvalida(['No hay temas para clonar'])
+        if not Leccion.objects.filter(id=leccion_destino_id).exists():
+            raise ClonacionInvalida([f'No existe la lección {leccion_destino_id}'])
+
+        ocupados = set(
+            Tema.objects.filter(leccion_id=leccion_destino_id).values_list('orden', flat=True)
+        )
+        originales = [tema.orden for tema in temas]
+        if len(set(originales)) != len(originales):
+            raise ClonacionInvalida(['Los temas vienen de lecciones distintas con el mismo orden'])
+        ordenes = _nuevos_ordenes(originales, ocupados, desplazamiento, 'Tema')
+
+        resumen, clones = _clonar_temas(
+            temas,
+            leccion_de=lambda tema: leccion_destino_id,
+            orden_de=lambda tema: ordenes[tema.orden],
+            activos=activos,
+        )
+
+    resumen['temas'] = {original: clon.id for original, clon in clones.items()}
+    return resumen
@@ -0,0 +1,94 @@
+# lessons/condicional.py
+"""
+GET condicional (ETag / Last-Modified) para LeccionListView,
+LeccionDetailView y TemaDetailView.
+
+El ETag combina la versión del contenido (fecha_modificacion de lecciones y
+temas, que las señales actualizan al editar contenidos, ejercicios u
+opciones) con la versión persistente del progreso del usuario
+(CustomUser.version_progreso, ver progreso_cache). Ambas se obtienen con una
+consulta pequeña y la fila del usuario, así que un If-None-Match que
+coincide se responde con 304 antes de serializar o escribir nada.
+
+Las escrituras de la primera visita (LeccionDetailView, TemaDetailView)
+incrementan la versión antes de calcular el ETag de la respuesta, de modo
+que un ETag que coincide implica que ya se hicieron.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Leccion
+from .ejercicios_visibles import regla_usuario
+from .progreso_cache import version_progreso
+
+
+Validadores = namedtuple('Validadores', ['etag', 'last_modified'])
+
+
+def _validadores(usuario, fechas, *partes):
+    """
+    ETag fuerte a partir de las partes indicadas más la versión del progreso;
+    Last-Modified es la fecha más reciente entre contenido y progreso.
+    """
+    version, modificado = version_progreso(usuario)
+    sellos = [fecha.timestamp() for fecha in fechas if fecha is not None]
+    texto = '|'.join(str(parte) for parte in (*sellos, *partes, usuario.pk, version))
+    etag = '"%s"' % hashlib.sha1(texto.encode()).hexdigest()
+    return Validadores(etag, int(max([*sellos, modificado])))
+
+
+def validadores_lecciones(usuario):
+    """Lista de lecciones: cualquier cambio en lecciones o temas la invalida."""
+    version = Leccion.objects.aggregate(
+        ultima_leccion=Max('fecha_modificacion'),
+        ultimo_tema=Max('temas__fecha_modificacion'),
+        cantidad_temas=Count('temas'),
+    )
+    return _validadores(
+        usuario, [version['ultima_leccion'], version['ultimo_tema']],
+        'lecciones', version['cantidad_temas']
+    )
+
+
+def lecciones_con_version():
+    """Lecciones anotadas con la versión de sus temas (una sola consulta)."""
+    return Leccion.objects.annotate(
+        ultimo_tema=Max('temas__fecha_modificacion'),
+        cantidad_temas=Count('temas'),
+    )
+
+
+def validadores_leccion(usuario, leccion):
+    """Detalle de lección; `leccion` debe venir de lecciones_con_version()."""
+    return _validadores(
+        usuario, [leccion.fecha_modificacion, leccion.ultimo_tema],
+        'leccion', leccion.id, leccion.cantidad_temas
+    )
+
+
+def validadores_tema(usuario, tema):
+    """Detalle de tema: incluye la regla del usuario porque define sus ejercicios."""
+    grupo, clasificacion = regla_usuario(usuario)
+    return _validadores(
+        usuario, [tema.fecha_modificacion], 'tema', tema.id, grupo, clasificacion
+    )
+
+
+def respuesta_no_modificada(request, validadores):
+    """HttpResponseNotModified si el cliente ya tiene esta versión, None si no."""
+    return get_conditional_response(
+        request, etag=validadores.etag, last_modified=validadores.last_modified
+    )
+
+
+def agregar_validadores(response, validadores):
+    """Agrega ETag y Last-Modified; el cliente debe revalidar siempre."""
+    if response.status_code == 200:
+        response['ETag'] = validadores.etag
+        response['Last-Modified'] = http_date(validadores.last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
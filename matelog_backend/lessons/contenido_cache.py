@@ -0,0 +1,66 @@
+# lessons/contenido_cache.py
+"""
+Payload compartido del detalle de un tema (TemaDetailView).
+
+La parte estática del detalle (HTML de contenidos y ejercicios con sus
+opciones) es igual para todos los estudiantes que ven el mismo subconjunto
+de ejercicios. Se serializa una vez por (tema, variante de ejercicios) y se
+guarda en cache ya renderizada como bytes JSON; la vista solo agrega la
+parte del usuario (respuestas, siguiente ejercicio, progreso).
+
+La clave incluye Tema.fecha_modificacion como versión. Las señales de
+lessons/signals.py la actualizan al editar contenidos, ejercicios u
+opciones, de modo que las entradas viejas dejan de leerse y expiran solas.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .models import Tema
+from .serializers import TemaDetailSerializer
+
+
+def _clave_payload(tema, ejercicio_ids):
+    version = int(tema.fecha_modificacion.timestamp() * 1_000_000)
+    variante = hashlib.md5(
+        ','.join(map(str, ejercicio_ids)).encode()
+    ).hexdigest()[:12]
+    return f'tema_payload:{tema.id}:{version}:{variante}'
+
+
+def payload_tema(tema, ejercicio_ids):
+    """
+    Bytes JSON de TemaDetailSerializer para los ejercicios indicados
+    (lista de ids en orden, ver ejercicios_visibles.ids_visibles).
+    """
+    clave = _clave_payload(tema, ejercicio_ids)
+    payload = cache.get(clave)
+    if payload is None:
+        datos = TemaDetailSerializer(tema, context={'ejercicio_ids': ejercicio_ids}).data
+        payload = JSONRenderer().render(datos)
+        cache.set(clave, payload, settings.TEMA_PAYLOAD_TIMEOUT)
+    return payload
+
+
+def combinar(payload, datos_usuario):
+    """
+    Agrega las claves de datos_usuario al objeto JSON de payload sin volver
+    a parsearlo: ambos se renderizan por separado y se unen los bytes.
+    """
+    if not datos_usuario:
+        return payload
+    extra = JSONRenderer().render(datos_usuario)
+    return payload[:-1] + b',' + extra[1:]
+
+
+def marcar_modificado(tema_ids):
+    """
+    Nueva versión del contenido de los temas indicados. Se usa desde las
+    señales porque editar un contenido o ejercicio no toca la fila de Tema.
+    """
+    tema_ids = [tema_id for tema_id in tema_ids if tema_id is not None]
+    if tema_ids:
+        Tema.objects.filter(id__in=tema_ids).update(fecha_modificacion=timezone.now())
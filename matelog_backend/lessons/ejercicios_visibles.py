@@ -0,0 +1,96 @@
+# lessons/ejercicios_visibles.py
+"""
+Resolución de los ejercicios que ve cada usuario (MateLog-AE).
+
+Regla única usada por TemaDetailSerializer y FinalizarTemaView:
+- Control: solo ejercicios con obligatorio=True
+- Experimental: ejercicios obligatorios + opcionales según clasificación de autoeficacia
+  - ALTO: INTERMEDIO + DIFICIL
+  - MEDIO: INTERMEDIO
+  - BAJO: FACIL + INTERMEDIO
+  - Sin clasificación aún: solo obligatorios
+- Sin grupo o sin perfil (usuarios antiguos): todos los ejercicios
+
+Los metadatos de los ejercicios de cada tema (id, orden, dificultad,
+obligatorio) se leen una vez y se guardan en cache; las señales de
+Ejercicio llaman a invalidar_tema() cuando cambian.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Ejercicio
+
+
+# Dificultades de los ejercicios opcionales que se agregan por clasificación
+DIFICULTADES_OPCIONALES = {
+    'ALTO': frozenset(['INTERMEDIO', 'DIFICIL']),
+    'MEDIO': frozenset(['INTERMEDIO']),
+    'BAJO': frozenset(['FACIL', 'INTERMEDIO']),
+}
+
+
+def _clave_tema(tema_id):
+    return f'ejercicios_tema:{tema_id}'
+
+
+def metadatos_tema(tema_id):
+    """
+    Lista de (id, orden, dificultad, obligatorio) de los ejercicios del tema,
+    ordenada por orden.
+    """
+    clave = _clave_tema(tema_id)
+    metadatos = cache.get(clave)
+    if metadatos is None:
+        metadatos = list(
+            Ejercicio.objects.filter(tema_id=tema_id)
+            .order_by('orden')
+            .values_list('id', 'orden', 'dificultad', 'obligatorio')
+        )
+        cache.set(clave, metadatos, settings.EJERCICIOS_TEMA_TIMEOUT)
+    return metadatos
+
+
+def invalidar_tema(tema_id):
+    cache.delete(_clave_tema(tema_id))
+
+
+def regla_usuario(usuario):
+    """
+    Devuelve (grupo, clasificacion) del usuario.
+    (None, None) si no está autenticado o no tiene perfil.
+    """
+    if usuario is None or not usuario.is_authenticated:
+        return None, None
+    try:
+        perfil = usuario.perfil
+    except AttributeError:
+        # Usuario sin perfil (usuarios antiguos antes de MateLog-AE)
+        return None, None
+    return perfil.grupo, perfil.clasificacion_autoeficacia
+
+
+def dificultades_opcionales(grupo, clasificacion):
+    """
+    Dificultades de ejercicios no obligatorios visibles para la regla.
+    None significa que se ven todos los ejercicios.
+    """
+    if grupo == 'CONTROL':
+        return frozenset()
+    if grupo == 'EXPERIMENTAL':
+        return DIFICULTADES_OPCIONALES.get(clasificacion, frozenset())
+    return None
+
+
+def ids_visibles(tema_id, grupo, clasificacion):
+    """IDs de los ejercicios visibles del tema para (grupo, clasificacion), en orden."""
+    opcionales = dificultades_opcionales(grupo, clasificacion)
+    return [
+        ejercicio_id
+        for ejercicio_id, _, dificultad, obligatorio in metadatos_tema(tema_id)
+        if opcionales is None or obligatorio or dificultad in opcionales
+    ]
+
+
+def ids_visibles_para_usuario(tema_id, usuario):
+    grupo, clasificacion = regla_usuario(usuario)
+    return ids_visibles(tema_id, grupo, clasificacion)
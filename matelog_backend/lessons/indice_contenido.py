@@ -0,0 +1,245 @@
+# lessons/indice_contenido.py
+"""
+Índice en memoria (por proceso) del árbol de contenido.
+
+Las vistas de tracking y de respuestas solo necesitan saber si un tema,
+contenido o ejercicio existe y algunos datos fijos (lección, orden, tipo,
+dificultad, obligatorio, tema siguiente, contenidos contables, y las claves
+y retroalimentación con que se valida cada ejercicio). Ese árbol
+solo cambia cuando un administrador edita el contenido, así que cada
+proceso lo carga una vez (cuatro consultas) y lo resuelve con diccionarios.
+
+El índice es inmutable: se reemplaza completo, nunca se modifica, así que
+los hilos pueden leerlo sin bloqueo. Para saber si sigue vigente se compara
+su versión con la fila VersionContenido, como mucho una vez cada
+INDICE_CONTENIDO_TTL segundos. Las señales de lessons/signals.py llaman a
+invalidar(), que incrementa esa versión y descarta el índice del proceso
+actual; los demás procesos lo recargan al vencer el TTL. Un id que no está
+en el índice fuerza la comprobación inmediata, para no rechazar contenido
+recién creado en otro proceso.
+
+Las operaciones masivas (bulk_create, bulk_update, queryset.update) deben
+llamar a invalidar() por su cuenta.
+"""
+import threading
+import time
+from collections import defaultdict
+from types import MappingProxyType
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+from .models import (
+    Leccion, Tema, ContenidoTema, Ejercicio, VersionContenido, es_respuesta_correcta
+)
+
+
+class LeccionIndice(NamedTuple):
+    id: int
+    orden: int
+    is_active: bool
+    tema_ids: Tuple[int, ...]
+
+
+class TemaIndice(NamedTuple):
+    id: int
+    leccion_id: int
+    orden: int
+    titulo: str
+    is_active: bool
+    siguiente_id: Optional[int]
+    contenidos_contables: int
+    total_ejercicios: int
+    contenido_ids: Tuple[int, ...]
+    ejercicio_ids: Tuple[int, ...]
+
+
+class ContenidoIndice(NamedTuple):
+    id: int
+    tema_id: int
+    orden: int
+    tipo: str
+
+    @property
+    def contable(self):
+        """Los EJEMPLO_EXTRA no cuentan para el progreso."""
+        return self.tipo != 'EJEMPLO_EXTRA'
+
+
+class EjercicioIndice(NamedTuple):
+    id: int
+    tema_id: int
+    orden: int
+    tipo: str
+    dificultad: str
+    obligatorio: bool
+    modo_validacion: str
+    respuesta_correcta: str
+    respuestas_alternativas: Tuple[str, ...]
+    respuesta_normalizada: str
+    claves_alternativas: FrozenSet[str]
+    retroalimentacion_correcta: str
+    retroalimentacion_incorrecta: str
+
+    def validar_respuesta(self, respuesta_usuario):
+        """Igual que Ejercicio.validar_respuesta, sin consultar la base."""
+        return es_respuesta_correcta(self, respuesta_usuario)
+
+
+class IndiceContenido:
+    """Árbol de contenido de solo lectura para una versión dada."""
+
+    def __init__(self, version, lecciones, temas, contenidos, ejercicios):
+        self.version = version
+        self.lecciones = MappingProxyType(lecciones)
+        self.temas = MappingProxyType(temas)
+        self.contenidos = MappingProxyType(contenidos)
+        self.ejercicios = MappingProxyType(ejercicios)
+
+    @classmethod
+    def construir(cls, version):
+        """Carga el árbol completo con una consulta por modelo."""
+        contenidos = {}
+        contenidos_por_tema = defaultdict(list)
+        for fila in ContenidoTema.objects.order_by('tema_id', 'orden').values_list(
+            'id', 'tema_id', 'orden', 'tipo'
+        ):
+            contenido = ContenidoIndice(*fila)
+            contenidos[contenido.id] = contenido
+            contenidos_por_tema[contenido.tema_id].append(contenido.id)
+
+        ejercicios = {}
+        ejercicios_por_tema = defaultdict(list)
+        for fila in Ejercicio.objects.order_by('tema_id', 'orden').values_list(
+            'id', 'tema_id', 'orden', 'tipo', 'dificultad', 'obligatorio',
+            'modo_validacion', 'respuesta_correcta', 'respuestas_alternativas',
+            'respuesta_normalizada', 'claves_alternativas',
+            'retroalimentacion_correcta', 'retroalimentacion_incorrecta'
+        ):
+            *fijos, alternativas, normalizada, claves, correcta, incorrecta = fila
+            ejercicio = EjercicioIndice(
+                *fijos, tuple(alternativas or ()), normalizada,
+                frozenset(claves or ()), correcta, incorrecta
+            )
+            ejercicios[ejercicio.id] = ejercicio
+            ejercicios_por_tema[ejercicio.tema_id].append(ejercicio.id)
+
+        filas_tema = list(Tema.objects.order_by('leccion_id', 'orden').values_list(
+            'id', 'leccion_id', 'orden', 'titulo', 'is_active',
+            'contenidos_contables', 'total_ejercicios'
+        ))
+        # Siguiente tema: el activo de la misma lección con orden + 1
+        activos = {
+            (leccion_id, orden): tema_id
+            for tema_id, leccion_id, orden, _, is_active, _, _ in filas_tema if is_active
+        }
+        temas = {}
+        temas_por_leccion = defaultdict(list)
+        for tema_id, leccion_id, orden, titulo, is_active, contables, total in filas_tema:
+            temas[tema_id] = TemaIndice(
+                id=tema_id,
+                leccion_id=leccion_id,
+                orden=orden,
+                titulo=titulo,
+                is_active=is_active,
+                siguiente_id=activos.get((leccion_id, orden + 1)),
+                contenidos_contables=contables,
+                total_ejercicios=total,
+                contenido_ids=tuple(contenidos_por_tema.get(tema_id, ())),
+                ejercicio_ids=tuple(ejercicios_por_tema.get(tema_id, ())),
+            )
+            temas_por_leccion[leccion_id].append(tema_id)
+
+        lecciones = {
+            leccion_id: LeccionIndice(
+                leccion_id, orden, is_active, tuple(temas_por_leccion.get(leccion_id, ()))
+            )
+            for leccion_id, orden, is_active in Leccion.objects.values_list('id', 'orden', 'is_active')
+        }
+        return cls(version, lecciones, temas, contenidos, ejercicios)
+
+    def siguiente_tema(self, tema_id):
+        """TemaIndice del tema que se desbloquea al completar tema_id, o None."""
+        tema = self.temas.get(tema_id)
+        if tema is None or tema.siguiente_id is None:
+            return None
+        return self.temas[tema.siguiente_id]
+
+
+_indice = None
+_verificar_en = 0.0
+_candado = threading.Lock()
+
+
+def obtener_indice(forzar=False):
+    """
+    Índice vigente del proceso. Consulta la versión como mucho una vez por
+    TTL (o siempre con forzar=True) y lo reconstruye si cambió.
+    """
+    global _indice, _verificar_en
+    indice = _indice
+    if indice is not None and not forzar and time.monotonic() < _verificar_en:
+        return indice
+
+    with _candado:
+        # La versión se lee antes que el árbol: si cambia mientras se carga,
+        # el índice queda con la versión vieja y se recarga en la próxima comprobación
+        version = VersionContenido.actual()
+        if _indice is None or _indice.version != version:
+            _indice = IndiceContenido.construir(version)
+        _verificar_en = time.monotonic() + settings.INDICE_CONTENIDO_TTL
+        return _indice
+
+
+def invalidar():
+    """Nueva versión global del contenido y descarte del índice de este proceso."""
+    global _indice
+    VersionContenido.incrementar()
+    _indice = None
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _buscar(coleccion, valor):
+    """Busca un id en el índice; si no está, comprueba la versión una vez más."""
+    clave = _entero(valor)
+    if clave is None:
+        return None
+    encontrado = getattr(obtener_indice(), coleccion).get(clave)
+    if encontrado is None:
+        encontrado = getattr(obtener_indice(forzar=True), coleccion).get(clave)
+    return encontrado
+
+
+def tema(tema_id):
+    """TemaIndice o None si no existe (acepta ids como texto)."""
+    return _buscar('temas', tema_id)
+
+
+def contenido(contenido_id):
+    """ContenidoIndice o None si no existe."""
+    return _buscar('contenidos', contenido_id)
+
+
+def ejercicio(ejercicio_id):
+    """EjercicioIndice o None si no existe."""
+    return _buscar('ejercicios', ejercicio_id)
+
+
+def existentes(coleccion, ids):
+    """
+    Subconjunto de ids (enteros) presentes en el índice. Si falta alguno se
+    comprueba la versión una vez antes de darlo por inexistente.
+    """
+    ids = set(ids)
+    if not ids:
+        return set()
+    encontrados = ids & getattr(obtener_indice(), coleccion).keys()
+    if encontrados != ids:
+        encontrados = ids & getattr(obtener_indice(forzar=True), coleccion).keys()
+    return encontrados
@@ -0,0 +1,220 @@
+# lessons/logica.py
+"""
+Equivalencia de fórmulas de lógica proposicional por tabla de verdad.
+
+Se usa en ejercicios ABIERTO con modo_validacion='LOGICA': la respuesta del
+estudiante es correcta si es lógicamente equivalente a respuesta_correcta
+(p. ej. "q ∧ p" frente a "p ∧ q", o "¬(p ∨ q)" frente a "¬p ∧ ¬q").
+
+Cada fórmula se evalúa sobre TODAS las asignaciones a la vez: la columna de
+una variable es un entero de 2^n bits (bit i = valor en la fila i) y los
+conectivos se aplican con operaciones de bits sobre esos enteros. El parseo
+y las tablas de la fórmula de referencia quedan memoizados, así que validar
+una respuesta solo parsea el texto del estudiante.
+"""
+from functools import lru_cache
+import re
+
+
+# Con 10 variables la tabla tiene 1024 filas; más allá no es un ejercicio razonable
+MAX_VARIABLES = 10
+
+
+class FormulaInvalida(ValueError):
+    """La fórmula no se pudo interpretar."""
+
+
+# Símbolos aceptados para cada conectivo (de mayor a menor longitud)
+_SIMBOLOS = [
+    ('<->', 'IFF'), ('<=>', 'IFF'), ('↔', 'IFF'), ('⇔', 'IFF'), ('≡', 'IFF'),
+    ('->', 'IMP'), ('=>', 'IMP'), ('→', 'IMP'), ('⇒', 'IMP'),
+    ('⊕', 'XOR'), ('⊻', 'XOR'),
+    ('∨', 'OR'), ('|', 'OR'), ('+', 'OR'),
+    ('∧', 'AND'), ('&', 'AND'), ('^', 'AND'), ('·', 'AND'), ('*', 'AND'),
+    ('¬', 'NOT'), ('~', 'NOT'), ('!', 'NOT'),
+    ('(', '('), ('[', '('), ('{', '('),
+    (')', ')'), (']', ')'), ('}', ')'),
+    ('⊤', 'CONST1'), ('1', 'CONST1'),
+    ('⊥', 'CONST0'), ('0', 'CONST0'),
+]
+
+_PATRON_TOKEN = re.compile(
+    r'\s*(?:(?P<var>[a-z][0-9]*)|(?P<sim>'
+    + '|'.join(re.escape(simbolo) for simbolo, _ in _SIMBOLOS)
+    + r'))'
+)
+_TIPO_SIMBOLO = dict(_SIMBOLOS)
+
+# Conectivos binarios, de menor a mayor precedencia. IMP asocia a la derecha.
+_NIVELES = ['IFF', 'IMP', 'XOR', 'OR', 'AND']
+
+
+def _tokenizar(texto):
+    tokens = []
+    posicion = 0
+    texto = texto.strip().lower()
+    while posicion < len(texto):
+        coincidencia = _PATRON_TOKEN.match(texto, posicion)
+        if not coincidencia:
+            raise FormulaInvalida(f'Símbolo no reconocido en la posición {posicion + 1}')
+        variable = coincidencia.group('var')
+        if variable == 'v':
+            # "p v q" es la notación habitual de la disyunción en clase
+            tokens.append(('OR', None))
+        elif variable:
+            tokens.append(('VAR', variable))
+        else:
+            tokens.append((_TIPO_SIMBOLO[coincidencia.group('sim')], None))
+        posicion = coincidencia.end()
+    return tokens
+
+
+class _Parser:
+    """Parser descendente recursivo que produce tuplas (operador, *operandos)."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.posicion = 0
+
+    def _actual(self):
+        if self.posicion < len(self.tokens):
+            return self.tokens[self.posicion][0]
+        return None
+
+    def parsear(self):
+        if not self.tokens:
+            raise FormulaInvalida('La fórmula está vacía')
+        arbol = self._binario(0)
+        if self.posicion != len(self.tokens):
+            raise FormulaInvalida('Sobran símbolos al final de la fórmula')
+        return arbol
+
+    def _binario(self, nivel):
+        if nivel == len(_NIVELES):
+            return self._unario()
+        operador = _NIVELES[nivel]
+        izquierda = self._binario(nivel + 1)
+        if operador == 'IMP':
+            if self._actual() == 'IMP':
+                self.posicion += 1
+                return ('IMP', izquierda, self._binario(nivel))
+            return izquierda
+        while self._actual() == operador:
+            self.posicion += 1
+            izquierda = (operador, izquierda, self._binario(nivel + 1))
+        return izquierda
+
+    def _unario(self):
+        tipo = self._actual()
+        if tipo == 'NOT':
+            self.posicion += 1
+            return ('NOT', self._unario())
+        if tipo == '(':
+            self.posicion += 1
+            arbol = self._binario(0)
+            if self._actual() != ')':
+                raise FormulaInvalida('Falta cerrar un paréntesis')
+            self.posicion += 1
+            return arbol
+        if tipo == 'VAR':
+            nombre = self.tokens[self.posicion][1]
+            self.posicion += 1
+            return ('VAR', nombre)
+        if tipo in ('CONST0', 'CONST1'):
+            self.posicion += 1
+            return (tipo,)
+        raise FormulaInvalida('Se esperaba una variable, una negación o un paréntesis')
+
+
+def _variables(arbol):
+    if arbol[0] == 'VAR':
+        return {arbol[1]}
+    return set().union(*(_variables(hijo) for hijo in arbol[1:]))
+
+
+@lru_cache(maxsize=2048)
+def parsear(texto):
+    """
+    Devuelve (arbol, variables) de la fórmula. Las variables son una letra
+    con subíndice opcional (p, q, r1, ...), sin distinguir mayúsculas; la
+    letra v se reserva para la disyunción. Se devuelven ordenadas.
+    Lanza FormulaInvalida si el texto no es una fórmula válida.
+    """
+    arbol = _Parser(_tokenizar(texto)).parsear()
+    variables = tuple(sorted(_variables(arbol)))
+    if len(variables) > MAX_VARIABLES:
+        raise FormulaInvalida(f'La fórmula tiene más de {MAX_VARIABLES} variables')
+    return arbol, variables
+
+
+@lru_cache(maxsize=64)
+def _columnas(cantidad):
+    """
+    Columnas de la tabla de verdad para `cantidad` variables.
+    La variable i vale 1 en las filas cuyo bit i está encendido.
+    """
+    filas = 1 << cantidad
+    columnas = []
+    for i in range(cantidad):
+        bloque = (1 << (1 << i)) - 1               # 2^i unos
+        patron = bloque << (1 << i)                 # 2^i ceros seguidos de 2^i unos
+        periodo = 1 << (i + 1)
+        columna = 0
+        for inicio in range(0, filas, periodo):
+            columna |= patron << inicio
+        columnas.append(columna)
+    return tuple(columnas), (1 << filas) - 1
+
+
+def _evaluar(arbol, valores, todas):
+    operador = arbol[0]
+    if operador == 'VAR':
+        return valores[arbol[1]]
+    if operador == 'CONST1':
+        return todas
+    if operador == 'CONST0':
+        return 0
+    if operador == 'NOT':
+        return ~_evaluar(arbol[1], valores, todas) & todas
+    a = _evaluar(arbol[1], valores, todas)
+    b = _evaluar(arbol[2], valores, todas)
+    if operador == 'AND':
+        return a & b
+    if operador == 'OR':
+        return a | b
+    if operador == 'XOR':
+        return a ^ b
+    if operador == 'IMP':
+        return (~a | b) & todas
+    return ~(a ^ b) & todas                         # IFF
+
+
+@lru_cache(maxsize=2048)
+def tabla_verdad(texto, variables):
+    """
+    Máscara de bits con la tabla de verdad de la fórmula evaluada sobre
+    `variables` (tupla ordenada que debe incluir todas las de la fórmula).
+    """
+    arbol, _ = parsear(texto)
+    columnas, todas = _columnas(len(variables))
+    return _evaluar(arbol, dict(zip(variables, columnas)), todas)
+
+
+def equivalentes(referencia, respuesta):
+    """
+    True si ambas fórmulas tienen la misma tabla de verdad sobre la unión
+    de sus variables. Una respuesta que no se puede interpretar no es
+    equivalente; una referencia inválida lanza FormulaInvalida.
+    """
+    _, variables_referencia = parsear(referencia)
+    try:
+        _, variables_respuesta = parsear(respuesta)
+    except FormulaInvalida:
+        return False
+
+    variables = variables_referencia
+    if variables_respuesta != variables_referencia:
+        variables = tuple(sorted(set(variables_referencia) | set(variables_respuesta)))
+        if len(variables) > MAX_VARIABLES:
+            return False
+    return tabla_verdad(referencia, variables) == tabla_verdad(respuesta, variables)
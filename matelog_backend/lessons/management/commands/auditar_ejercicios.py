@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Count
 from lessons.models import Ejercicio, OpcionMultiple
 import string
 
@@ -70,6 +71,40 @@ class Command(BaseCommand):
                         'detalle': f'Tiene espacios inconsistentes: "{ej.respuesta_correcta}"'
                     })
 
+        # 5. Verificar ejercicios ABIERTO cuya clave normalizada queda vacia
+        #    (p. ej. una respuesta formada solo por signos de puntuacion)
+        for ej in Ejercicio.objects.filter(tipo='ABIERTO', respuesta_normalizada='').exclude(respuesta_correcta=''):
+            problemas.append({
+                'id': ej.id,
+                'tema': str(ej.tema),
+                'tipo': 'CLAVE_VACIA',
+                'detalle': f'La respuesta "{ej.respuesta_correcta}" se normaliza a una clave vacia'
+            })
+
+        # 6. Claves ambiguas: respuestas distintas que se normalizan igual
+        #    (p. ej. "x-1" y "x+1" -> "x1"). Un solo GROUP BY por clave.
+        claves_ambiguas = dict(
+            Ejercicio.objects.filter(tipo='ABIERTO')
+            .values('respuesta_normalizada')
+            .annotate(variantes=Count('respuesta_correcta', distinct=True))
+            .filter(variantes__gt=1)
+            .order_by()
+            .values_list('respuesta_normalizada', 'variantes')
+        )
+        if claves_ambiguas:
+            for ej in Ejercicio.objects.filter(
+                tipo='ABIERTO', respuesta_normalizada__in=claves_ambiguas
+            ).select_related('tema').order_by('respuesta_normalizada', 'id'):
+                problemas.append({
+                    'id': ej.id,
+                    'tema': str(ej.tema),
+                    'tipo': 'CLAVE_AMBIGUA',
+                    'detalle': (
+                        f'"{ej.respuesta_correcta}" comparte la clave "{ej.respuesta_normalizada}" '
+                        f'con {claves_ambiguas[ej.respuesta_normalizada] - 1} respuesta(s) distinta(s)'
+                    )
+                })
+
         # Mostrar resultados
         self.stdout.write("")
         if not problemas:
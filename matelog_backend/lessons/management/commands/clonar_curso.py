@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+from lessons.clonar_contenido import clonar_lecciones, clonar_temas, ClonacionInvalida
+
+
+class Command(BaseCommand):
+    help = (
+        'Clona lecciones completas (o temas dentro de una lección) para una nueva cohorte. '
+        'Los clones quedan desactivados salvo que se indique --activas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--leccion',
+            type=int,
+            action='append',
+            dest='lecciones',
+            help='ID de lección a clonar (se puede repetir). Por defecto, todas',
+        )
+        parser.add_argument(
+            '--tema',
+            type=int,
+            action='append',
+            dest='temas',
+            help='ID de tema a clonar (se puede repetir). Requiere --destino',
+        )
+        parser.add_argument(
+            '--destino',
+            type=int,
+            help='ID de la lección donde se crean los temas clonados',
+        )
+        parser.add_argument(
+            '--desplazamiento',
+            type=int,
+            help='Se suma al orden de cada original. Por defecto, después del último existente',
+        )
+        parser.add_argument(
+            '--activas',
+            action='store_true',
+            help='Conserva el estado activo de los originales en lugar de crear los clones desactivados',
+        )
+
+    def handle(self, *args, **options):
+        if options['temas'] and options['lecciones']:
+            raise CommandError('Use --leccion o --tema, no ambos')
+        if options['temas'] and options['destino'] is None:
+            raise CommandError('--tema requiere --destino')
+
+        try:
+            if options['temas']:
+                resumen = clonar_temas(
+                    options['temas'], options['destino'],
+                    desplazamiento=options['desplazamiento'], activos=options['activas'],
+                )
+                clonados = resumen.pop('temas')
+                resumen['temas'] = len(clonados)
+            else:
+                resumen = clonar_lecciones(
+                    options['lecciones'],
+                    desplazamiento=options['desplazamiento'], activas=options['activas'],
+                )
+                clonados = resumen.pop('lecciones')
+                resumen['lecciones'] = len(clonados)
+        except ClonacionInvalida as e:
+            for error in e.errores:
+                self.stderr.write(f"  - {error}")
+            raise CommandError(f"No se pudo clonar: {len(e.errores)} errores")
+
+        self.stdout.write("=" * 80)
+        for original, nuevo in clonados.items():
+            self.stdout.write(f"  {original} -> {nuevo}")
+        for modelo, total in resumen.items():
+            self.stdout.write(f"{modelo:<12}{total:>8}")
+        self.stdout.write("=" * 80)
+        if not options['activas']:
+            self.stdout.write(self.style.WARNING('>>> Los clones quedaron desactivados; activalos desde el admin'))
+        self.stdout.write(self.style.SUCCESS('>>> Clonacion completada'))
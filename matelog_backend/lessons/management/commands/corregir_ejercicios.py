@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from lessons.models import Ejercicio
-import string
+from lessons.normalizacion import normalizar_respuesta
 
 
 class Command(BaseCommand):
@@ -33,7 +33,10 @@ class Command(BaseCommand):
                 self.stdout.write(f"Ejercicio {ej.id}: '{original}' -> '{normalizado}'")
                 if not dry_run:
                     # Actualizar directamente sin llamar a save() para evitar full_clean()
-                    Ejercicio.objects.filter(pk=ej.pk).update(respuesta_correcta=normalizado)
+                    Ejercicio.objects.filter(pk=ej.pk).update(
+                        respuesta_correcta=normalizado,
+                        respuesta_normalizada=normalizar_respuesta(ej.tipo, normalizado)
+                    )
                 correcciones += 1
 
         # 2. Quitar espacios extra en respuestas ABIERTO
@@ -47,7 +50,10 @@ class Command(BaseCommand):
                 self.stdout.write(f"  Despues: '{normalizado}'")
                 if not dry_run:
                     # Actualizar directamente sin llamar a save() para evitar full_clean()
-                    Ejercicio.objects.filter(pk=ej.pk).update(respuesta_correcta=normalizado)
+                    Ejercicio.objects.filter(pk=ej.pk).update(
+                        respuesta_correcta=normalizado,
+                        respuesta_normalizada=normalizar_respuesta(ej.tipo, normalizado)
+                    )
                 correcciones += 1
 
         # 3. Quitar puntuacion final en respuestas ABIERTO (opcional)
@@ -61,9 +67,29 @@ class Command(BaseCommand):
                 self.stdout.write(f"  Despues: '{sin_puntuacion}'")
                 if not dry_run:
                     # Actualizar directamente sin llamar a save() para evitar full_clean()
-                    Ejercicio.objects.filter(pk=ej.pk).update(respuesta_correcta=sin_puntuacion)
+                    Ejercicio.objects.filter(pk=ej.pk).update(
+                        respuesta_correcta=sin_puntuacion,
+                        respuesta_normalizada=normalizar_respuesta(ej.tipo, sin_puntuacion)
+                    )
                 correcciones += 1
 
+        # 4. Recalcular claves normalizadas desactualizadas (p. ej. cargadas con loaddata)
+        if not dry_run:
+            desactualizados = []
+            for ej in Ejercicio.objects.only(
+                'id', 'tipo', 'respuesta_correcta', 'respuesta_normalizada',
+                'respuestas_alternativas', 'claves_alternativas'
+            ):
+                claves = (ej.respuesta_normalizada, ej.claves_alternativas)
+                ej.calcular_claves()
+                if claves != (ej.respuesta_normalizada, ej.claves_alternativas):
+                    self.stdout.write(f"Ejercicio {ej.id}: clave normalizada recalculada")
+                    desactualizados.append(ej)
+            Ejercicio.objects.bulk_update(
+                desactualizados, ['respuesta_normalizada', 'claves_alternativas'], batch_size=500
+            )
+            correcciones += len(desactualizados)
+
         self.stdout.write("")
         self.stdout.write("=" * 80)
         if dry_run:
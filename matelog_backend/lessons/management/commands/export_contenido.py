@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+from lessons.bundle_contenido import exportar_bundle
+
+
+class Command(BaseCommand):
+    help = 'Exporta lecciones, temas, contenidos, ejercicios y opciones a un bundle JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivo',
+            nargs='?',
+            help='Ruta del bundle a escribir. Por defecto, salida estándar',
+        )
+        parser.add_argument(
+            '--indent',
+            type=int,
+            default=2,
+            help='Sangría del JSON (0 para una sola línea)',
+        )
+
+    def handle(self, *args, **options):
+        bundle = exportar_bundle()
+        texto = json.dumps(bundle, ensure_ascii=False, indent=options['indent'] or None)
+
+        if not options['archivo']:
+            self.stdout.write(texto)
+            return
+
+        with open(options['archivo'], 'w', encoding='utf-8') as archivo:
+            archivo.write(texto)
+        self.stdout.write(self.style.SUCCESS(
+            f"Bundle exportado en {options['archivo']} ({len(bundle['lecciones'])} lecciones)"
+        ))
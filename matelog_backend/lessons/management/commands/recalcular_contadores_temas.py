@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from lessons.models import Tema
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los contadores desnormalizados de contenidos y ejercicios en Tema'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tema',
+            type=int,
+            action='append',
+            dest='temas',
+            help='ID de tema a recalcular (se puede repetir). Por defecto, todos',
+        )
+
+    def handle(self, *args, **options):
+        total = Tema.recalcular_contadores(options['temas'])
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados en {total} temas"))
@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from lessons.bundle_contenido import sincronizar_bundle, BundleInvalido
+
+
+class Command(BaseCommand):
+    help = (
+        'Sincroniza el contenido con un bundle JSON (ver export_contenido). '
+        'Solo inserta, actualiza y desactiva; nunca borra progreso de estudiantes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del bundle JSON')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra que se cambiaria sin guardar nada',
+        )
+        parser.add_argument(
+            '--no-desactivar',
+            action='store_true',
+            help='No desactiva lecciones ni temas que falten en el bundle',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], encoding='utf-8') as archivo:
+                bundle = json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer el bundle: {e}")
+
+        try:
+            resumen = sincronizar_bundle(
+                bundle,
+                desactivar=not options['no_desactivar'],
+                simular=options['dry_run'],
+            )
+        except BundleInvalido as e:
+            for error in e.errores:
+                self.stderr.write(f"  - {error}")
+            raise CommandError(f"Bundle invalido: {len(e.errores)} errores")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('MODO DRY-RUN: No se hicieron cambios reales'))
+
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"{'':<12}{'creados':>12}{'actualizados':>14}{'desactivados':>14}{'sobrantes':>12}")
+        for modelo, conteos in resumen.items():
+            self.stdout.write(
+                f"{modelo:<12}{conteos['creados']:>12}{conteos['actualizados']:>14}"
+                f"{conteos['desactivados']:>14}{conteos['sobrantes']:>12}"
+            )
+        self.stdout.write("=" * 80)
+
+        sobrantes = sum(conteos['sobrantes'] for conteos in resumen.values())
+        if sobrantes:
+            self.stdout.write(self.style.WARNING(
+                f">>> {sobrantes} registros ya no estan en el bundle y se conservaron; "
+                "revisalos desde el admin"
+            ))
+        self.stdout.write(self.style.SUCCESS('>>> Sincronizacion completada'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from lessons.progreso import recalcular_leccion
+from tracking.models import ProgresoLeccion
+
+
+class Command(BaseCommand):
+    help = 'Verifica (y opcionalmente repara) el progreso incremental de lecciones recalculándolo desde cero'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reparar',
+            action='store_true',
+            help='Guarda los valores recalculados en los progresos con diferencias',
+        )
+        parser.add_argument(
+            '--usuario',
+            type=int,
+            help='Revisar solo los progresos de este usuario (ID)',
+        )
+
+    def handle(self, *args, **options):
+        reparar = options['reparar']
+        progresos = ProgresoLeccion.objects.select_related('usuario', 'leccion')
+        if options['usuario']:
+            progresos = progresos.filter(usuario_id=options['usuario'])
+
+        if not reparar:
+            self.stdout.write(self.style.WARNING('MODO VERIFICACION: No se haran cambios (usa --reparar)'))
+
+        revisados = 0
+        diferencias = 0
+        for progreso in progresos:
+            revisados += 1
+            suma, porcentaje, temas_corregidos = recalcular_leccion(
+                progreso.usuario, progreso.leccion, progreso, guardar=False
+            )
+            if (suma == progreso.suma_progreso_temas
+                    and porcentaje == progreso.porcentaje_completado
+                    and not temas_corregidos):
+                continue
+
+            diferencias += 1
+            self.stdout.write(
+                f"{progreso.usuario.username} - Leccion {progreso.leccion.orden}: "
+                f"{progreso.porcentaje_completado}% guardado, {porcentaje}% recalculado "
+                f"({len(temas_corregidos)} temas con aporte distinto)"
+            )
+            if reparar:
+                recalcular_leccion(progreso.usuario, progreso.leccion, progreso)
+
+        estilo = self.style.SUCCESS if not diferencias else self.style.WARNING
+        self.stdout.write(estilo(
+            f"Revisados {revisados} progresos de leccion, {diferencias} con diferencias"
+            + (" (reparados)" if reparar and diferencias else "")
+        ))
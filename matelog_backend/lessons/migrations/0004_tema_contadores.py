@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:19
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def poblar_contadores(apps, schema_editor):
+    Tema = apps.get_model('lessons', 'Tema')
+    ContenidoTema = apps.get_model('lessons', 'ContenidoTema')
+    Ejercicio = apps.get_model('lessons', 'Ejercicio')
+
+    contenidos = dict(
+        ContenidoTema.objects.exclude(tipo='EJEMPLO_EXTRA')
+        .values('tema_id').annotate(total=Count('id')).values_list('tema_id', 'total')
+    )
+    opcional = Q(obligatorio=False)
+    ejercicios = {
+        fila['tema_id']: fila
+        for fila in Ejercicio.objects.values('tema_id').annotate(
+            total=Count('id'),
+            obligatorios=Count('id', filter=Q(obligatorio=True)),
+            facil=Count('id', filter=opcional & Q(dificultad='FACIL')),
+            intermedio=Count('id', filter=opcional & Q(dificultad='INTERMEDIO')),
+            dificil=Count('id', filter=opcional & Q(dificultad='DIFICIL')),
+        )
+    }
+
+    for tema_id in Tema.objects.values_list('id', flat=True):
+        fila = ejercicios.get(tema_id, {})
+        Tema.objects.filter(id=tema_id).update(
+            contenidos_contables=contenidos.get(tema_id, 0),
+            total_ejercicios=fila.get('total', 0),
+            ejercicios_obligatorios=fila.get('obligatorios', 0),
+            ejercicios_opcionales_facil=fila.get('facil', 0),
+            ejercicios_opcionales_intermedio=fila.get('intermedio', 0),
+            ejercicios_opcionales_dificil=fila.get('dificil', 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0003_ejercicio_obligatorio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tema',
+            name='contenidos_contables',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Contenidos que cuentan para el progreso (sin EJEMPLO_EXTRA)'),
+        ),
+        migrations.AddField(
+            model_name='tema',
+            name='ejercicios_obligatorios',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tema',
+            name='ejercicios_opcionales_dificil',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tema',
+            name='ejercicios_opcionales_facil',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tema',
+            name='ejercicios_opcionales_intermedio',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tema',
+            name='total_ejercicios',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(poblar_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+from lessons.normalizacion import normalizar_respuesta
+
+
+def poblar_claves(apps, schema_editor):
+    Ejercicio = apps.get_model('lessons', 'Ejercicio')
+    ejercicios = list(Ejercicio.objects.only('id', 'tipo', 'respuesta_correcta'))
+    for ejercicio in ejercicios:
+        ejercicio.respuesta_normalizada = normalizar_respuesta(
+            ejercicio.tipo, ejercicio.respuesta_correcta
+        )
+    Ejercicio.objects.bulk_update(ejercicios, ['respuesta_normalizada'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0004_tema_contadores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ejercicio',
+            name='claves_alternativas',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ejercicio',
+            name='respuesta_normalizada',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='ejercicio',
+            name='respuestas_alternativas',
+            field=models.JSONField(blank=True, default=list, help_text='Solo abiertos: otras respuestas aceptadas, como lista JSON. Ej: ["x = 2", "dos"]'),
+        ),
+        migrations.RunPython(poblar_claves, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0005_ejercicio_claves_normalizadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ejercicio',
+            name='modo_validacion',
+            field=models.CharField(choices=[('TEXTO', 'Texto normalizado'), ('LOGICA', 'Fórmula lógica equivalente')], default='TEXTO', help_text="Solo abiertos. 'Fórmula lógica' acepta cualquier fórmula proposicional equivalente (p. ej. q ∧ p por p ∧ q)", max_length=10),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:49
+
+from django.db import migrations, models
+
+
+def crear_fila(apps, schema_editor):
+    VersionContenido = apps.get_model('lessons', 'VersionContenido')
+    VersionContenido.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0006_ejercicio_modo_validacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionContenido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Versión del contenido',
+                'verbose_name_plural': 'Versión del contenido',
+            },
+        ),
+        migrations.RunPython(crear_fila, migrations.RunPython.noop),
+    ]
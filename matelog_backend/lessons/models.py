@@ -3,8 +3,9 @@ from django.db import models
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
-import unicodedata
-import string
+from django.utils import timezone
+from .normalizacion import normalizar_respuesta
+from . import logica
 
 
 
@@ -64,6 +65,20 @@ class Tema(models.Model):
         verbose_name="Activo",
         help_text="Si está inactivo, no se mostrará en el frontend"
     )
+
+    # Contadores desnormalizados. Los mantienen las señales de lessons/signals.py;
+    # se reconstruyen con: python manage.py recalcular_contadores_temas
+    contenidos_contables = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Contenidos que cuentan para el progreso (sin EJEMPLO_EXTRA)"
+    )
+    total_ejercicios = models.PositiveIntegerField(default=0, editable=False)
+    ejercicios_obligatorios = models.PositiveIntegerField(default=0, editable=False)
+    ejercicios_opcionales_facil = models.PositiveIntegerField(default=0, editable=False)
+    ejercicios_opcionales_intermedio = models.PositiveIntegerField(default=0, editable=False)
+    ejercicios_opcionales_dificil = models.PositiveIntegerField(default=0, editable=False)
+
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_modificacion = models.DateTimeField(auto_now=True)
    
@@ -77,6 +92,52 @@ class Tema(models.Model):
         status = "✓" if self.is_active else "✗"
         return f"{status} {self.leccion.titulo} - Tema {self.orden}: {self.titulo}"
 
+    @classmethod
+    def recalcular_contadores(cls, tema_ids=None):
+        """
+        Recalcula los contadores desnormalizados de los temas indicados
+        (todos si tema_ids es None). Usa dos queries agregadas más un UPDATE
+        por tema. Devuelve el número de temas actualizados.
+        """
+        temas = cls.objects.all()
+        if tema_ids is not None:
+            temas = temas.filter(id__in=set(tema_ids))
+        tema_ids = list(temas.values_list('id', flat=True))
+
+        contenidos = dict(
+            ContenidoTema.objects.filter(tema_id__in=tema_ids)
+            .exclude(tipo='EJEMPLO_EXTRA')
+            .values('tema_id')
+            .annotate(total=models.Count('id'))
+            .values_list('tema_id', 'total')
+        )
+
+        opcional = models.Q(obligatorio=False)
+        ejercicios = {
+            fila['tema_id']: fila
+            for fila in Ejercicio.objects.filter(tema_id__in=tema_ids)
+            .values('tema_id')
+            .annotate(
+                total=models.Count('id'),
+                obligatorios=models.Count('id', filter=models.Q(obligatorio=True)),
+                facil=models.Count('id', filter=opcional & models.Q(dificultad='FACIL')),
+                intermedio=models.Count('id', filter=opcional & models.Q(dificultad='INTERMEDIO')),
+                dificil=models.Count('id', filter=opcional & models.Q(dificultad='DIFICIL')),
+            )
+        }
+
+        for tema_id in tema_ids:
+            fila = ejercicios.get(tema_id, {})
+            cls.objects.filter(id=tema_id).update(
+                contenidos_contables=contenidos.get(tema_id, 0),
+                total_ejercicios=fila.get('total', 0),
+                ejercicios_obligatorios=fila.get('obligatorios', 0),
+                ejercicios_opcionales_facil=fila.get('facil', 0),
+                ejercicios_opcionales_intermedio=fila.get('intermedio', 0),
+                ejercicios_opcionales_dificil=fila.get('dificil', 0),
+            )
+        return len(tema_ids)
+
 
 
 
@@ -139,6 +200,11 @@ class Ejercicio(models.Model):
         ('INTERMEDIO', 'Intermedio'),
         ('DIFICIL', 'Difícil'),
     ]
+
+    MODO_VALIDACION_CHOICES = [
+        ('TEXTO', 'Texto normalizado'),
+        ('LOGICA', 'Fórmula lógica equivalente'),
+    ]
    
     tema = models.ForeignKey(
         Tema,
@@ -166,6 +232,30 @@ class Ejercicio(models.Model):
         blank=False,
         help_text="Para abiertos: respuesta exacta. Para múltiple: letra de opción correcta (A, B, C, D)"
     )
+    respuestas_alternativas = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='Solo abiertos: otras respuestas aceptadas, como lista JSON. Ej: ["x = 2", "dos"]'
+    )
+    modo_validacion = models.CharField(
+        max_length=10,
+        choices=MODO_VALIDACION_CHOICES,
+        default='TEXTO',
+        help_text="Solo abiertos. 'Fórmula lógica' acepta cualquier fórmula proposicional equivalente (p. ej. q ∧ p por p ∧ q)"
+    )
+
+    # Claves de comparación precalculadas en save() (ver lessons/normalizacion.py)
+    respuesta_normalizada = models.CharField(
+        max_length=500,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+    claves_alternativas = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False
+    )
    
     # Texto de ayuda y retroalimentación
     texto_ayuda = models.TextField(
@@ -215,12 +305,48 @@ class Ejercicio(models.Model):
         """
         super().clean()
 
+        # Las letras de opciones existentes solo se consultan si el objeto ya existe en BD
+        letras_opciones = None
+        if self.tipo == 'MULTIPLE' and self.pk:
+            letras_opciones = set(self.opciones.values_list('letra', flat=True))
+        self.validar_respuesta_correcta(letras_opciones)
+
+    def validar_respuesta_correcta(self, letras_opciones=None):
+        """
+        Valida respuesta_correcta, alternativas y modo de validación sin
+        consultar la base de datos. letras_opciones es el conjunto de letras
+        de opciones del ejercicio; None omite esa comprobación.
+        La usan clean() y la carga masiva de lessons/bundle_contenido.py.
+        """
         # Validar que respuesta_correcta no esté vacía
         if not self.respuesta_correcta or not self.respuesta_correcta.strip():
             raise ValidationError({
                 'respuesta_correcta': 'La respuesta correcta no puede estar vacía'
             })
 
+        # Las alternativas deben ser una lista de textos no vacíos
+        alternativas = self.respuestas_alternativas or []
+        if not isinstance(alternativas, list) or not all(
+            isinstance(alt, str) and alt.strip() for alt in alternativas
+        ):
+            raise ValidationError({
+                'respuestas_alternativas': 'Debe ser una lista de textos no vacíos. Ej: ["x = 2", "dos"]'
+            })
+
+        # Validaciones específicas para el modo LOGICA
+        if self.modo_validacion == 'LOGICA':
+            if self.tipo != 'ABIERTO':
+                raise ValidationError({
+                    'modo_validacion': 'El modo de fórmula lógica solo aplica a ejercicios abiertos'
+                })
+            for campo, formula in [('respuesta_correcta', self.respuesta_correcta)] + [
+                ('respuestas_alternativas', alt) for alt in alternativas
+            ]:
+                try:
+                    logica.parsear(formula)
+                except logica.FormulaInvalida as e:
+                    raise ValidationError({campo: f'"{formula}" no es una fórmula válida: {e}'})
+
         # Validaciones específicas para ejercicios MÚLTIPLE
         if self.tipo == 'MULTIPLE':
             respuesta_normalizada = self.respuesta_correcta.strip().upper()
@@ -231,17 +357,31 @@ class Ejercicio(models.Model):
                     'respuesta_correcta': f'Para ejercicios de opción múltiple, la respuesta debe ser A, B, C o D. Valor actual: "{self.respuesta_correcta}"'
                 })
 
-            # Validar que exista la opción correspondiente (solo si el objeto ya existe en BD)
-            if self.pk:  # Solo validar si el ejercicio ya fue guardado
-                if not self.opciones.filter(letra=respuesta_normalizada).exists():
+            # Validar que exista la opción correspondiente
+            if letras_opciones is not None:
+                if respuesta_normalizada not in letras_opciones:
                     raise ValidationError({
                         'respuesta_correcta': f'No existe una opción múltiple con la letra "{respuesta_normalizada}". Debe crear primero la opción antes de seleccionarla como correcta.'
                     })
 
-    def save(self, *args, **kwargs):
+    def calcular_claves(self):
         """
-        Normaliza respuesta_correcta antes de guardar.
+        Precalcula la clave normalizada de la respuesta correcta y de las
+        respuestas alternativas (solo abiertos).
         """
+        self.respuesta_normalizada = normalizar_respuesta(self.tipo, self.respuesta_correcta)
+        if self.tipo == 'ABIERTO':
+            claves = {
+                normalizar_respuesta(self.tipo, alt)
+                for alt in self.respuestas_alternativas or []
+            }
+            claves.discard(self.respuesta_normalizada)
+            self.claves_alternativas = sorted(claves)
+        else:
+            self.claves_alternativas = []
+
+    def normalizar_respuesta_correcta(self):
+        """Normaliza el formato de respuesta_correcta según el tipo."""
         if self.tipo == 'ABIERTO':
             # Para ejercicios abiertos: normalizar espacios
             self.respuesta_correcta = ' '.join(self.respuesta_correcta.split()).strip()
@@ -249,36 +389,47 @@ class Ejercicio(models.Model):
             # Para ejercicios múltiples: normalizar a mayúscula sin espacios
             self.respuesta_correcta = self.respuesta_correcta.strip().upper()
 
+    def save(self, *args, **kwargs):
+        """
+        Normaliza respuesta_correcta y precalcula sus claves antes de guardar.
+        """
+        self.normalizar_respuesta_correcta()
+
         # Ejecutar validaciones antes de guardar
         self.full_clean()
 
+        self.calcular_claves()
+
         super().save(*args, **kwargs)
 
     def validar_respuesta(self, respuesta_usuario):
         """
-        Valida la respuesta del usuario.
-        Para abiertos: ignora mayúsculas, espacios, tildes y puntuación.
-        Para múltiple: compara directamente.
+        Valida la respuesta del usuario contra las claves precalculadas.
+        Para abiertos: ignora mayúsculas, espacios, tildes y puntuación, y
+        acepta también las respuestas alternativas.
+        En modo LOGICA: acepta cualquier fórmula equivalente (lessons/logica.py).
+        Para múltiple: compara la letra.
         """
-        if self.tipo == 'MULTIPLE':
-            return respuesta_usuario.strip().upper() == self.respuesta_correcta.upper()
-
-        # Para respuestas abiertas: normalizar
-        def normalizar(texto):
-            # Quitar espacios extras
-            texto = ' '.join(texto.split())
-            # Convertir a minúsculas
-            texto = texto.lower()
-            # Quitar tildes
-            texto = ''.join(
-                c for c in unicodedata.normalize('NFD', texto)
-                if unicodedata.category(c) != 'Mn'
-            )
-            # Quitar signos de puntuación
-            texto = texto.translate(str.maketrans('', '', string.punctuation))
-            return texto.strip()
+        return es_respuesta_correcta(self, respuesta_usuario)
+
+
 
-        return normalizar(respuesta_usuario) == normalizar(self.respuesta_correcta)
+
+def es_respuesta_correcta(ejercicio, respuesta_usuario):
+    """
+    Lógica de Ejercicio.validar_respuesta. Acepta cualquier objeto con los
+    mismos atributos, p. ej. la entrada del índice en memoria
+    (lessons/indice_contenido.py), para validar sin leer el ejercicio.
+    """
+    if ejercicio.modo_validacion == 'LOGICA':
+        # La clave de texto quita conectivos (p->q y p&q dan "pq"), no sirve aquí
+        return any(
+            logica.equivalentes(referencia, respuesta_usuario)
+            for referencia in [ejercicio.respuesta_correcta, *(ejercicio.respuestas_alternativas or ())]
+        )
+
+    clave = normalizar_respuesta(ejercicio.tipo, respuesta_usuario)
+    return clave == ejercicio.respuesta_normalizada or clave in ejercicio.claves_alternativas
 
 
 
@@ -312,6 +463,38 @@ class OpcionMultiple(models.Model):
         return f"{self.ejercicio} - Opción {self.letra}"
 
 
+class VersionContenido(models.Model):
+    """
+    Fila única con la versión global del contenido. Cambia cada vez que se
+    edita una lección, tema, contenido, ejercicio u opción; cada proceso la
+    compara con la de su índice en memoria (lessons/indice_contenido.py)
+    para saber si debe recargarlo.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versión del contenido'
+        verbose_name_plural = 'Versión del contenido'
+
+    def __str__(self):
+        return f"Contenido v{self.version}"
+
+    @classmethod
+    def actual(cls):
+        """Versión vigente (0 si la fila aún no existe)."""
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls):
+        """Nueva versión con un solo UPDATE; crea la fila la primera vez."""
+        actualizadas = cls.objects.filter(pk=1).update(
+            version=models.F('version') + 1, fecha_modificacion=timezone.now()
+        )
+        if not actualizadas:
+            cls.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
 
 
 # NOTA: Los modelos ProgresoLeccion, ProgresoTema y RespuestaEjercicio
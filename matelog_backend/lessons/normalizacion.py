@@ -0,0 +1,41 @@
+# lessons/normalizacion.py
+"""
+Normalización de respuestas de ejercicios.
+
+La clave normalizada de la respuesta correcta se calcula una sola vez en
+Ejercicio.save() y se guarda en la columna indexada respuesta_normalizada;
+en cada validación solo se normaliza la respuesta del estudiante.
+"""
+import string
+import unicodedata
+
+
+# Tabla de traducción construida una sola vez al importar el módulo
+_SIN_PUNTUACION = str.maketrans('', '', string.punctuation)
+
+
+def normalizar_abierta(texto):
+    """
+    Clave de comparación para respuestas abiertas: ignora mayúsculas,
+    espacios repetidos, tildes y signos de puntuación.
+    """
+    texto = ' '.join(texto.split()).lower()
+    # Quitar tildes (las respuestas ASCII no necesitan descomponerse)
+    if not texto.isascii():
+        texto = ''.join(
+            c for c in unicodedata.normalize('NFD', texto)
+            if unicodedata.category(c) != 'Mn'
+        )
+    return texto.translate(_SIN_PUNTUACION).strip()
+
+
+def normalizar_letra(texto):
+    """Clave de comparación para opción múltiple: letra en mayúscula."""
+    return texto.strip().upper()
+
+
+def normalizar_respuesta(tipo, texto):
+    """Aplica la normalización que corresponde al tipo de ejercicio."""
+    if tipo == 'MULTIPLE':
+        return normalizar_letra(texto)
+    return normalizar_abierta(texto)
@@ -0,0 +1,165 @@
+# lessons/progreso.py
+"""
+Mantenimiento incremental del progreso de lecciones.
+
+Progreso de tema = (progreso_contenido * 0.5) + (porcentaje_acierto * 0.5)
+Progreso de lección = promedio del progreso de sus temas activos
+
+Cada ProgresoTema guarda su aporte en progreso_total y cada ProgresoLeccion
+la suma de esos aportes en suma_progreso_temas. Cuando cambia el contenido
+visto o la calificación de un tema solo se aplica la diferencia, sin recorrer
+los demás temas. El recálculo completo (recalcular_leccion) queda para la
+creación del progreso de la lección y para el comando
+verificar_progreso_lecciones.
+
+Todas las escrituras incrementan la `version` de la fila para que los
+compare-and-swap de tracking/concurrencia.py detecten el cambio.
+"""
+from decimal import Decimal
+
+from django.db import models
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from tracking.concurrencia import MAX_REINTENTOS, ConflictoConcurrencia, guardar_con_version
+from tracking.models import ProgresoLeccion, ProgresoTema
+
+
+CENTESIMA = Decimal('0.01')
+
+
+def aporte_tema(progreso_tema, contenidos_vistos=None):
+    """Progreso del tema (0-100) redondeado a dos decimales."""
+    progreso_contenido = Decimal(progreso_tema.calcular_progreso_contenido(contenidos_vistos))
+    progreso_ejercicios = Decimal(progreso_tema.porcentaje_acierto or 0)
+    aporte = progreso_contenido * Decimal('0.5') + progreso_ejercicios * Decimal('0.5')
+    return aporte.quantize(CENTESIMA)
+
+
+def _temas_activos(leccion):
+    return list(leccion.temas.filter(is_active=True).order_by().values_list('id', flat=True))
+
+
+def _guardar_aporte(progreso_tema, contenidos_vistos=None):
+    """
+    Guarda el nuevo aporte del tema y devuelve la diferencia con el anterior.
+    El UPDATE es un compare-and-swap sobre la versión de la fila; si otra
+    petición se adelantó se relee y se vuelve a calcular, para que dos
+    peticiones simultáneas no sumen la misma diferencia dos veces.
+    """
+    for _ in range(MAX_REINTENTOS):
+        anterior = progreso_tema.progreso_total
+        nuevo = aporte_tema(progreso_tema, contenidos_vistos)
+        if nuevo == anterior:
+            return Decimal('0')
+        progreso_tema.progreso_total = nuevo
+        if guardar_con_version(progreso_tema, ['progreso_total']):
+            return nuevo - Decimal(anterior)
+        progreso_tema.refresh_from_db()
+        contenidos_vistos = None
+    raise ConflictoConcurrencia(progreso_tema)
+
+
+def actualizar_progreso_tema(usuario, progreso_tema, contenidos_vistos=None, tema_completado=False):
+    """
+    Aplica a la lección el cambio de progreso de un tema (contenido visto o
+    nueva calificación). Cuesta un número fijo de queries sin importar
+    cuántos temas tenga la lección.
+
+    Si tema_completado es True revisa si con este tema se completó la lección.
+    Devuelve el ProgresoLeccion con porcentaje_completado actualizado.
+    """
+    leccion = progreso_tema.tema.leccion
+    temas_activos = _temas_activos(leccion)
+
+    progreso_leccion, created = ProgresoLeccion.objects.get_or_create(
+        usuario=usuario,
+        leccion=leccion
+    )
+
+    if created:
+        recalcular_leccion(usuario, leccion, progreso_leccion)
+    elif temas_activos:
+        delta = _guardar_aporte(progreso_tema, contenidos_vistos)
+        if delta:
+            suma = models.F('suma_progreso_temas') + delta
+            ProgresoLeccion.objects.filter(pk=progreso_leccion.pk).update(
+                suma_progreso_temas=suma,
+                version=models.F('version') + 1,
+                # Cast a float: en SQLite la división de un DECIMAL entero sería entera
+                porcentaje_completado=Round(
+                    Cast(suma, models.FloatField()) / len(temas_activos), 2
+                )
+            )
+
+    if tema_completado and temas_activos:
+        temas_completados = ProgresoTema.objects.filter(
+            usuario=usuario,
+            tema_id__in=temas_activos,
+            estado='COMPLETADO'
+        ).count()
+        if temas_completados == len(temas_activos):
+            ProgresoLeccion.objects.filter(pk=progreso_leccion.pk).update(
+                estado='COMPLETADA',
+                fecha_completado=timezone.now(),
+                version=models.F('version') + 1
+            )
+
+    progreso_leccion.refresh_from_db()
+    return progreso_leccion
+
+
+def recalcular_leccion(usuario, leccion, progreso_leccion=None, guardar=True):
+    """
+    Recalcula desde cero el aporte de cada tema activo y el porcentaje de la
+    lección. Devuelve (suma, porcentaje, temas_corregidos) donde
+    temas_corregidos son los ProgresoTema cuyo aporte guardado no coincidía.
+    """
+    temas = leccion.temas.filter(is_active=True).prefetch_related(
+        models.Prefetch(
+            'progreso_usuarios',
+            queryset=ProgresoTema.objects.filter(usuario=usuario).annotate(
+                vistos=models.Count(
+                    'contenidos_vistos',
+                    filter=~models.Q(contenidos_vistos__tipo='EJEMPLO_EXTRA')
+                )
+            ),
+            to_attr='progreso_usuario'
+        )
+    )
+
+    suma = Decimal('0')
+    total_temas = 0
+    temas_corregidos = []
+
+    for tema in temas:
+        total_temas += 1
+        if not tema.progreso_usuario:
+            continue
+        progreso_tema = tema.progreso_usuario[0]
+        progreso_tema.tema = tema
+        aporte = aporte_tema(progreso_tema, progreso_tema.vistos)
+        suma += aporte
+        if aporte != progreso_tema.progreso_total:
+            progreso_tema.progreso_total = aporte
+            temas_corregidos.append(progreso_tema)
+
+    porcentaje = (suma / total_temas).quantize(CENTESIMA) if total_temas else Decimal('0')
+
+    if guardar:
+        if temas_corregidos:
+            for progreso_tema in temas_corregidos:
+                progreso_tema.version = models.F('version') + 1
+            ProgresoTema.objects.bulk_update(temas_corregidos, ['progreso_total', 'version'])
+        if progreso_leccion is None:
+            progreso_leccion, _ = ProgresoLeccion.objects.get_or_create(
+                usuario=usuario,
+                leccion=leccion
+            )
+        ProgresoLeccion.objects.filter(pk=progreso_leccion.pk).update(
+            suma_progreso_temas=suma,
+            porcentaje_completado=porcentaje,
+            version=models.F('version') + 1
+        )
+
+    return suma, porcentaje, temas_corregidos
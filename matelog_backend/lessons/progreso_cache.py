@@ -0,0 +1,116 @@
+# lessons/progreso_cache.py
+"""
+Snapshot del progreso de cada usuario (lecciones y temas) guardado en el
+cache de Django.
+
+LeccionListView y LeccionDetailView leen de aquí en lugar de consultar
+ProgresoLeccion/ProgresoTema por cada elemento.
+
+La versión del progreso es persistente: CustomUser.version_progreso, que
+las vistas que modifican el progreso incrementan con invalidar_snapshot()
+después de escribir. La clave del snapshot incluye esa versión, así que un
+cambio nunca se sirve desde un snapshot anterior aunque otro worker lo
+tenga en cache, y la siguiente lectura lo reconstruye con dos queries. Los
+ETag de lessons/condicional.py usan la misma versión.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from tracking.models import ProgresoLeccion, ProgresoTema
+
+
+PROGRESO_LECCION_VACIO = {
+    'estado': 'SIN_INICIAR',
+    'porcentaje_completado': 0.0,
+}
+
+PROGRESO_TEMA_VACIO = {
+    'estado': 'SIN_INICIAR',
+    'desbloqueado': False,
+    'porcentaje_acierto': 0,
+    'intentos_realizados': 0,
+    'contenido_completado': 0,
+}
+
+
+def _clave_snapshot(usuario):
+    return f'progreso_snapshot:{usuario.pk}:{usuario.version_progreso}'
+
+
+def construir_snapshot(usuario):
+    """
+    Lee el progreso completo del usuario desde la base de datos.
+    Devuelve {'lecciones': {leccion_id: {...}}, 'temas': {tema_id: {...}}}.
+    """
+    lecciones = {
+        fila['leccion_id']: {
+            'estado': fila['estado'],
+            'porcentaje_completado': float(fila['porcentaje_completado']),
+        }
+        for fila in ProgresoLeccion.objects.filter(usuario=usuario).values(
+            'leccion_id', 'estado', 'porcentaje_completado'
+        )
+    }
+
+    # Contenidos vistos sin EJEMPLO_EXTRA, contados en la misma query
+    progresos_tema = ProgresoTema.objects.filter(usuario=usuario).annotate(
+        vistos=Count(
+            'contenidos_vistos',
+            filter=~Q(contenidos_vistos__tipo='EJEMPLO_EXTRA')
+        )
+    ).values(
+        'tema_id', 'estado', 'desbloqueado', 'porcentaje_acierto',
+        'intentos_realizados', 'vistos'
+    )
+    temas = {
+        fila['tema_id']: {
+            'estado': fila['estado'],
+            'desbloqueado': fila['desbloqueado'],
+            'porcentaje_acierto': float(fila['porcentaje_acierto'] or 0),
+            'intentos_realizados': fila['intentos_realizados'],
+            'contenido_completado': fila['vistos'],
+        }
+        for fila in progresos_tema
+    }
+
+    return {'lecciones': lecciones, 'temas': temas}
+
+
+def obtener_snapshot(usuario):
+    """Devuelve el snapshot del usuario desde cache, reconstruyéndolo si falta."""
+    clave = _clave_snapshot(usuario)
+    snapshot = cache.get(clave)
+    if snapshot is None:
+        snapshot = construir_snapshot(usuario)
+        cache.set(clave, snapshot, settings.PROGRESO_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def version_progreso(usuario):
+    """
+    (versión, marca de tiempo) del progreso del usuario, leídas de la fila
+    que ya cargó la autenticación: no cuesta ninguna consulta.
+    """
+    modificado = usuario.progreso_modificado
+    return usuario.version_progreso, modificado.timestamp() if modificado else 0
+
+
+def invalidar_snapshot(usuario):
+    """
+    Incrementa la versión del progreso del usuario. Se llama después de
+    escribir el progreso (dentro de la misma transacción si la hay), para
+    que quien lea la versión nueva lea también el cambio.
+
+    La instancia se actualiza en memoria sin releer la fila: si otra
+    petición incrementó la versión al mismo tiempo, esta solo queda
+    atrasada, y una versión atrasada nunca coincide con la de la base.
+    """
+    ahora = timezone.now()
+    type(usuario).objects.filter(pk=usuario.pk).update(
+        version_progreso=F('version_progreso') + 1,
+        progreso_modificado=ahora
+    )
+    usuario.version_progreso += 1
+    usuario.progreso_modificado = ahora
@@ -1,11 +1,12 @@
 # lessons/serializers.py
 from rest_framework import serializers
+from django.db.models import Count, Q
 from .models import (
     Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
 )
-from tracking.models import (
-    ProgresoLeccion, ProgresoTema, RespuestaEjercicio
-)
+from .progreso_cache import obtener_snapshot, PROGRESO_TEMA_VACIO
+from .ejercicios_visibles import ids_visibles_para_usuario
+from .carga_ejercicios import cargar_ejercicios
 
 
 
@@ -75,6 +76,8 @@ class TemaListSerializer(serializers.ModelSerializer):
     """
     Serializer para lista de temas con información de progreso.
     FIX: Calcula progreso excluyendo EJEMPLO_EXTRA.
+    OPTIMIZADO: Los conteos salen de los contadores desnormalizados de Tema y
+    el progreso del snapshot del usuario (context['progreso']).
     """
     cantidad_contenidos = serializers.SerializerMethodField()
     cantidad_ejercicios = serializers.SerializerMethodField()
@@ -88,65 +91,38 @@ class TemaListSerializer(serializers.ModelSerializer):
             'cantidad_contenidos', 'cantidad_ejercicios',
             'progreso', 'contenidos_count'
         ]
-   
+
     def get_contenidos_count(self, obj):
         """Total de contenidos (excluyendo EJEMPLO_EXTRA) - alias para compatibilidad"""
-        return obj.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
+        return obj.contenidos_contables
 
     def get_cantidad_contenidos(self, obj):
         """Total de contenidos (excluyendo EJEMPLO_EXTRA)"""
-        return obj.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
+        return obj.contenidos_contables
    
     def get_cantidad_ejercicios(self, obj):
         """Total de ejercicios"""
-        return obj.ejercicios.count()
+        return obj.total_ejercicios
    
     def get_progreso(self, obj):
         """
         Información de progreso del tema para el usuario actual.
         Incluye progreso de contenido y calificación de ejercicios.
         """
+        progreso = dict(PROGRESO_TEMA_VACIO)
+        progreso['contenidos_count'] = obj.contenidos_contables
+
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
-            contenidos_totales = obj.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
-            return {
-                'estado': 'SIN_INICIAR',
-                'desbloqueado': False,
-                'porcentaje_acierto': 0,
-                'intentos_realizados': 0,
-                'contenido_completado': 0,
-                'contenidos_count': contenidos_totales
-            }
-       
-        try:
-            progreso_tema = ProgresoTema.objects.get(
-                usuario=request.user,
-                tema=obj
-            )
-           
-            # Calcular contenido completado (sin EJEMPLO_EXTRA)
-            contenidos_totales = obj.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
-            contenido_completado = progreso_tema.contenido_completado
-           
-            return {
-                'estado': progreso_tema.estado,
-                'desbloqueado': progreso_tema.desbloqueado,
-                'porcentaje_acierto': float(progreso_tema.porcentaje_acierto or 0),
-                'intentos_realizados': progreso_tema.intentos_realizados,
-                'contenido_completado': contenido_completado,
-                'contenidos_count': contenidos_totales
-            }
-        except ProgresoTema.DoesNotExist:
-            # Usuario no ha iniciado este tema
-            contenidos_totales = obj.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
-            return {
-                'estado': 'SIN_INICIAR',
-                'desbloqueado': False,
-                'porcentaje_acierto': 0,
-                'intentos_realizados': 0,
-                'contenido_completado': 0,
-                'contenidos_count': contenidos_totales
-            }
+            return progreso
+
+        snapshot = self.context.get('progreso')
+        if snapshot is None:
+            snapshot = obtener_snapshot(request.user)
+
+        # Si el usuario no ha iniciado este tema se queda en SIN_INICIAR
+        progreso.update(snapshot['temas'].get(obj.id, {}))
+        return progreso
 
 
 
@@ -166,73 +142,18 @@ class TemaDetailSerializer(serializers.ModelSerializer):
     def get_ejercicios(self, obj):
         """
         Filtra ejercicios según el grupo experimental del usuario.
-
-        - Control: Solo ejercicios con obligatorio=True
-        - Experimental: Ejercicios obligatorios + ejercicios según clasificación de autoeficacia
-          - ALTO: obligatorios + INTERMEDIO + DIFICIL
-          - MEDIO: obligatorios + INTERMEDIO
-          - BAJO: obligatorios + FACIL + INTERMEDIO
+        La regla está en lessons/ejercicios_visibles.py (compartida con
+        FinalizarTemaView). Si el contexto trae 'ejercicio_ids' se usan esos
+        (payload compartido de lessons/contenido_cache.py).
+        Los ejercicios y sus opciones se cargan con dos consultas
+        (lessons/carga_ejercicios.py), con la misma forma que EjercicioSerializer.
         """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            # Si no hay usuario autenticado, devolver todos (no debería pasar)
-            ejercicios = obj.ejercicios.all().order_by('orden')
-            return EjercicioSerializer(ejercicios, many=True).data
-
-        try:
-            perfil = request.user.perfil
-            grupo = perfil.grupo
-
-            if grupo == 'CONTROL':
-                # Grupo Control: solo ejercicios obligatorios
-                ejercicios = obj.ejercicios.filter(obligatorio=True).order_by('orden')
-
-            elif grupo == 'EXPERIMENTAL':
-                # Grupo Experimental: ejercicios basados en clasificación de autoeficacia
-                clasificacion = perfil.clasificacion_autoeficacia
-
-                # Siempre incluir los obligatorios
-                ejercicios_query = obj.ejercicios.filter(obligatorio=True)
-
-                # Agregar ejercicios adicionales según clasificación
-                if clasificacion == 'ALTO':
-                    # Alto: agregar INTERMEDIO y DIFICIL
-                    ejercicios_adicionales = obj.ejercicios.filter(
-                        obligatorio=False,
-                        dificultad__in=['INTERMEDIO', 'DIFICIL']
-                    )
-                    ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().order_by('orden')
-
-                elif clasificacion == 'MEDIO':
-                    # Medio: agregar INTERMEDIO
-                    ejercicios_adicionales = obj.ejercicios.filter(
-                        obligatorio=False,
-                        dificultad='INTERMEDIO'
-                    )
-                    ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().order_by('orden')
-
-                elif clasificacion == 'BAJO':
-                    # Bajo: agregar FACIL e INTERMEDIO
-                    ejercicios_adicionales = obj.ejercicios.filter(
-                        obligatorio=False,
-                        dificultad__in=['FACIL', 'INTERMEDIO']
-                    )
-                    ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().order_by('orden')
-
-                else:
-                    # Sin clasificación aún: solo obligatorios (hasta que complete escala de autoeficacia)
-                    ejercicios = ejercicios_query.order_by('orden')
-
-            else:
-                # Si no tiene grupo definido, mostrar todos (caso excepcional)
-                ejercicios = obj.ejercicios.all().order_by('orden')
-
-        except AttributeError:
-            # Usuario sin perfil (usuarios antiguos antes de MateLog-AE)
-            # Mostrar todos los ejercicios
-            ejercicios = obj.ejercicios.all().order_by('orden')
-
-        return EjercicioSerializer(ejercicios, many=True).data
+        ids = self.context.get('ejercicio_ids')
+        if ids is None:
+            request = self.context.get('request')
+            usuario = request.user if request else None
+            ids = ids_visibles_para_usuario(obj.id, usuario)
+        return cargar_ejercicios(ids)
 
 
 
@@ -240,6 +161,8 @@ class TemaDetailSerializer(serializers.ModelSerializer):
 class LeccionListSerializer(serializers.ModelSerializer):
     """
     Serializer para lista de lecciones (solo activas).
+    OPTIMIZADO: Usa la anotación temas_activos de lecciones_con_cantidad_temas()
+    si está disponible, en lugar de un COUNT por lección.
     """
     cantidad_temas = serializers.SerializerMethodField()
    
@@ -248,9 +171,19 @@ class LeccionListSerializer(serializers.ModelSerializer):
         fields = ['id', 'titulo', 'descripcion', 'orden', 'cantidad_temas']
    
     def get_cantidad_temas(self, obj):
+        temas_activos = getattr(obj, 'temas_activos', None)
+        if temas_activos is not None:
+            return temas_activos
         return obj.temas.filter(is_active=True).count()
 
 
+def lecciones_con_cantidad_temas():
+    """Lecciones activas anotadas con la cantidad de temas activos (una consulta)."""
+    return Leccion.objects.filter(is_active=True).annotate(
+        temas_activos=Count('temas', filter=Q(temas__is_active=True))
+    ).order_by('orden')
+
+
 
 
 class LeccionDetailSerializer(serializers.ModelSerializer):
@@ -0,0 +1,83 @@
+# lessons/signals.py
+"""
+Mantiene sincronizados los contadores desnormalizados de Tema
+(contenidos_contables, total_ejercicios, ejercicios_obligatorios y
+ejercicios_opcionales_*) y la cache de ejercicios visibles cuando se crean,
+editan o borran contenidos y ejercicios. También actualizan
+Tema.fecha_modificacion, que versiona el payload compartido del detalle
+(lessons/contenido_cache.py), al cambiar contenidos, ejercicios u opciones,
+y la versión global del índice en memoria (lessons/indice_contenido.py) al
+cambiar cualquier modelo del árbol.
+
+Las operaciones masivas (bulk_create, bulk_update, queryset.update) no
+disparan señales: quien las use debe llamar a Tema.recalcular_contadores(),
+a ejercicios_visibles.invalidar_tema(), a contenido_cache.marcar_modificado()
+y a indice_contenido.invalidar().
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from .ejercicios_visibles import invalidar_tema
+from .contenido_cache import marcar_modificado
+from . import indice_contenido
+
+
+@receiver(pre_save, sender=ContenidoTema)
+@receiver(pre_save, sender=Ejercicio)
+def recordar_tema_anterior(sender, instance, **kwargs):
+    """Guarda el tema original para recalcularlo si el objeto cambia de tema."""
+    instance._tema_id_anterior = None
+    if instance.pk:
+        instance._tema_id_anterior = (
+            sender.objects.filter(pk=instance.pk).values_list('tema_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ContenidoTema)
+@receiver(post_save, sender=Ejercicio)
+def actualizar_contadores_al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        # Carga de fixtures: se recalcula con el comando de mantenimiento
+        return
+    tema_ids = {instance.tema_id, getattr(instance, '_tema_id_anterior', None)}
+    tema_ids.discard(None)
+    Tema.recalcular_contadores(tema_ids)
+    marcar_modificado(tema_ids)
+    if sender is Ejercicio:
+        for tema_id in tema_ids:
+            invalidar_tema(tema_id)
+
+
+@receiver(post_delete, sender=ContenidoTema)
+@receiver(post_delete, sender=Ejercicio)
+def actualizar_contadores_al_borrar(sender, instance, **kwargs):
+    Tema.recalcular_contadores([instance.tema_id])
+    marcar_modificado([instance.tema_id])
+    if sender is Ejercicio:
+        invalidar_tema(instance.tema_id)
+
+
+@receiver(post_save, sender=OpcionMultiple)
+@receiver(post_delete, sender=OpcionMultiple)
+def marcar_tema_de_opcion(sender, instance, raw=False, **kwargs):
+    """Las opciones van dentro del payload del tema de su ejercicio."""
+    if raw:
+        return
+    tema_id = (
+        Ejercicio.objects.filter(pk=instance.ejercicio_id).values_list('tema_id', flat=True).first()
+    )
+    marcar_modificado([tema_id])
+
+
+@receiver(post_save, sender=Leccion)
+@receiver(post_save, sender=Tema)
+@receiver(post_save, sender=ContenidoTema)
+@receiver(post_save, sender=Ejercicio)
+@receiver(post_delete, sender=Leccion)
+@receiver(post_delete, sender=Tema)
+@receiver(post_delete, sender=ContenidoTema)
+@receiver(post_delete, sender=Ejercicio)
+def invalidar_indice(sender, instance, **kwargs):
+    """Cualquier cambio del árbol, incluidas las cargas raw de fixtures."""
+    indice_contenido.invalidar()
@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.core.cache import cache
+from lessons.models import Leccion, Tema, Ejercicio, OpcionMultiple
+from lessons.serializers import EjercicioSerializer
+from lessons.carga_ejercicios import cargar_ejercicios
+from lessons.ejercicios_visibles import ids_visibles
+
+
+class CargaEjerciciosTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+
+    def crear_multiple(self, orden, dificultad='FACIL', obligatorio=False):
+        ejercicio = Ejercicio.objects.create(
+            tema=self.tema,
+            orden=orden,
+            tipo='MULTIPLE',
+            dificultad=dificultad,
+            obligatorio=obligatorio,
+            instruccion="Elige",
+            enunciado=f"<p>Pregunta {orden}</p>",
+            respuesta_correcta="A",
+            texto_ayuda="<p>Pista</p>" if orden % 2 else ""
+        )
+        for letra in 'BAC':
+            OpcionMultiple.objects.create(ejercicio=ejercicio, letra=letra, texto=f'{letra}{orden}')
+        return ejercicio
+
+    def test_misma_forma_que_el_serializer(self):
+        """Los diccionarios coinciden con EjercicioSerializer"""
+        ejercicios = [self.crear_multiple(orden) for orden in (2, 1)]
+
+        cargados = cargar_ejercicios([e.id for e in ejercicios])
+        esperados = EjercicioSerializer(
+            Ejercicio.objects.filter(tema=self.tema).order_by('orden'), many=True
+        ).data
+
+        self.assertEqual(cargados, [dict(e) for e in esperados])
+
+    def test_consultas_independientes_del_numero_de_ejercicios(self):
+        """Ejercicios y opciones se cargan siempre con dos consultas"""
+        self.crear_multiple(1)
+        ids = ids_visibles(self.tema.id, None, None)
+        with self.assertNumQueries(2):
+            cargar_ejercicios(ids)
+
+        for orden in range(2, 12):
+            self.crear_multiple(orden, dificultad='INTERMEDIO', obligatorio=orden % 3 == 0)
+        cache.clear()
+        ids = ids_visibles(self.tema.id, None, None)
+        with self.assertNumQueries(2):
+            cargados = cargar_ejercicios(ids)
+        self.assertEqual(len(cargados), 11)
+
+        # Variante filtrada por grupo/clasificación
+        ids = ids_visibles(self.tema.id, 'EXPERIMENTAL', 'MEDIO')
+        with self.assertNumQueries(2):
+            cargados = cargar_ejercicios(ids)
+        self.assertEqual([e['id'] for e in cargados], ids)
+        self.assertEqual([o['letra'] for o in cargados[0]['opciones']], ['A', 'B', 'C'])
@@ -0,0 +1,127 @@
+from io import StringIO
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from lessons.clonar_contenido import clonar_lecciones, clonar_temas, ClonacionInvalida
+
+
+class ClonarContenidoTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+
+    def crear_leccion(self, orden, temas=2, ejercicios=3):
+        leccion = Leccion.objects.create(
+            titulo=f'Lección {orden}', descripcion='Desc', orden=orden
+        )
+        for t in range(1, temas + 1):
+            tema = Tema.objects.create(
+                leccion=leccion, titulo=f'Tema {t}', descripcion='Desc', orden=t
+            )
+            ContenidoTema.objects.create(
+                tema=tema, orden=1, tipo='TEORIA', contenido_texto='<p>Teoría</p>'
+            )
+            for e in range(1, ejercicios + 1):
+                ejercicio = Ejercicio(
+                    tema=tema, orden=e, tipo='MULTIPLE', dificultad='FACIL',
+                    instruccion='Elige', enunciado=f'<p>{e}</p>', respuesta_correcta='A',
+                    obligatorio=(e == 1)
+                )
+                ejercicio.save()
+                OpcionMultiple.objects.create(ejercicio=ejercicio, letra='A', texto='Sí')
+                OpcionMultiple.objects.create(ejercicio=ejercicio, letra='B', texto='No')
+        return leccion
+
+    def contar_consultas(self, **kwargs):
+        with CaptureQueriesContext(connection) as consultas:
+            clonar_lecciones(**kwargs)
+        return len(consultas)
+
+    def test_clona_arbol_completo(self):
+        """El clon tiene el mismo contenido, contadores y validación que el original"""
+        original = self.crear_leccion(1)
+        self.crear_leccion(2)
+
+        resumen = clonar_lecciones([original.id])
+
+        self.assertEqual(resumen['temas'], 2)
+        self.assertEqual(resumen['contenidos'], 2)
+        self.assertEqual(resumen['ejercicios'], 6)
+        self.assertEqual(resumen['opciones'], 12)
+        clon = Leccion.objects.get(id=resumen['lecciones'][original.id])
+        self.assertEqual(clon.orden, 3)
+        self.assertFalse(clon.is_active)
+
+        tema = clon.temas.get(orden=1)
+        self.assertTrue(tema.is_active)
+        self.assertEqual(tema.total_ejercicios, 3)
+        self.assertEqual(tema.ejercicios_obligatorios, 1)
+        self.assertEqual(tema.contenidos_contables, 1)
+        ejercicio = tema.ejercicios.get(orden=2)
+        self.assertEqual(ejercicio.opciones.count(), 2)
+        self.assertTrue(ejercicio.validar_respuesta('a'))
+        self.assertEqual(Ejercicio.objects.filter(tema__leccion=original).count(), 6)
+
+    def test_consultas_constantes(self):
+        """Clonar un curso grande cuesta las mismas consultas que uno pequeño"""
+        self.crear_leccion(1, temas=1, ejercicios=1)
+        pequeño = self.contar_consultas(leccion_ids=None)
+        Leccion.objects.filter(orden__gt=1).delete()
+
+        self.crear_leccion(2, temas=3, ejercicios=5)
+        self.crear_leccion(3, temas=3, ejercicios=5)
+        grande = self.contar_consultas(leccion_ids=None, desplazamiento=10)
+
+        self.assertEqual(pequeño, grande)
+        self.assertEqual(Leccion.objects.filter(orden__in=[11, 12, 13]).count(), 3)
+
+    def test_ejercicio_invalido_no_escribe(self):
+        """Las validaciones corren en lote antes de insertar"""
+        leccion = self.crear_leccion(1, temas=1, ejercicios=2)
+        # Corrupto a propósito, saltando save()
+        Ejercicio.objects.filter(orden=2).update(respuesta_correcta='D')
+
+        with self.assertRaises(ClonacionInvalida) as contexto:
+            clonar_lecciones([leccion.id])
+
+        self.assertEqual(len(contexto.exception.errores), 1)
+        self.assertEqual(Leccion.objects.count(), 1)
+        self.assertEqual(Tema.objects.count(), 1)
+
+    def test_orden_ocupado(self):
+        """Un desplazamiento que choca con lecciones existentes se rechaza"""
+        self.crear_leccion(1, temas=1, ejercicios=1)
+        self.crear_leccion(2, temas=1, ejercicios=1)
+
+        with self.assertRaises(ClonacionInvalida):
+            clonar_lecciones(desplazamiento=1)
+        self.assertEqual(Leccion.objects.count(), 2)
+
+    def test_clonar_temas_en_la_misma_leccion(self):
+        """Los temas clonados van después del último tema de la lección destino"""
+        leccion = self.crear_leccion(1, temas=2, ejercicios=1)
+        tema = leccion.temas.get(orden=1)
+
+        resumen = clonar_temas([tema.id], leccion.id)
+
+        clon = Tema.objects.get(id=resumen['temas'][tema.id])
+        self.assertEqual(clon.leccion_id, leccion.id)
+        self.assertEqual(clon.orden, 3)
+        self.assertFalse(clon.is_active)
+        self.assertEqual(clon.ejercicios.count(), 1)
+
+    def test_comando(self):
+        """clonar_curso clona todas las lecciones por defecto"""
+        self.crear_leccion(1, temas=1, ejercicios=1)
+        salida = StringIO()
+
+        call_command('clonar_curso', '--activas', stdout=salida)
+
+        self.assertIn('Clonacion completada', salida.getvalue())
+        self.assertTrue(Leccion.objects.get(orden=2).is_active)
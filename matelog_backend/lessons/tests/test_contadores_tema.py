@@ -0,0 +1,87 @@
+from io import StringIO
+from django.test import TestCase
+from django.core.management import call_command
+from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio
+
+
+class ContadoresTemaTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.otro_tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=2,
+            titulo="Otro Tema",
+            descripcion="Descripcion de prueba"
+        )
+
+    def crear_ejercicio(self, orden, dificultad, obligatorio=False, tema=None):
+        return Ejercicio.objects.create(
+            tema=tema or self.tema,
+            orden=orden,
+            tipo='ABIERTO',
+            dificultad=dificultad,
+            obligatorio=obligatorio,
+            instruccion="Resuelve",
+            enunciado="p o q",
+            respuesta_correcta="verdadero"
+        )
+
+    def test_contenidos_excluyen_ejemplo_extra(self):
+        """Solo los contenidos contables incrementan el contador"""
+        ContenidoTema.objects.create(tema=self.tema, orden=1, tipo='TEORIA', contenido_texto="T")
+        ContenidoTema.objects.create(tema=self.tema, orden=2, tipo='EJEMPLO_EXTRA', contenido_texto="E")
+        resumen = ContenidoTema.objects.create(tema=self.tema, orden=3, tipo='RESUMEN', contenido_texto="R")
+
+        self.tema.refresh_from_db()
+        self.assertEqual(self.tema.contenidos_contables, 2)
+
+        resumen.delete()
+        self.tema.refresh_from_db()
+        self.assertEqual(self.tema.contenidos_contables, 1)
+
+    def test_ejercicios_por_dificultad_y_obligatorio(self):
+        """Los ejercicios se cuentan por obligatorio y dificultad"""
+        self.crear_ejercicio(1, 'FACIL', obligatorio=True)
+        self.crear_ejercicio(2, 'FACIL')
+        ejercicio = self.crear_ejercicio(3, 'DIFICIL')
+
+        self.tema.refresh_from_db()
+        self.assertEqual(self.tema.total_ejercicios, 3)
+        self.assertEqual(self.tema.ejercicios_obligatorios, 1)
+        self.assertEqual(self.tema.ejercicios_opcionales_facil, 1)
+        self.assertEqual(self.tema.ejercicios_opcionales_dificil, 1)
+
+        # Cambiar de tema actualiza ambos temas
+        ejercicio.tema = self.otro_tema
+        ejercicio.save()
+        self.tema.refresh_from_db()
+        self.otro_tema.refresh_from_db()
+        self.assertEqual(self.tema.total_ejercicios, 2)
+        self.assertEqual(self.tema.ejercicios_opcionales_dificil, 0)
+        self.assertEqual(self.otro_tema.ejercicios_opcionales_dificil, 1)
+
+    def test_comando_reconstruye_contadores(self):
+        """El comando corrige contadores desincronizados"""
+        self.crear_ejercicio(1, 'INTERMEDIO')
+        Tema.objects.filter(id=self.tema.id).update(
+            total_ejercicios=99, ejercicios_opcionales_intermedio=99
+        )
+
+        call_command('recalcular_contadores_temas', stdout=StringIO())
+
+        self.tema.refresh_from_db()
+        self.assertEqual(self.tema.total_ejercicios, 1)
+        self.assertEqual(self.tema.ejercicios_opcionales_intermedio, 1)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from lessons.serializers import TemaDetailSerializer
+from tracking.models import ProgresoTema, RespuestaEjercicio
+
+
+class PayloadTemaTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.contenido = ContenidoTema.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='TEORIA',
+            contenido_texto="<p>Teoria</p>"
+        )
+        self.ejercicio = Ejercicio.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='MULTIPLE',
+            dificultad='FACIL',
+            instruccion="Elige",
+            enunciado="<p>Pregunta</p>",
+            respuesta_correcta="A"
+        )
+        self.opcion = OpcionMultiple.objects.create(
+            ejercicio=self.ejercicio, letra='A', texto='Uno'
+        )
+        self.segundo = Ejercicio.objects.create(
+            tema=self.tema,
+            orden=2,
+            tipo='ABIERTO',
+            dificultad='FACIL',
+            instruccion="Escribe",
+            enunciado="<p>Otra</p>",
+            respuesta_correcta="dos"
+        )
+
+    def _cliente(self, username):
+        usuario = get_user_model().objects.create_user(username=username, password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=usuario)
+        return usuario, client
+
+    def _detalle(self, client):
+        return client.get(f'/api/lessons/temas/{self.tema.id}/')
+
+    def test_payload_se_serializa_una_vez(self):
+        """Dos estudiantes con la misma variante comparten la serialización"""
+        _, primero = self._cliente('estudiante1')
+        _, segundo = self._cliente('estudiante2')
+
+        with mock.patch.object(
+            TemaDetailSerializer, 'to_representation',
+            autospec=True, side_effect=TemaDetailSerializer.to_representation
+        ) as serializar:
+            self._detalle(primero)
+            response = self._detalle(segundo)
+
+        self.assertEqual(serializar.call_count, 1)
+        datos = response.json()
+        self.assertEqual(datos['titulo'], "Tema de Prueba")
+        self.assertEqual([e['id'] for e in datos['ejercicios']], [self.ejercicio.id, self.segundo.id])
+        self.assertEqual(datos['ejercicios'][0]['opciones'], [{'letra': 'A', 'texto': 'Uno'}])
+
+    def test_overlay_por_usuario(self):
+        """Las respuestas y el siguiente ejercicio son propios de cada usuario"""
+        usuario, client = self._cliente('estudiante1')
+        _, otro = self._cliente('estudiante2')
+        self._detalle(client)
+        progreso = ProgresoTema.objects.get(usuario=usuario, tema=self.tema)
+        RespuestaEjercicio.objects.create(
+            usuario=usuario, ejercicio=self.ejercicio, progreso_tema=progreso,
+            respuesta_usuario='A', es_correcta=True
+        )
+
+        datos = self._detalle(client).json()
+        self.assertEqual(datos['ejercicios_respondidos'][str(self.ejercicio.id)]['es_correcta'], True)
+        self.assertEqual(datos['siguiente_ejercicio_index'], 1)
+        self.assertEqual(datos['total_ejercicios_respondidos'], 1)
+        self.assertEqual(datos['progreso']['estado'], 'INICIADO')
+
+        datos_otro = self._detalle(otro).json()
+        self.assertEqual(datos_otro['ejercicios_respondidos'], {})
+        self.assertEqual(datos_otro['siguiente_ejercicio_index'], 0)
+
+    def test_editar_contenido_u_opcion_crea_nueva_version(self):
+        """Editar contenidos u opciones invalida el payload compartido"""
+        _, client = self._cliente('estudiante1')
+        self._detalle(client)
+
+        self.contenido.contenido_texto = "<p>Teoria corregida</p>"
+        self.contenido.save()
+        datos = self._detalle(client).json()
+        self.assertEqual(datos['contenidos'][0]['contenido_texto'], "<p>Teoria corregida</p>")
+
+        self.opcion.texto = 'Uno corregido'
+        self.opcion.save()
+        datos = self._detalle(client).json()
+        self.assertEqual(datos['ejercicios'][0]['opciones'][0]['texto'], 'Uno corregido')
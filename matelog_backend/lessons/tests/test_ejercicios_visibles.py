@@ -0,0 +1,92 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, Ejercicio
+from lessons.ejercicios_visibles import ids_visibles, metadatos_tema
+from ml_adaptive.models import PerfilUsuario
+
+
+class EjerciciosVisiblesTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.obligatorio = self.crear_ejercicio(1, 'FACIL', obligatorio=True)
+        self.facil = self.crear_ejercicio(2, 'FACIL')
+        self.intermedio = self.crear_ejercicio(3, 'INTERMEDIO')
+        self.dificil = self.crear_ejercicio(4, 'DIFICIL')
+
+    def crear_ejercicio(self, orden, dificultad, obligatorio=False):
+        return Ejercicio.objects.create(
+            tema=self.tema,
+            orden=orden,
+            tipo='ABIERTO',
+            dificultad=dificultad,
+            obligatorio=obligatorio,
+            instruccion="Resuelve",
+            enunciado="p o q",
+            respuesta_correcta="verdadero"
+        )
+
+    def test_reglas_por_grupo_y_clasificacion(self):
+        """Cada combinación de grupo y clasificación ve sus ejercicios"""
+        ob, fa, it, di = (self.obligatorio.id, self.facil.id, self.intermedio.id, self.dificil.id)
+        self.assertEqual(ids_visibles(self.tema.id, 'CONTROL', 'ALTO'), [ob])
+        self.assertEqual(ids_visibles(self.tema.id, 'EXPERIMENTAL', 'ALTO'), [ob, it, di])
+        self.assertEqual(ids_visibles(self.tema.id, 'EXPERIMENTAL', 'MEDIO'), [ob, it])
+        self.assertEqual(ids_visibles(self.tema.id, 'EXPERIMENTAL', 'BAJO'), [ob, fa, it])
+        self.assertEqual(ids_visibles(self.tema.id, 'EXPERIMENTAL', None), [ob])
+        self.assertEqual(ids_visibles(self.tema.id, None, None), [ob, fa, it, di])
+
+    def test_cache_se_invalida_al_guardar_ejercicio(self):
+        """Los metadatos se leen una vez y se refrescan al editar un ejercicio"""
+        metadatos_tema(self.tema.id)
+        with self.assertNumQueries(0):
+            metadatos_tema(self.tema.id)
+
+        self.facil.obligatorio = True
+        self.facil.save()
+        self.assertEqual(
+            ids_visibles(self.tema.id, 'CONTROL', None),
+            [self.obligatorio.id, self.facil.id]
+        )
+
+        self.dificil.delete()
+        self.assertNotIn(self.dificil.id, ids_visibles(self.tema.id, None, None))
+
+    def test_detalle_y_finalizar_coinciden(self):
+        """El tema muestra y califica el mismo conjunto de ejercicios"""
+        usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        PerfilUsuario.objects.create(
+            user=usuario,
+            grupo='EXPERIMENTAL',
+            codigo_usado='EXP001',
+            clasificacion_autoeficacia='MEDIO'
+        )
+        client = APIClient()
+        client.force_authenticate(user=usuario)
+
+        detalle = client.get(f'/api/lessons/temas/{self.tema.id}/')
+        self.assertEqual(
+            [ejercicio['id'] for ejercicio in detalle.json()['ejercicios']],
+            [self.obligatorio.id, self.intermedio.id]
+        )
+
+        resultado = client.post(f'/api/lessons/temas/{self.tema.id}/finalizar/')
+        self.assertEqual(resultado.data['ejercicios_totales'], 2)
@@ -0,0 +1,223 @@
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, Ejercicio
+from tracking.models import ProgresoTema, ProgresoLeccion, IntentoTema, RespuestaEjercicio
+
+
+class FinalizarTemaTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.otro_tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=2,
+            titulo="Otro Tema",
+            descripcion="Descripcion de prueba"
+        )
+        self.ejercicios = [
+            Ejercicio.objects.create(
+                tema=self.tema,
+                orden=orden,
+                tipo='ABIERTO',
+                dificultad='FACIL',
+                instruccion="Resuelve",
+                enunciado="p o q",
+                respuesta_correcta="verdadero"
+            )
+            for orden in (1, 2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.client.get(f'/api/lessons/lecciones/{self.leccion.id}/')
+
+    def responder(self, ejercicio, respuesta, uso_ayuda=False):
+        return self.client.post('/api/lessons/ejercicios/validar/', {
+            'ejercicio_id': ejercicio.id,
+            'respuesta': respuesta,
+            'uso_ayuda': uso_ayuda,
+            'tiempo_respuesta_segundos': 10,
+        }, format='json')
+
+    def finalizar(self):
+        return self.client.post(f'/api/lessons/temas/{self.tema.id}/finalizar/')
+
+    def test_intentos_registran_estadisticas_y_mejora(self):
+        """Cada finalización crea un IntentoTema con la mejora respecto al anterior"""
+        self.responder(self.ejercicios[0], 'verdadero', uso_ayuda=True)
+        self.responder(self.ejercicios[1], 'falso')
+        response = self.finalizar()
+        self.assertFalse(response.data['aprobado'])
+        self.assertEqual(response.data['porcentaje_acierto'], 50.0)
+
+        self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        self.responder(self.ejercicios[0], 'verdadero')
+        self.responder(self.ejercicios[1], 'verdadero')
+        response = self.finalizar()
+        self.assertTrue(response.data['aprobado'])
+        self.assertEqual(response.data['numero_intento'], 2)
+
+        primero, segundo = IntentoTema.objects.order_by('numero_intento')
+        self.assertEqual(primero.ejercicios_correctos, 1)
+        self.assertEqual(primero.ejercicios_incorrectos, 1)
+        self.assertEqual(primero.ejercicios_con_ayuda, 1)
+        self.assertEqual(primero.tiempo_total_segundos, 20)
+        self.assertEqual(primero.mejora_porcentaje, Decimal('0'))
+        self.assertEqual(segundo.ejercicios_totales, 2)
+        self.assertEqual(segundo.mejora_porcentaje, Decimal('50.00'))
+
+    def test_reintentar_conserva_respuestas_del_intento_anterior(self):
+        """Reintentar abre un intento nuevo sin borrar las respuestas anteriores"""
+        self.responder(self.ejercicios[0], 'falso')
+        self.finalizar()
+
+        response = self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        self.assertEqual(response.status_code, 200)
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.intento_actual, 2)
+        self.assertEqual(progreso.intentos_realizados, 1)
+
+        # El detalle y la validación solo ven el intento en curso
+        response = self.client.get(f'/api/lessons/temas/{self.tema.id}/')
+        self.assertEqual(response.json()['ejercicios_respondidos'], {})
+        response = self.responder(self.ejercicios[0], 'verdadero')
+        self.assertTrue(response.data['es_correcta'])
+        self.responder(self.ejercicios[1], 'verdadero')
+        response = self.finalizar()
+        self.assertTrue(response.data['aprobado'])
+
+        self.assertEqual(
+            list(RespuestaEjercicio.objects.order_by('id').values_list('numero_intento', 'es_correcta')),
+            [(1, False), (2, True), (2, True)]
+        )
+        self.assertEqual(IntentoTema.objects.get(numero_intento=2).mejora_porcentaje, Decimal('100.00'))
+
+    def test_reintentar_dos_veces_abre_intentos_distintos(self):
+        """Reintentar sin finalizar también descarta las respuestas del intento en curso"""
+        self.responder(self.ejercicios[0], 'falso')
+        self.finalizar()
+
+        self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        self.responder(self.ejercicios[0], 'verdadero')
+        self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.intento_actual, 3)
+        self.assertEqual(progreso.intentos_realizados, 1)
+        response = self.client.get(f'/api/lessons/temas/{self.tema.id}/')
+        self.assertEqual(response.json()['ejercicios_respondidos'], {})
+
+        self.responder(self.ejercicios[1], 'verdadero')
+        response = self.finalizar()
+        self.assertEqual(response.data['numero_intento'], 2)
+        self.assertEqual(response.data['intento_actual'], 3)
+        self.assertEqual(response.data['porcentaje_acierto'], 50.0)
+
+        self.assertEqual(
+            list(RespuestaEjercicio.objects.order_by('id').values_list('numero_intento', flat=True)),
+            [1, 2, 3]
+        )
+        primero, tercero = IntentoTema.objects.order_by('numero_intento')
+        self.assertEqual(primero.numero_intento, 1)
+        self.assertEqual(tercero.numero_intento, 3)
+        self.assertEqual(tercero.ejercicios_correctos, 1)
+        self.assertEqual(tercero.mejora_porcentaje, Decimal('50.00'))
+        progreso.refresh_from_db()
+        self.assertEqual(progreso.intentos_realizados, 2)
+
+    def test_finalizar_dos_veces_recalifica_el_mismo_intento(self):
+        """Sin reintentar, finalizar de nuevo no cuenta un intento más"""
+        self.responder(self.ejercicios[0], 'verdadero')
+        self.finalizar()
+        self.responder(self.ejercicios[1], 'verdadero')
+        response = self.finalizar()
+
+        self.assertEqual(response.data['numero_intento'], 1)
+        self.assertEqual(response.data['intento_actual'], 1)
+        self.assertTrue(response.data['aprobado'])
+        intento = IntentoTema.objects.get()
+        self.assertEqual(intento.ejercicios_correctos, 2)
+        self.assertTrue(intento.aprobado)
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.intentos_realizados, 1)
+
+    def test_finalizar_intento_anterior_a_intento_tema(self):
+        """Un intento ya contado sin fila de IntentoTema se recalifica sin contarlo otra vez"""
+        self.responder(self.ejercicios[0], 'verdadero')
+        ProgresoTema.objects.filter(usuario=self.usuario, tema=self.tema).update(
+            intentos_realizados=1, intento_finalizado=1
+        )
+        response = self.finalizar()
+
+        self.assertEqual(response.data['numero_intento'], 1)
+        self.assertEqual(response.data['intento_actual'], 1)
+        self.assertEqual(IntentoTema.objects.get().numero_intento, 1)
+
+        self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        response = self.finalizar()
+        self.assertEqual(response.data['numero_intento'], 2)
+        self.assertEqual(response.data['intento_actual'], 2)
+
+    def test_reintentar_sin_progreso(self):
+        response = self.client.post(f'/api/lessons/temas/{self.otro_tema.id}/reintentar/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_progreso_leccion_incremental(self):
+        """El porcentaje de la lección se mueve con el acierto del tema"""
+        self.responder(self.ejercicios[0], 'verdadero')
+        self.responder(self.ejercicios[1], 'verdadero')
+        self.finalizar()
+
+        progreso_leccion = ProgresoLeccion.objects.get(usuario=self.usuario, leccion=self.leccion)
+        # 100% de acierto * 0.5 / 2 temas
+        self.assertEqual(progreso_leccion.porcentaje_completado, Decimal('25.00'))
+        self.assertNotEqual(progreso_leccion.estado, 'COMPLETADA')
+        self.assertTrue(
+            ProgresoTema.objects.get(usuario=self.usuario, tema=self.otro_tema).desbloqueado
+        )
+
+        # Aprobar de nuevo con el resto de temas completados completa la lección
+        ProgresoTema.objects.filter(usuario=self.usuario, tema=self.otro_tema).update(
+            estado='COMPLETADO'
+        )
+        self.client.post(f'/api/lessons/temas/{self.tema.id}/reintentar/')
+        self.responder(self.ejercicios[0], 'verdadero')
+        self.responder(self.ejercicios[1], 'verdadero')
+        self.finalizar()
+
+        progreso_leccion.refresh_from_db()
+        self.assertEqual(progreso_leccion.estado, 'COMPLETADA')
+
+    def test_conflicto_de_version_responde_409(self):
+        """Si la fila cambia en todos los reintentos no se registra el intento"""
+        self.responder(self.ejercicios[0], 'verdadero')
+
+        with mock.patch('tracking.concurrencia.guardar_con_version', return_value=False):
+            response = self.finalizar()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('error', response.data)
+        self.assertFalse(IntentoTema.objects.exists())
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.intentos_realizados, 0)
+
+        response = self.finalizar()
+        self.assertEqual(response.data['numero_intento'], 1)
@@ -0,0 +1,107 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema
+from lessons.progreso_cache import invalidar_snapshot
+
+
+class GetCondicionalTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.contenido = ContenidoTema.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='TEORIA',
+            contenido_texto="<p>Teoria</p>"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _revalidar(self, url):
+        primera = self.client.get(url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertIn('ETag', primera)
+        self.assertIn('Last-Modified', primera)
+        return primera['ETag']
+
+    def test_304_sin_cambios(self):
+        """Un ETag vigente se responde con 304 y sin cuerpo"""
+        for url, consultas in [
+            ('/api/lessons/lecciones/', 1),
+            (f'/api/lessons/lecciones/{self.leccion.id}/', 1),
+            (f'/api/lessons/temas/{self.tema.id}/', 2),
+        ]:
+            etag = self._revalidar(url)
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertLessEqual(len(capturadas), consultas, url)
+            self.assertEqual(response.content, b'')
+
+    def test_cambio_de_progreso_invalida_etag(self):
+        """Registrar progreso cambia la versión del usuario"""
+        url = f'/api/lessons/lecciones/{self.leccion.id}/'
+        etag = self._revalidar(url)
+
+        self.client.post(f'/api/lessons/contenido/{self.contenido.id}/visto/')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cambio_de_contenido_invalida_etag(self):
+        """Editar el contenido de un tema cambia su ETag"""
+        url = f'/api/lessons/temas/{self.tema.id}/'
+        etag = self._revalidar(url)
+
+        self.contenido.contenido_texto = "<p>Teoria corregida</p>"
+        self.contenido.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['contenidos'][0]['contenido_texto'], "<p>Teoria corregida</p>")
+
+    def test_etag_es_por_usuario(self):
+        """El ETag de un usuario no sirve para otro"""
+        url = '/api/lessons/lecciones/'
+        etag = self._revalidar(url)
+
+        otro = get_user_model().objects.create_user(username='otro', password='testpass123')
+        self.client.force_authenticate(user=otro)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_version_de_progreso_persistente(self):
+        """El ETag no depende del cache del proceso sino de la versión guardada"""
+        url = f'/api/lessons/lecciones/{self.leccion.id}/'
+        etag = self._revalidar(url)
+
+        # Otro worker (o un reinicio) no tiene nada en cache
+        cache.clear()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Otro worker cambia el progreso: esta petición carga al usuario de nuevo
+        invalidar_snapshot(get_user_model().objects.get(pk=self.usuario.pk))
+        self.usuario.refresh_from_db()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,140 @@
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio, VersionContenido
+from lessons import indice_contenido
+from tracking.models import TiempoPantalla
+
+
+class IndiceContenidoTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.leccion = Leccion.objects.create(orden=1, titulo='Lección', descripcion='Desc')
+        self.tema1 = Tema.objects.create(leccion=self.leccion, orden=1, titulo='T1', descripcion='D')
+        self.tema2 = Tema.objects.create(
+            leccion=self.leccion, orden=2, titulo='T2', descripcion='D', is_active=False
+        )
+        self.tema3 = Tema.objects.create(leccion=self.leccion, orden=3, titulo='T3', descripcion='D')
+        self.teoria = ContenidoTema.objects.create(
+            tema=self.tema1, orden=1, tipo='TEORIA', contenido_texto='<p>T</p>'
+        )
+        self.extra = ContenidoTema.objects.create(
+            tema=self.tema1, orden=2, tipo='EJEMPLO_EXTRA', contenido_texto='<p>E</p>'
+        )
+        self.ejercicio = Ejercicio.objects.create(
+            tema=self.tema1, orden=1, tipo='ABIERTO', dificultad='DIFICIL',
+            instruccion='I', enunciado='E', respuesta_correcta='x', obligatorio=True
+        )
+
+    def test_arbol_completo(self):
+        """El índice refleja jerarquía, orden, tipos, contadores y adyacencia"""
+        indice = indice_contenido.obtener_indice()
+
+        tema = indice.temas[self.tema1.id]
+        self.assertEqual(tema.leccion_id, self.leccion.id)
+        self.assertEqual(tema.contenidos_contables, 1)
+        self.assertEqual(tema.total_ejercicios, 1)
+        self.assertEqual(tema.contenido_ids, (self.teoria.id, self.extra.id))
+        self.assertEqual(tema.ejercicio_ids, (self.ejercicio.id,))
+        # El tema 2 está inactivo: no se desbloquea
+        self.assertIsNone(tema.siguiente_id)
+        self.assertIsNone(indice.siguiente_tema(self.tema1.id))
+        self.assertEqual(indice.lecciones[self.leccion.id].tema_ids,
+                         (self.tema1.id, self.tema2.id, self.tema3.id))
+        self.assertFalse(indice.contenidos[self.extra.id].contable)
+        ejercicio = indice.ejercicios[self.ejercicio.id]
+        self.assertEqual((ejercicio.dificultad, ejercicio.obligatorio), ('DIFICIL', True))
+
+    def test_se_reconstruye_al_editar(self):
+        """Las señales invalidan el índice del proceso al guardar"""
+        indice_contenido.obtener_indice()
+        self.tema2.is_active = True
+        self.tema2.save()
+
+        indice = indice_contenido.obtener_indice()
+        self.assertEqual(indice.temas[self.tema1.id].siguiente_id, self.tema2.id)
+        self.assertEqual(indice_contenido.tema(str(self.tema1.id)).siguiente_id, self.tema2.id)
+
+    def test_lecturas_sin_consultas_dentro_del_ttl(self):
+        """Dentro del TTL las búsquedas no tocan la base de datos"""
+        indice_contenido.obtener_indice()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(indice_contenido.tema(self.tema1.id))
+            self.assertIsNotNone(indice_contenido.contenido(self.teoria.id))
+            self.assertIsNotNone(indice_contenido.ejercicio(self.ejercicio.id))
+
+    @override_settings(INDICE_CONTENIDO_TTL=0)
+    def test_version_sin_cambios_cuesta_una_consulta(self):
+        """Vencido el TTL solo se lee la fila de versión"""
+        indice = indice_contenido.obtener_indice()
+        with self.assertNumQueries(1):
+            self.assertIs(indice_contenido.obtener_indice(), indice)
+
+    def test_cambio_en_otro_proceso(self):
+        """Un id desconocido fuerza la comprobación de la versión global"""
+        indice_contenido.obtener_indice()
+        # Otro proceso crea un tema con una operación masiva e incrementa la versión
+        nuevo, = Tema.objects.bulk_create([
+            Tema(leccion=self.leccion, orden=4, titulo='T4', descripcion='D')
+        ])
+        VersionContenido.incrementar()
+
+        self.assertEqual(indice_contenido.tema(nuevo.id).orden, 4)
+        self.assertIsNone(indice_contenido.tema(999999))
+        self.assertIsNone(indice_contenido.tema('abc'))
+
+    def test_registrar_tiempo_sin_consultar_contenido(self):
+        """RegistrarTiempoPantallaView resuelve tema y contenido con el índice"""
+        usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=usuario)
+        indice_contenido.obtener_indice()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.post('/api/tracking/tiempo-pantalla/', {
+                'tema_id': self.tema1.id, 'tipo_contenido': 'TEORIA', 'numero': 1,
+                'contenido_id': self.teoria.id, 'tiempo_segundos': 20,
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(TiempoPantalla.objects.get().contenido_id, self.teoria.id)
+        tablas = ' '.join(c['sql'] for c in consultas.captured_queries if c['sql'].startswith('SELECT'))
+        self.assertNotIn('lessons_tema', tablas)
+        self.assertNotIn('lessons_contenidotema', tablas)
+
+        response = client.post('/api/tracking/tiempo-pantalla/', {
+            'tema_id': self.tema1.id, 'tipo_contenido': 'TEORIA', 'numero': 1,
+            'contenido_id': 999999, 'tiempo_segundos': 20,
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_validar_respuesta_sin_leer_el_ejercicio(self):
+        """ValidarRespuestaView valida y da retroalimentación desde el índice"""
+        self.ejercicio.respuestas_alternativas = ['equis']
+        self.ejercicio.retroalimentacion_correcta = 'Bien'
+        self.ejercicio.save()
+        usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=usuario)
+        indice_contenido.obtener_indice()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.post('/api/lessons/ejercicios/validar/', {
+                'ejercicio_id': self.ejercicio.id, 'respuesta': ' EQUIS ',
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'es_correcta': True, 'retroalimentacion': 'Bien'})
+        tablas = ' '.join(c['sql'] for c in consultas.captured_queries if c['sql'].startswith('SELECT'))
+        self.assertNotIn('lessons_ejercicio', tablas)
+
+        response = client.post('/api/lessons/ejercicios/validar/', {
+            'ejercicio_id': 999999, 'respuesta': 'x',
+        }, format='json')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,99 @@
+from django.test import TestCase, SimpleTestCase
+from django.core.exceptions import ValidationError
+from lessons.models import Ejercicio, Tema, Leccion
+from lessons import logica
+
+
+class EquivalenciaLogicaTestCase(SimpleTestCase):
+    def test_equivalencias_basicas(self):
+        """Fórmulas equivalentes con distinta escritura se aceptan"""
+        self.assertTrue(logica.equivalentes('p ∧ q', 'q & p'))
+        self.assertTrue(logica.equivalentes('¬(p ∨ q)', '~p ∧ ~q'))
+        self.assertTrue(logica.equivalentes('p → q', '¬p v q'))
+        self.assertTrue(logica.equivalentes('p ↔ q', '(p -> q) ^ (q -> p)'))
+        self.assertTrue(logica.equivalentes('P ∧ Q', 'p∧q'))
+
+    def test_no_equivalentes(self):
+        """Fórmulas con distinta tabla de verdad se rechazan"""
+        self.assertFalse(logica.equivalentes('p → q', 'q → p'))
+        self.assertFalse(logica.equivalentes('p ∧ q', 'p ∨ q'))
+        self.assertFalse(logica.equivalentes('p', 'q'))
+
+    def test_precedencia_y_asociatividad(self):
+        """¬ liga más que ∧, ∧ más que ∨, y → asocia a la derecha"""
+        self.assertTrue(logica.equivalentes('¬p ∧ q ∨ r', '((¬p) ∧ q) ∨ r'))
+        self.assertTrue(logica.equivalentes('p → q → r', 'p → (q → r)'))
+        self.assertFalse(logica.equivalentes('p → q → r', '(p → q) → r'))
+
+    def test_variables_distintas(self):
+        """Una variable irrelevante no rompe la equivalencia"""
+        self.assertTrue(logica.equivalentes('p', 'p ∧ (q ∨ ¬q)'))
+        self.assertTrue(logica.equivalentes('p ∨ ¬p', '⊤'))
+
+    def test_ocho_variables(self):
+        """La tabla se evalúa completa también con muchas variables"""
+        referencia = '(a ∧ b) ∨ (c ∧ d) ∨ (e → f) ∨ (g ↔ h)'
+        self.assertTrue(logica.equivalentes(referencia, '(h ↔ g) ∨ (¬e ∨ f) ∨ (d ∧ c) ∨ (b ∧ a)'))
+        self.assertFalse(logica.equivalentes(referencia, '(h ⊕ g) ∨ (¬e ∨ f) ∨ (d ∧ c) ∨ (b ∧ a)'))
+
+    def test_formulas_invalidas(self):
+        """Una respuesta mal formada es incorrecta; una referencia inválida lanza error"""
+        self.assertFalse(logica.equivalentes('p ∧ q', 'p ∧'))
+        self.assertFalse(logica.equivalentes('p ∧ q', '(p ∧ q'))
+        self.assertFalse(logica.equivalentes('p ∧ q', 'p ? q'))
+        with self.assertRaises(logica.FormulaInvalida):
+            logica.equivalentes('p ∧', 'p')
+
+
+class EjercicioLogicaTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+
+    def _crear(self, respuesta, **extra):
+        return Ejercicio.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo=extra.pop('tipo', 'ABIERTO'),
+            dificultad='FACIL',
+            instruccion="Test",
+            enunciado="Test",
+            respuesta_correcta=respuesta,
+            **extra
+        )
+
+    def test_modo_logica_acepta_equivalentes(self):
+        """En modo LOGICA se acepta cualquier fórmula equivalente"""
+        ejercicio = self._crear('p → q', modo_validacion='LOGICA')
+
+        self.assertTrue(ejercicio.validar_respuesta('¬q → ¬p'))
+        self.assertTrue(ejercicio.validar_respuesta('~p | q'))
+        self.assertFalse(ejercicio.validar_respuesta('p & q'))
+        self.assertFalse(ejercicio.validar_respuesta('no sé'))
+
+    def test_modo_texto_sigue_comparando_texto(self):
+        """El modo por defecto mantiene la comparación de texto"""
+        ejercicio = self._crear('p ∧ q')
+
+        self.assertTrue(ejercicio.validar_respuesta('p ∧ q'))
+        self.assertFalse(ejercicio.validar_respuesta('q ∧ p'))
+
+    def test_modo_logica_valida_referencia(self):
+        """No se puede guardar una referencia que no es fórmula"""
+        with self.assertRaises(ValidationError):
+            self._crear('p ∧', modo_validacion='LOGICA')
+
+    def test_modo_logica_solo_abiertos(self):
+        """El modo LOGICA no aplica a opción múltiple"""
+        with self.assertRaises(ValidationError):
+            self._crear('A', tipo='MULTIPLE', modo_validacion='LOGICA')
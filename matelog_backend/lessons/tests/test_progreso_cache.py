@@ -0,0 +1,98 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema
+from lessons.progreso_cache import obtener_snapshot
+
+
+class ProgresoSnapshotTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.temas = [
+            Tema.objects.create(
+                leccion=self.leccion,
+                orden=orden,
+                titulo=f"Tema {orden}",
+                descripcion="Descripcion de prueba"
+            )
+            for orden in (1, 2, 3)
+        ]
+        self.teoria = ContenidoTema.objects.create(
+            tema=self.temas[0], orden=1, tipo='TEORIA', contenido_texto="<p>Teoria</p>"
+        )
+        ContenidoTema.objects.create(
+            tema=self.temas[0], orden=2, tipo='EJEMPLO', contenido_texto="<p>Ejemplo</p>"
+        )
+        self.extra = ContenidoTema.objects.create(
+            tema=self.temas[0], orden=3, tipo='EJEMPLO_EXTRA', contenido_texto="<p>Extra</p>"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.url = f'/api/lessons/lecciones/{self.leccion.id}/'
+
+    def test_visita_repetida_se_sirve_del_snapshot(self):
+        """La segunda visita no consulta progreso ni cuenta por tema"""
+        primera = self.client.get(self.url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertTrue(primera.data['temas'][0]['progreso']['desbloqueado'])
+        self.assertEqual(primera.data['temas'][0]['contenidos_count'], 2)
+
+        # Lección, primer tema y lista de temas con conteos anotados
+        with self.assertNumQueries(3):
+            segunda = self.client.get(self.url)
+        self.assertEqual(segunda.data, primera.data)
+
+    def test_contenido_visto_invalida_snapshot(self):
+        """Registrar un contenido visto se refleja en la siguiente visita"""
+        self.client.get(self.url)
+
+        self.client.post(f'/api/lessons/contenido/{self.teoria.id}/visto/')
+        self.client.post(f'/api/lessons/contenido/{self.extra.id}/visto/')
+
+        response = self.client.get(self.url)
+        progreso = response.data['temas'][0]['progreso']
+        self.assertEqual(progreso['contenido_completado'], 1)
+        self.assertEqual(progreso['contenidos_count'], 2)
+        self.assertGreater(response.data['progreso']['porcentaje_completado'], 0)
+
+    def test_lista_lecciones_usa_snapshot(self):
+        """La lista de lecciones muestra el progreso guardado en el snapshot"""
+        response = self.client.get('/api/lessons/lecciones/')
+        self.assertEqual(response.data[0]['progreso']['estado'], 'SIN_INICIAR')
+
+        self.client.get(self.url)
+        response = self.client.get('/api/lessons/lecciones/')
+        self.assertEqual(response.data[0]['progreso']['estado'], 'INICIADA')
+        self.assertIn(self.leccion.id, obtener_snapshot(self.usuario)['lecciones'])
+
+    def test_lista_lecciones_consultas_constantes(self):
+        """La lista de lecciones no hace un COUNT por lección"""
+        self.client.get('/api/lessons/lecciones/')
+        # Versión para el ETag y lecciones con la cantidad de temas anotada
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/lessons/lecciones/')
+        self.assertEqual(response.data[0]['cantidad_temas'], 3)
+
+        for orden in range(2, 7):
+            leccion = Leccion.objects.create(
+                orden=orden, titulo=f"Leccion {orden}", descripcion="Descripcion de prueba"
+            )
+            Tema.objects.create(leccion=leccion, orden=1, titulo="Tema", descripcion="Descripcion")
+            Tema.objects.create(
+                leccion=leccion, orden=2, titulo="Inactivo", descripcion="Descripcion", is_active=False
+            )
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/lessons/lecciones/')
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[-1]['cantidad_temas'], 1)
@@ -0,0 +1,96 @@
+from decimal import Decimal
+from io import StringIO
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema
+from tracking.models import ProgresoLeccion, ProgresoTema
+
+
+class ProgresoLeccionIncrementalTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.contenidos = []
+        for orden in range(1, 5):
+            tema = Tema.objects.create(
+                leccion=self.leccion,
+                orden=orden,
+                titulo=f"Tema {orden}",
+                descripcion="Descripcion de prueba"
+            )
+            self.contenidos.append([
+                ContenidoTema.objects.create(
+                    tema=tema, orden=numero, tipo='TEORIA', contenido_texto="<p>T</p>"
+                )
+                for numero in (1, 2)
+            ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.client.get(f'/api/lessons/lecciones/{self.leccion.id}/')
+
+    def ver(self, contenido):
+        return self.client.post(f'/api/lessons/contenido/{contenido.id}/visto/')
+
+    def test_contenido_visto_aplica_diferencia(self):
+        """Cada contenido visto suma su parte al porcentaje de la lección"""
+        response = self.ver(self.contenidos[0][0])
+        # 50% del contenido * 0.5 / 4 temas
+        self.assertEqual(response.data['porcentaje_leccion'], 6.25)
+
+        self.ver(self.contenidos[0][1])
+        response = self.ver(self.contenidos[1][0])
+        self.assertEqual(response.data['porcentaje_leccion'], 18.75)
+
+        # Ver de nuevo el mismo contenido no cambia nada
+        response = self.ver(self.contenidos[1][0])
+        self.assertEqual(response.data['porcentaje_leccion'], 18.75)
+
+        progreso = ProgresoLeccion.objects.get(usuario=self.usuario, leccion=self.leccion)
+        self.assertEqual(progreso.suma_progreso_temas, Decimal('75.00'))
+
+    def test_costo_no_depende_de_temas(self):
+        """Marcar contenido visto cuesta las mismas queries con más temas"""
+        self.ver(self.contenidos[0][0])
+        self.ver(self.contenidos[1][0])
+        # Incluye el UPDATE de la versión del progreso del usuario
+        with self.assertNumQueries(10):
+            self.ver(self.contenidos[0][1])
+
+        for orden in range(5, 15):
+            Tema.objects.create(
+                leccion=self.leccion, orden=orden, titulo=f"Tema {orden}", descripcion="D"
+            )
+        with self.assertNumQueries(10):
+            self.ver(self.contenidos[1][1])
+
+    def test_comando_detecta_y_repara_diferencias(self):
+        """El recálculo completo corrige progresos desincronizados"""
+        self.ver(self.contenidos[0][0])
+        ProgresoLeccion.objects.filter(usuario=self.usuario).update(
+            porcentaje_completado=90, suma_progreso_temas=360
+        )
+
+        salida = StringIO()
+        call_command('verificar_progreso_lecciones', stdout=salida)
+        self.assertIn('1 con diferencias', salida.getvalue())
+
+        call_command('verificar_progreso_lecciones', '--reparar', stdout=StringIO())
+        progreso = ProgresoLeccion.objects.get(usuario=self.usuario, leccion=self.leccion)
+        self.assertEqual(progreso.porcentaje_completado, Decimal('6.25'))
+        self.assertEqual(progreso.suma_progreso_temas, Decimal('25.00'))
+        self.assertEqual(
+            ProgresoTema.objects.get(usuario=self.usuario, tema=self.contenidos[0][0].tema).progreso_total,
+            Decimal('25.00')
+        )
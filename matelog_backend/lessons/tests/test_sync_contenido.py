@@ -0,0 +1,155 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema, ContenidoTema, Ejercicio, OpcionMultiple
+from lessons.bundle_contenido import (
+    exportar_bundle, sincronizar_bundle, BundleInvalido, VERSION_BUNDLE
+)
+from tracking.models import ProgresoTema, RespuestaEjercicio
+
+
+def bundle_base():
+    return {
+        'version': VERSION_BUNDLE,
+        'lecciones': [{
+            'orden': 1,
+            'titulo': 'Lógica',
+            'descripcion': '<p>Lección</p>',
+            'temas': [
+                {
+                    'orden': 1,
+                    'titulo': 'Proposiciones',
+                    'descripcion': '<p>Tema 1</p>',
+                    'contenidos': [
+                        {'orden': 1, 'tipo': 'TEORIA', 'contenido_texto': '<p>Teoría</p>'},
+                        {'orden': 2, 'tipo': 'EJEMPLO_EXTRA', 'contenido_texto': '<p>Extra</p>'},
+                    ],
+                    'ejercicios': [
+                        {
+                            'orden': 1, 'tipo': 'MULTIPLE', 'dificultad': 'FACIL',
+                            'instruccion': 'Elige', 'enunciado': '<p>¿p?</p>',
+                            'respuesta_correcta': 'b', 'obligatorio': True,
+                            'opciones': [
+                                {'letra': 'A', 'texto': 'Sí'},
+                                {'letra': 'B', 'texto': 'No'},
+                            ],
+                        },
+                        {
+                            'orden': 2, 'tipo': 'ABIERTO', 'dificultad': 'INTERMEDIO',
+                            'instruccion': 'Escribe', 'enunciado': '<p>p ∧ q</p>',
+                            'respuesta_correcta': 'p ∧ q', 'modo_validacion': 'LOGICA',
+                        },
+                    ],
+                },
+                {
+                    'orden': 2,
+                    'titulo': 'Conectivos',
+                    'descripcion': '<p>Tema 2</p>',
+                },
+            ],
+        }],
+    }
+
+
+class SincronizarContenidoTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+
+    def test_carga_inicial_y_exportacion(self):
+        """Un bundle vacío en BD se inserta completo y se exporta igual"""
+        resumen = sincronizar_bundle(bundle_base())
+
+        self.assertEqual(resumen['lecciones']['creados'], 1)
+        self.assertEqual(resumen['temas']['creados'], 2)
+        self.assertEqual(resumen['contenidos']['creados'], 2)
+        self.assertEqual(resumen['ejercicios']['creados'], 2)
+        self.assertEqual(resumen['opciones']['creados'], 2)
+
+        tema = Tema.objects.get(orden=1)
+        self.assertEqual(tema.contenidos_contables, 1)
+        self.assertEqual(tema.total_ejercicios, 2)
+        ejercicio = Ejercicio.objects.get(tema=tema, orden=1)
+        self.assertEqual(ejercicio.respuesta_correcta, 'B')
+        self.assertTrue(ejercicio.validar_respuesta('b'))
+        self.assertTrue(Ejercicio.objects.get(tema=tema, orden=2).validar_respuesta('q & p'))
+
+        # Volver a aplicar lo exportado no cambia nada
+        resumen = sincronizar_bundle(exportar_bundle())
+        for conteos in resumen.values():
+            self.assertEqual(conteos['creados'] + conteos['actualizados'] + conteos['desactivados'], 0)
+
+    def test_actualiza_y_desactiva_sin_borrar_progreso(self):
+        """Los cambios se aplican por orden y el progreso queda intacto"""
+        sincronizar_bundle(bundle_base())
+        usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        tema2 = Tema.objects.get(orden=2)
+        progreso = ProgresoTema.objects.create(usuario=usuario, tema=tema2, desbloqueado=True)
+        ejercicio = Ejercicio.objects.get(tema__orden=1, orden=1)
+        progreso1 = ProgresoTema.objects.create(usuario=usuario, tema=ejercicio.tema)
+        RespuestaEjercicio.objects.create(
+            usuario=usuario, ejercicio=ejercicio, progreso_tema=progreso1,
+            respuesta_usuario='B', es_correcta=True
+        )
+
+        bundle = bundle_base()
+        tema1 = bundle['lecciones'][0]['temas'][0]
+        tema1['contenidos'][0]['contenido_texto'] = '<p>Teoría corregida</p>'
+        tema1['ejercicios'][0]['opciones'][0]['texto'] = 'Sí, siempre'
+        tema1['ejercicios'].pop()
+        del bundle['lecciones'][0]['temas'][1]
+
+        resumen = sincronizar_bundle(bundle)
+
+        self.assertEqual(resumen['contenidos']['actualizados'], 1)
+        self.assertEqual(resumen['opciones']['actualizados'], 1)
+        self.assertEqual(resumen['ejercicios']['sobrantes'], 1)
+        self.assertEqual(resumen['temas']['desactivados'], 1)
+        tema2.refresh_from_db()
+        self.assertFalse(tema2.is_active)
+        self.assertTrue(ProgresoTema.objects.filter(pk=progreso.pk).exists())
+        self.assertEqual(RespuestaEjercicio.objects.count(), 1)
+        self.assertEqual(
+            ContenidoTema.objects.get(tema__orden=1, orden=1).contenido_texto,
+            '<p>Teoría corregida</p>'
+        )
+        self.assertEqual(OpcionMultiple.objects.get(letra='A').texto, 'Sí, siempre')
+
+    def test_bundle_invalido_no_escribe(self):
+        """Los errores se reportan todos juntos y no se guarda nada"""
+        bundle = bundle_base()
+        ejercicios = bundle['lecciones'][0]['temas'][0]['ejercicios']
+        ejercicios[0]['respuesta_correcta'] = 'C'
+        ejercicios[1]['dificultad'] = 'IMPOSIBLE'
+        bundle['lecciones'][0]['temas'][1]['orden'] = 1
+
+        with self.assertRaises(BundleInvalido) as contexto:
+            sincronizar_bundle(bundle)
+
+        self.assertEqual(len(contexto.exception.errores), 3)
+        self.assertEqual(Leccion.objects.count(), 0)
+
+    def test_comandos_y_dry_run(self):
+        """export_contenido y sync_contenido trabajan con archivos; --dry-run no guarda"""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'bundle.json')
+            with open(ruta, 'w', encoding='utf-8') as archivo:
+                json.dump(bundle_base(), archivo)
+
+            call_command('sync_contenido', ruta, '--dry-run', stdout=StringIO())
+            self.assertEqual(Leccion.objects.count(), 0)
+
+            call_command('sync_contenido', ruta, stdout=StringIO())
+            self.assertEqual(Ejercicio.objects.count(), 2)
+
+            salida = os.path.join(directorio, 'exportado.json')
+            call_command('export_contenido', salida, stdout=StringIO())
+            with open(salida, encoding='utf-8') as archivo:
+                exportado = json.load(archivo)
+            self.assertEqual(len(exportado['lecciones'][0]['temas']), 2)
@@ -181,3 +181,55 @@ class EjercicioValidacionTestCase(TestCase):
 
         with self.assertRaises(ValidationError):
             ejercicio.save()
+
+    def test_clave_normalizada_se_guarda(self):
+        """La clave normalizada se precalcula al guardar"""
+        ejercicio = Ejercicio.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='ABIERTO',
+            dificultad='FACIL',
+            instruccion="Test",
+            enunciado="Test",
+            respuesta_correcta="La Derivación."
+        )
+
+        ejercicio.refresh_from_db()
+        self.assertEqual(ejercicio.respuesta_normalizada, "la derivacion")
+        self.assertTrue(
+            Ejercicio.objects.filter(respuesta_normalizada="la derivacion").exists()
+        )
+
+    def test_respuestas_alternativas(self):
+        """Las respuestas alternativas se aceptan y se guardan normalizadas"""
+        ejercicio = Ejercicio.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='ABIERTO',
+            dificultad='FACIL',
+            instruccion="Test",
+            enunciado="Test",
+            respuesta_correcta="2",
+            respuestas_alternativas=["Dos", "x = 2"]
+        )
+
+        ejercicio.refresh_from_db()
+        self.assertEqual(ejercicio.claves_alternativas, ["dos", "x  2"])
+        self.assertTrue(ejercicio.validar_respuesta("2"))
+        self.assertTrue(ejercicio.validar_respuesta("DOS"))
+        self.assertTrue(ejercicio.validar_respuesta("x = 2"))
+        self.assertFalse(ejercicio.validar_respuesta("tres"))
+
+    def test_respuestas_alternativas_invalidas(self):
+        """Las alternativas deben ser una lista de textos no vacíos"""
+        with self.assertRaises(ValidationError):
+            Ejercicio.objects.create(
+                tema=self.tema,
+                orden=1,
+                tipo='ABIERTO',
+                dificultad='FACIL',
+                instruccion="Test",
+                enunciado="Test",
+                respuesta_correcta="2",
+                respuestas_alternativas=["dos", ""]
+            )
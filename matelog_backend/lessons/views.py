@@ -5,22 +5,46 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import UserRateThrottle
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from django.utils import timezone
 from django.db import models, transaction
+from decimal import Decimal
+import logging
 
 
 from .models import (
-    Leccion, Tema, ContenidoTema, Ejercicio
+    Tema, ContenidoTema
 )
 from tracking.models import (
-    ProgresoLeccion, ProgresoTema, RespuestaEjercicio
+    ProgresoLeccion, ProgresoTema, RespuestaEjercicio, IntentoTema
 )
+from tracking.concurrencia import ConflictoConcurrencia, modificar
 from .serializers import (
     LeccionListSerializer,
+    lecciones_con_cantidad_temas,
     LeccionDetailSerializer,
-    TemaDetailSerializer,
     EjercicioValidacionSerializer,
 )
+from .ejercicios_visibles import ids_visibles_para_usuario
+from .contenido_cache import payload_tema, combinar
+from .condicional import (
+    validadores_lecciones,
+    lecciones_con_version,
+    validadores_leccion,
+    validadores_tema,
+    respuesta_no_modificada,
+    agregar_validadores,
+)
+from .progreso import actualizar_progreso_tema
+from . import indice_contenido
+from .progreso_cache import (
+    obtener_snapshot,
+    invalidar_snapshot,
+    PROGRESO_LECCION_VACIO,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 # Custom throttle class for answer validation
@@ -29,95 +53,86 @@ class ValidarRespuestaThrottle(UserRateThrottle):
     rate = '100/minute'
 
 
-def calcular_porcentaje_leccion(usuario, leccion):
-    """
-    Calcula el porcentaje de completado de una lección basándose en:
-    - Progreso de contenido (teoría/ejemplos) de cada tema
-    - Progreso de ejercicios de cada tema
+# Cambios de progreso para tracking.concurrencia.modificar: cada uno parte del
+# estado leído y devuelve los campos que tocó (ninguno si ya estaba hecho)
 
-    Fórmula: Promedio del progreso de todos los temas
-    Progreso de tema = (progreso_contenido * 0.5) + (porcentaje_acierto * 0.5)
+def _iniciar_leccion(progreso_leccion):
+    if progreso_leccion.estado != 'SIN_INICIAR':
+        return []
+    progreso_leccion.estado = 'INICIADA'
+    if not progreso_leccion.fecha_inicio:
+        progreso_leccion.fecha_inicio = timezone.now()
+    return ['estado', 'fecha_inicio']
 
-    OPTIMIZADO: Usa prefetch_related para evitar N+1 queries
-    """
-    # Obtener temas con sus progresos en una sola query
-    temas = leccion.temas.filter(is_active=True).prefetch_related(
-        models.Prefetch(
-            'progresotema_set',
-            queryset=ProgresoTema.objects.filter(usuario=usuario).prefetch_related('contenidos_vistos'),
-            to_attr='progreso_usuario'
-        )
-    )
 
-    if not temas.exists():
-        return 0
+def _leccion_en_progreso(progreso_leccion):
+    if progreso_leccion.estado != 'SIN_INICIAR':
+        return []
+    progreso_leccion.estado = 'EN_PROGRESO'
+    progreso_leccion.fecha_inicio = timezone.now()
+    return ['estado', 'fecha_inicio']
 
-    progreso_total = 0
 
-    for tema in temas:
-        # Obtener o crear progreso (ya está prefetched)
-        if hasattr(tema, 'progreso_usuario') and tema.progreso_usuario:
-            progreso_tema = tema.progreso_usuario[0]
-        else:
-            # Crear si no existe (caso raro)
-            progreso_tema, _ = ProgresoTema.objects.get_or_create(
-                usuario=usuario,
-                tema=tema
-            )
+def _desbloquear_tema(progreso_tema):
+    if progreso_tema.desbloqueado:
+        return []
+    progreso_tema.desbloqueado = True
+    return ['desbloqueado']
 
-        # Progreso de contenido (teoría/ejemplos)
-        progreso_contenido = progreso_tema.calcular_progreso_contenido()
 
-        # Progreso de ejercicios
-        progreso_ejercicios = float(progreso_tema.porcentaje_acierto or 0)
+def _iniciar_tema(progreso_tema):
+    if progreso_tema.estado != 'SIN_INICIAR':
+        return []
+    progreso_tema.estado = 'INICIADO'
+    progreso_tema.fecha_inicio = timezone.now()
+    return ['estado', 'fecha_inicio']
 
-        # Promedio ponderado: 50% contenido, 50% ejercicios
-        progreso_tema_total = (progreso_contenido * 0.5) + (progreso_ejercicios * 0.5)
 
-        progreso_total += progreso_tema_total
+def _fijar_inicio_tema(progreso_tema):
+    if progreso_tema.fecha_inicio:
+        return []
+    progreso_tema.fecha_inicio = timezone.now()
+    progreso_tema.estado = 'INICIADO'
+    return ['fecha_inicio', 'estado']
+
+
+def _respuesta_conflicto():
+    """409 cuando otra petición cambió el mismo progreso en todos los reintentos."""
+    return Response(
+        {'error': 'El progreso cambió en otra petición, intenta de nuevo'},
+        status=status.HTTP_409_CONFLICT
+    )
 
-    return progreso_total / temas.count()
 
 class LeccionListView(APIView):
     """
     Vista para listar todas las lecciones disponibles.
     Endpoint: GET /api/lecciones/
+    Soporta GET condicional (If-None-Match / If-Modified-Since).
     """
     permission_classes = [IsAuthenticated]
    
     def get(self, request):
-        # OPTIMIZADO: Prefetch progresos para evitar N+1 queries
-        lecciones = Leccion.objects.filter(is_active=True).prefetch_related(
-            models.Prefetch(
-                'progreso_usuarios',
-                queryset=ProgresoLeccion.objects.filter(usuario=request.user),
-                to_attr='progreso_usuario'
-            )
-        ).order_by('orden')
+        validadores = validadores_lecciones(request.user)
+        no_modificada = respuesta_no_modificada(request, validadores)
+        if no_modificada is not None:
+            return no_modificada
 
-        # Obtener el progreso del usuario para cada lección
-        lecciones_data = []
-        for leccion in lecciones:
-            # Obtener progreso (ya está prefetched)
-            progreso = leccion.progreso_usuario[0] if leccion.progreso_usuario else None
+        # OPTIMIZADO: Una sola consulta con la cantidad de temas anotada
+        lecciones = lecciones_con_cantidad_temas()
 
-            serializer = LeccionListSerializer(leccion)
-            leccion_dict = serializer.data
+        # OPTIMIZADO: El progreso sale del snapshot en cache del usuario
+        snapshot = obtener_snapshot(request.user)
 
-            if progreso:
-                leccion_dict['progreso'] = {
-                    'estado': progreso.estado,
-                    'porcentaje_completado': float(progreso.porcentaje_completado)
-                }
-            else:
-                leccion_dict['progreso'] = {
-                    'estado': 'SIN_INICIAR',
-                    'porcentaje_completado': 0.0
-                }
-
-            lecciones_data.append(leccion_dict)
+        lecciones_data = LeccionListSerializer(lecciones, many=True).data
+        for leccion_dict in lecciones_data:
+            leccion_dict['progreso'] = dict(
+                snapshot['lecciones'].get(leccion_dict['id'], PROGRESO_LECCION_VACIO)
+            )
 
-        return Response(lecciones_data, status=status.HTTP_200_OK)
+        return agregar_validadores(
+            Response(lecciones_data, status=status.HTTP_200_OK), validadores
+        )
 
 
 
@@ -127,46 +142,67 @@ class LeccionDetailView(APIView):
     Vista para obtener el detalle de una lección y sus temas.
     Endpoint: GET /api/lecciones/<id>/
     FIX: Usa serializer actualizado que incluye progreso con contenidos_vistos.
+    Soporta GET condicional (If-None-Match / If-Modified-Since).
     """
     permission_classes = [IsAuthenticated]
    
     def get(self, request, leccion_id):
-        leccion = get_object_or_404(Leccion, id=leccion_id, is_active=True)
-       
-        # Crear o actualizar progreso de la lección
-        progreso_leccion, created = ProgresoLeccion.objects.get_or_create(
-            usuario=request.user,
-            leccion=leccion,
-            defaults={'estado': 'INICIADA', 'fecha_inicio': timezone.now()}
-        )
+        leccion = get_object_or_404(lecciones_con_version(), id=leccion_id, is_active=True)
+
+        validadores = validadores_leccion(request.user, leccion)
+        no_modificada = respuesta_no_modificada(request, validadores)
+        if no_modificada is not None:
+            return no_modificada
        
-        if created or progreso_leccion.estado == 'SIN_INICIAR':
-            progreso_leccion.estado = 'INICIADA'
-            if not progreso_leccion.fecha_inicio:
-                progreso_leccion.fecha_inicio = timezone.now()
-            progreso_leccion.save()
+        snapshot = obtener_snapshot(request.user)
+        progreso_modificado = False
+
+        # Crear o actualizar progreso de la lección (solo la primera visita)
+        progreso_snapshot = snapshot['lecciones'].get(leccion.id)
+        if progreso_snapshot is None or progreso_snapshot['estado'] == 'SIN_INICIAR':
+            progreso_leccion, created = ProgresoLeccion.objects.get_or_create(
+                usuario=request.user,
+                leccion=leccion,
+                defaults={'estado': 'INICIADA', 'fecha_inicio': timezone.now()}
+            )
+
+            try:
+                modificar(progreso_leccion, _iniciar_leccion)
+            except ConflictoConcurrencia:
+                return _respuesta_conflicto()
+            progreso_modificado = True
        
         # Desbloquear primer tema si no está desbloqueado
         primer_tema = leccion.temas.filter(is_active=True).order_by('orden').first()
-        if primer_tema:
+        if primer_tema and not snapshot['temas'].get(primer_tema.id, {}).get('desbloqueado'):
             progreso_primer_tema, _ = ProgresoTema.objects.get_or_create(
                 usuario=request.user,
                 tema=primer_tema
             )
-            if not progreso_primer_tema.desbloqueado:
-                progreso_primer_tema.desbloqueado = True
-                progreso_primer_tema.save()
+            try:
+                modificar(progreso_primer_tema, _desbloquear_tema)
+            except ConflictoConcurrencia:
+                return _respuesta_conflicto()
+            progreso_modificado = True
+
+        if progreso_modificado:
+            invalidar_snapshot(request.user)
+            snapshot = obtener_snapshot(request.user)
+            # La versión del progreso cambió: el ETag debe reflejarla
+            validadores = validadores_leccion(request.user, leccion)
        
         # Serializar con contexto para incluir progreso
-        serializer = LeccionDetailSerializer(leccion, context={'request': request})
+        serializer = LeccionDetailSerializer(
+            leccion,
+            context={'request': request, 'progreso': snapshot}
+        )
         leccion_data = serializer.data
        
-        leccion_data['progreso'] = {
-            'estado': progreso_leccion.estado,
-            'porcentaje_completado': float(progreso_leccion.porcentaje_completado)
-        }
+        leccion_data['progreso'] = dict(snapshot['lecciones'][leccion.id])
        
-        return Response(leccion_data, status=status.HTTP_200_OK)
+        return agregar_validadores(
+            Response(leccion_data, status=status.HTTP_200_OK), validadores
+        )
 
 
 
@@ -175,11 +211,17 @@ class TemaDetailView(APIView):
     """
     Vista para obtener el contenido completo de un tema.
     Endpoint: GET /api/temas/<id>/
+    Soporta GET condicional (If-None-Match / If-Modified-Since).
     """
     permission_classes = [IsAuthenticated]
    
     def get(self, request, tema_id):
         tema = get_object_or_404(Tema, id=tema_id, is_active=True)
+
+        validadores = validadores_tema(request.user, tema)
+        no_modificada = respuesta_no_modificada(request, validadores)
+        if no_modificada is not None:
+            return no_modificada
        
         # Verificar que el tema esté desbloqueado
         progreso_tema, created = ProgresoTema.objects.get_or_create(
@@ -194,54 +236,65 @@ class TemaDetailView(APIView):
             )
        
         # Actualizar estado si es necesario
-        if progreso_tema.estado == 'SIN_INICIAR':
-            progreso_tema.estado = 'INICIADO'
-            progreso_tema.fecha_inicio = timezone.now()
-            progreso_tema.save()
+        try:
+            iniciado = modificar(progreso_tema, _iniciar_tema)
+        except ConflictoConcurrencia:
+            return _respuesta_conflicto()
+        if iniciado:
+            invalidar_snapshot(request.user)
+            validadores = validadores_tema(request.user, tema)
        
-        # Serializar el tema
-        serializer = TemaDetailSerializer(tema)
-        tema_data = serializer.data
+        # Parte estática compartida: se serializa una vez por (tema, ejercicios visibles)
+        ejercicio_ids = ids_visibles_para_usuario(tema.id, request.user)
+        payload = payload_tema(tema, ejercicio_ids)
        
-        # Obtener respuestas previas
+        # Obtener respuestas previas del intento en curso
         respuestas_previas = RespuestaEjercicio.objects.filter(
-            usuario=request.user,
-            progreso_tema=progreso_tema
-        ).select_related('ejercicio')
+            progreso_tema=progreso_tema,
+            numero_intento=progreso_tema.intento_actual
+        ).values_list('ejercicio_id', 'respuesta_usuario', 'es_correcta', 'uso_ayuda')
        
         # Crear diccionario de ejercicios respondidos
         ejercicios_respondidos = {}
-        for respuesta in respuestas_previas:
-            ejercicios_respondidos[respuesta.ejercicio.id] = {
-                'respuesta': respuesta.respuesta_usuario,
-                'es_correcta': respuesta.es_correcta,
-                'uso_ayuda': respuesta.uso_ayuda
+        for ejercicio_id, respuesta_usuario, es_correcta, uso_ayuda in respuestas_previas:
+            ejercicios_respondidos[ejercicio_id] = {
+                'respuesta': respuesta_usuario,
+                'es_correcta': es_correcta,
+                'uso_ayuda': uso_ayuda
             }
        
         # Determinar índice del siguiente ejercicio sin responder
         siguiente_ejercicio_index = 0
-        for idx, ejercicio in enumerate(tema_data['ejercicios']):
-            if ejercicio['id'] not in ejercicios_respondidos:
+        for idx, ejercicio_id in enumerate(ejercicio_ids):
+            if ejercicio_id not in ejercicios_respondidos:
                 siguiente_ejercicio_index = idx
                 break
        
         # Si todos están respondidos, mantener en el primero
-        if len(ejercicios_respondidos) == len(tema_data['ejercicios']):
+        if len(ejercicios_respondidos) == len(ejercicio_ids):
             siguiente_ejercicio_index = 0
        
-        # Agregar información de progreso
-        tema_data['ejercicios_respondidos'] = ejercicios_respondidos
-        tema_data['siguiente_ejercicio_index'] = siguiente_ejercicio_index
-        tema_data['total_ejercicios_respondidos'] = len(ejercicios_respondidos)
-
-        # Agregar información de aprobación del tema
-        tema_data['progreso'] = {
-            'estado': progreso_tema.estado,
-            'porcentaje_acierto': float(progreso_tema.porcentaje_acierto) if progreso_tema.porcentaje_acierto else 0.0,
-            'aprobado': progreso_tema.estado == 'COMPLETADO',  # Tema aprobado si está completado
+        # Parte del usuario, que se agrega al payload compartido
+        datos_usuario = {
+            'ejercicios_respondidos': ejercicios_respondidos,
+            'siguiente_ejercicio_index': siguiente_ejercicio_index,
+            'total_ejercicios_respondidos': len(ejercicios_respondidos),
+            # Agregar información de aprobación del tema
+            'progreso': {
+                'estado': progreso_tema.estado,
+                'porcentaje_acierto': float(progreso_tema.porcentaje_acierto) if progreso_tema.porcentaje_acierto else 0.0,
+                'aprobado': progreso_tema.estado == 'COMPLETADO',  # Tema aprobado si está completado
+            },
         }
 
-        return Response(tema_data, status=status.HTTP_200_OK)
+        return agregar_validadores(
+            HttpResponse(
+                combinar(payload, datos_usuario),
+                content_type='application/json',
+                status=status.HTTP_200_OK
+            ),
+            validadores
+        )
 
 
 
@@ -257,7 +310,10 @@ class RegistrarContenidoVistoView(APIView):
    
     def post(self, request, contenido_id):
         try:
-            contenido = get_object_or_404(ContenidoTema, id=contenido_id)
+            contenido = get_object_or_404(
+                ContenidoTema.objects.select_related('tema__leccion'),
+                id=contenido_id
+            )
            
             # Obtener o crear progreso del tema
             progreso_tema, _ = ProgresoTema.objects.get_or_create(
@@ -274,28 +330,25 @@ class RegistrarContenidoVistoView(APIView):
             if contenido.tipo != 'EJEMPLO_EXTRA':
                 # Agregar a contenidos vistos (si no está ya)
                 progreso_tema.contenidos_vistos.add(contenido)
+                progreso_tema.tema = contenido.tema
                
                 # Calcular progreso
-                porcentaje_progreso = progreso_tema.calcular_progreso_contenido()
+                contenidos_vistos = progreso_tema.contenido_completado
+                porcentaje_progreso = progreso_tema.calcular_progreso_contenido(contenidos_vistos)
                 
-                # Actualizar progreso de la lección
-                progreso_leccion, _ = ProgresoLeccion.objects.get_or_create(
-                    usuario=request.user,
-                    leccion=contenido.tema.leccion
-                )
-                progreso_leccion.porcentaje_completado = calcular_porcentaje_leccion(
+                # Actualizar progreso de la lección (solo la diferencia de este tema)
+                progreso_leccion = actualizar_progreso_tema(
                     request.user,
-                    contenido.tema.leccion
+                    progreso_tema,
+                    contenidos_vistos
                 )
-                if progreso_leccion.estado == 'SIN_INICIAR':
-                    progreso_leccion.estado = 'EN_PROGRESO'
-                    progreso_leccion.fecha_inicio = timezone.now()
-                progreso_leccion.save()
+                modificar(progreso_leccion, _leccion_en_progreso)
+                invalidar_snapshot(request.user)
                
                 return Response({
                     'mensaje': 'Contenido registrado como visto',
                     'progreso_contenido': porcentaje_progreso,
-                    'contenidos_vistos': progreso_tema.contenido_completado,
+                    'contenidos_vistos': contenidos_vistos,
                     'contenidos_totales': progreso_tema.contenidos_count,
                     'porcentaje_leccion':float(progreso_leccion.porcentaje_completado)
                 }, status=status.HTTP_200_OK)
@@ -308,6 +361,8 @@ class RegistrarContenidoVistoView(APIView):
                     'contenidos_totales': progreso_tema.contenidos_count
                 }, status=status.HTTP_200_OK)
            
+        except ConflictoConcurrencia:
+            return _respuesta_conflicto()
         except Exception as e:
             return Response(
                 {'error': f'Error al registrar contenido: {str(e)}'},
@@ -342,10 +397,10 @@ class ValidarRespuestaView(APIView):
             uso_ayuda = serializer.validated_data.get('uso_ayuda', False)
             tiempo_respuesta = serializer.validated_data.get('tiempo_respuesta_segundos', 0)
            
-            # Obtener ejercicio
-            try:
-                ejercicio = Ejercicio.objects.get(id=ejercicio_id)
-            except Ejercicio.DoesNotExist:
+            # El ejercicio, sus claves y su retroalimentación salen del índice en
+            # memoria (lessons/indice_contenido.py), sin consultar la base
+            ejercicio = indice_contenido.ejercicio(ejercicio_id)
+            if ejercicio is None:
                 return Response(
                     {'error': 'Ejercicio no encontrado'},
                     status=status.HTTP_404_NOT_FOUND
@@ -354,7 +409,7 @@ class ValidarRespuestaView(APIView):
             # Obtener o crear progreso del tema
             progreso_tema, created = ProgresoTema.objects.get_or_create(
                 usuario=request.user,
-                tema=ejercicio.tema,
+                tema_id=ejercicio.tema_id,
                 defaults={
                     'desbloqueado': True,
                     'estado': 'INICIADO',
@@ -363,19 +418,17 @@ class ValidarRespuestaView(APIView):
             )
            
             # Si el progreso ya existía pero no tenía fecha de inicio, establecerla
-            if not created and not progreso_tema.fecha_inicio:
-                progreso_tema.fecha_inicio = timezone.now()
-                progreso_tema.estado = 'INICIADO'
-                progreso_tema.save()
+            if not created and modificar(progreso_tema, _fijar_inicio_tema):
+                invalidar_snapshot(request.user)
            
             # Validar respuesta
             es_correcta = ejercicio.validar_respuesta(respuesta_usuario)
            
-            # Verificar si ya existe una respuesta para este ejercicio en el progreso actual
+            # Verificar si ya existe una respuesta para este ejercicio en el intento actual
             respuesta_existente = RespuestaEjercicio.objects.filter(
-                usuario=request.user,
-                ejercicio=ejercicio,
-                progreso_tema=progreso_tema
+                progreso_tema=progreso_tema,
+                numero_intento=progreso_tema.intento_actual,
+                ejercicio_id=ejercicio.id
             ).first()
            
             if respuesta_existente:
@@ -394,13 +447,15 @@ class ValidarRespuestaView(APIView):
             # Registrar nueva respuesta
             RespuestaEjercicio.objects.create(
                 usuario=request.user,
-                ejercicio=ejercicio,
+                ejercicio_id=ejercicio.id,
                 progreso_tema=progreso_tema,
+                numero_intento=progreso_tema.intento_actual,
                 respuesta_usuario=respuesta_usuario,
                 es_correcta=es_correcta,
                 uso_ayuda=uso_ayuda,
                 tiempo_respuesta_segundos=tiempo_respuesta
             )
+            invalidar_snapshot(request.user)
            
             # Preparar respuesta
             response_data = {
@@ -415,17 +470,15 @@ class ValidarRespuestaView(APIView):
            
             return Response(response_data, status=status.HTTP_200_OK)
            
+        except ConflictoConcurrencia:
+            return _respuesta_conflicto()
         except Exception as e:
-            # Log del error para debugging
-            import traceback
-            print("=" * 80)
-            print("ERROR EN VALIDAR RESPUESTA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Ejercicio ID: {request.data.get('ejercicio_id')}")
-            print(f"Respuesta: {request.data.get('respuesta')}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception(
+                'Error al validar respuesta (usuario %s, ejercicio %s, respuesta %r)',
+                request.user.username,
+                request.data.get('ejercicio_id'),
+                request.data.get('respuesta')
+            )
            
             return Response(
                 {'error': f'Error al procesar respuesta: {str(e)}'},
@@ -439,94 +492,55 @@ class FinalizarTemaView(APIView):
     """
     Vista para finalizar un tema y calcular el progreso.
     Endpoint: POST /api/temas/<id>/finalizar/
+
+    Califica el intento en curso (ProgresoTema.intento_actual) y lo registra
+    como IntentoTema con ese mismo número. Finalizar otra vez sin reintentar
+    vuelve a calificar el mismo intento (ProgresoTema.intento_finalizado) en
+    lugar de contar uno nuevo. La respuesta trae numero_intento (intentos
+    finalizados, como antes) e intento_actual (el intento calificado).
+    Los contadores se guardan con un compare-and-swap sobre la versión de
+    ProgresoTema (ver tracking/concurrencia.py), sin bloquear la fila.
+    Responde 409 si la fila cambió en todos los reintentos.
     """
     permission_classes = [IsAuthenticated]
    
-    @transaction.atomic
     def post(self, request, tema_id):
         try:
             tema = get_object_or_404(Tema, id=tema_id, is_active=True)
 
-            # PROTECCIÓN: Bloquear progreso_tema para evitar race conditions
-            # select_for_update() bloquea el registro hasta que termine la transacción
-            try:
-                progreso_tema = ProgresoTema.objects.select_for_update().get(
-                    usuario=request.user,
-                    tema=tema
-                )
-            except ProgresoTema.DoesNotExist:
-                progreso_tema = ProgresoTema.objects.create(
-                    usuario=request.user,
-                    tema=tema,
-                    desbloqueado=True,
-                    estado='INICIADO',
-                    fecha_inicio=timezone.now()
-                )
-           
-            # Obtener todas las respuestas del usuario para este tema
-            respuestas = RespuestaEjercicio.objects.filter(
+            progreso_tema, _ = ProgresoTema.objects.get_or_create(
                 usuario=request.user,
-                progreso_tema=progreso_tema
+                tema=tema,
+                defaults={
+                    'desbloqueado': True,
+                    'estado': 'INICIADO',
+                    'fecha_inicio': timezone.now()
+                }
             )
+           
+            # MateLog-AE: Total de ejercicios según grupo del usuario
+            total_ejercicios = len(ids_visibles_para_usuario(tema.id, request.user))
 
-            # MateLog-AE: Calcular total de ejercicios según grupo del usuario
-            try:
-                perfil = request.user.perfil
-                grupo = perfil.grupo
-
-                if grupo == 'CONTROL':
-                    # Control: solo ejercicios obligatorios
-                    total_ejercicios = tema.ejercicios.filter(obligatorio=True).count()
-
-                elif grupo == 'EXPERIMENTAL':
-                    # Experimental: ejercicios basados en clasificación de autoeficacia
-                    clasificacion = perfil.clasificacion_autoeficacia
-                    ejercicios_query = tema.ejercicios.filter(obligatorio=True)
-
-                    if clasificacion == 'ALTO':
-                        ejercicios_adicionales = tema.ejercicios.filter(
-                            obligatorio=False,
-                            dificultad__in=['INTERMEDIO', 'DIFICIL']
-                        )
-                        total_ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().count()
-                    elif clasificacion == 'MEDIO':
-                        ejercicios_adicionales = tema.ejercicios.filter(
-                            obligatorio=False,
-                            dificultad='INTERMEDIO'
-                        )
-                        total_ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().count()
-                    elif clasificacion == 'BAJO':
-                        ejercicios_adicionales = tema.ejercicios.filter(
-                            obligatorio=False,
-                            dificultad__in=['FACIL', 'INTERMEDIO']
-                        )
-                        total_ejercicios = (ejercicios_query | ejercicios_adicionales).distinct().count()
-                    else:
-                        # Sin clasificación: solo obligatorios
-                        total_ejercicios = ejercicios_query.count()
-                else:
-                    # Sin grupo: todos los ejercicios
-                    total_ejercicios = tema.ejercicios.count()
-
-            except AttributeError:
-                # Usuario sin perfil: todos los ejercicios
-                total_ejercicios = tema.ejercicios.count()
-
-            # Calcular estadísticas
-            ejercicios_correctos = respuestas.filter(es_correcta=True).count()
-            ejercicios_incorrectos = respuestas.filter(es_correcta=False).count()
-            ejercicios_con_ayuda = respuestas.filter(uso_ayuda=True).count()
+            # Estadísticas del intento en una sola query
+            numero_intento = progreso_tema.intento_actual
+            estadisticas = RespuestaEjercicio.objects.filter(
+                progreso_tema=progreso_tema,
+                numero_intento=numero_intento
+            ).aggregate(
+                correctos=models.Count('id', filter=models.Q(es_correcta=True)),
+                incorrectos=models.Count('id', filter=models.Q(es_correcta=False)),
+                con_ayuda=models.Count('id', filter=models.Q(uso_ayuda=True)),
+                tiempo_total=models.Sum('tiempo_respuesta_segundos'),
+            )
+            ejercicios_correctos = estadisticas['correctos']
+            tiempo_total_segundos = estadisticas['tiempo_total'] or 0
            
             # Calcular porcentaje de aciertos
             if total_ejercicios > 0:
                 porcentaje_acierto = (ejercicios_correctos / total_ejercicios) * 100
             else:
                 porcentaje_acierto = 0
-           
-            # Calcular tiempos
-            tiempo_total_segundos = respuestas.aggregate(
-                total=models.Sum('tiempo_respuesta_segundos')
-            )['total'] or 0
+            porcentaje_acierto = Decimal(porcentaje_acierto).quantize(Decimal('0.01'))
            
             tiempo_promedio_por_ejercicio = (
                 tiempo_total_segundos // total_ejercicios if total_ejercicios > 0 else 0
@@ -535,65 +549,94 @@ class FinalizarTemaView(APIView):
             # Determinar si aprobó (80% o más)
             aprobado = porcentaje_acierto >= 80
            
-            # Incrementar contador de intentos
-            progreso_tema.intentos_realizados += 1
-           
-            # Actualizar progreso del tema
-            progreso_tema.porcentaje_acierto = porcentaje_acierto
-           
+            # Guardar la calificación y, si el intento no se había finalizado,
+            # contarlo; si otra petición se adelantó, se aplica sobre la fila
+            # releída (que dice si el intento ya quedó finalizado)
+            anterior = {}
+
+            def registrar_intento(progreso):
+                anterior['estado'] = progreso.estado
+                anterior['finalizado'] = progreso.intento_finalizado == numero_intento
+                campos = ['porcentaje_acierto']
+                progreso.porcentaje_acierto = porcentaje_acierto
+                if not anterior['finalizado']:
+                    progreso.intentos_realizados += 1
+                    progreso.intento_finalizado = numero_intento
+                    campos += ['intentos_realizados', 'intento_finalizado']
+                if aprobado:
+                    progreso.estado = 'COMPLETADO'
+                    progreso.fecha_completado = timezone.now()
+                    campos += ['estado', 'fecha_completado']
+                return campos
+
             siguiente_tema_id = None
             siguiente_tema_info = None
-           
-            if aprobado:
-                progreso_tema.estado = 'COMPLETADO'
-                progreso_tema.fecha_completado = timezone.now()
-               
-                # Desbloquear el siguiente tema
-                siguiente_tema = Tema.objects.filter(
-                    leccion=tema.leccion,
-                    orden=tema.orden + 1,
-                    is_active=True
-                ).first()
-               
-                if siguiente_tema:
-                    ProgresoTema.objects.get_or_create(
+
+            with transaction.atomic():
+                modificar(progreso_tema, registrar_intento)
+                completado_ahora = aprobado and anterior['estado'] != 'COMPLETADO'
+
+                if aprobado:
+                    # Desbloquear el siguiente tema (adyacencia del índice en memoria)
+                    siguiente_tema = indice_contenido.obtener_indice().siguiente_tema(tema.id)
+
+                    if siguiente_tema:
+                        progreso_siguiente, _ = ProgresoTema.objects.get_or_create(
+                            usuario=request.user,
+                            tema_id=siguiente_tema.id,
+                            defaults={'desbloqueado': True}
+                        )
+                        modificar(progreso_siguiente, _desbloquear_tema)
+                        siguiente_tema_id = siguiente_tema.id
+                        siguiente_tema_info = {
+                            'id': siguiente_tema.id,
+                            'titulo': siguiente_tema.titulo,
+                            'orden': siguiente_tema.orden
+                        }
+
+                # Registrar el intento (o recalificarlo si ya estaba finalizado;
+                # los finalizados antes de IntentoTema no tienen fila)
+                intento = None
+                if anterior['finalizado']:
+                    intento = IntentoTema.objects.filter(
+                        progreso_tema=progreso_tema,
+                        numero_intento=numero_intento
+                    ).first()
+                if intento is not None:
+                    intento.fecha_finalizacion = timezone.now()
+                else:
+                    intento = IntentoTema(
                         usuario=request.user,
-                        tema=siguiente_tema,
-                        defaults={'desbloqueado': True}
+                        tema=tema,
+                        progreso_tema=progreso_tema,
+                        numero_intento=numero_intento,
+                        fecha_inicio=progreso_tema.fecha_inicio or timezone.now(),
                     )
-                    siguiente_tema_id = siguiente_tema.id
-                    siguiente_tema_info = {
-                        'id': siguiente_tema.id,
-                        'titulo': siguiente_tema.titulo,
-                        'orden': siguiente_tema.orden
-                    }
-               
-                # Actualizar progreso de la lección
-                progreso_leccion, _ = ProgresoLeccion.objects.get_or_create(
-                    usuario=request.user,
-                    leccion=tema.leccion
+                intento.ejercicios_correctos = ejercicios_correctos
+                intento.ejercicios_incorrectos = estadisticas['incorrectos']
+                intento.ejercicios_totales = total_ejercicios
+                intento.porcentaje_acierto = porcentaje_acierto
+                intento.ejercicios_con_ayuda = estadisticas['con_ayuda']
+                intento.tiempo_total_segundos = tiempo_total_segundos
+                intento.tiempo_promedio_por_ejercicio = tiempo_promedio_por_ejercicio
+                intento.aprobado = aprobado
+                # La mejora se mide contra el último intento finalizado antes
+                # de este (los reintentos sin finalizar dejan huecos)
+                intento.calcular_mejora(
+                    IntentoTema.objects.filter(
+                        progreso_tema=progreso_tema,
+                        numero_intento__lt=numero_intento
+                    ).order_by('-numero_intento').values_list('porcentaje_acierto', flat=True).first()
                 )
-               
-                temas_totales = tema.leccion.temas.filter(is_active=True).count()
-                temas_completados = ProgresoTema.objects.filter(
-                    usuario=request.user,
-                    tema__leccion=tema.leccion,
-                    estado='COMPLETADO'
-                ).count()
-               
-                if temas_totales > 0:
-                    progreso_leccion.porcentaje_completado = calcular_porcentaje_leccion(
-                        request.user,
-                        tema.leccion
-                    )
-               
-                if temas_completados == temas_totales:
-                    progreso_leccion.estado = 'COMPLETADA'
-                    progreso_leccion.fecha_completado = timezone.now()
-               
-                progreso_leccion.save()
-           
-            progreso_tema.save()
+                intento.save()
+
+                # Actualizar progreso de la lección de forma incremental
+                actualizar_progreso_tema(
+                    request.user,
+                    progreso_tema,
+                    tema_completado=completado_ahora
+                )
+                invalidar_snapshot(request.user)
            
             return Response({
                 'aprobado': aprobado,
@@ -605,17 +648,16 @@ class FinalizarTemaView(APIView):
                 'siguiente_tema_id': siguiente_tema_id,
                 'siguiente_tema': siguiente_tema_info,
                 'numero_intento': progreso_tema.intentos_realizados,
+                'intento_actual': numero_intento,
             }, status=status.HTTP_200_OK)
            
+        except ConflictoConcurrencia:
+            return _respuesta_conflicto()
         except Exception as e:
-            import traceback
-            print("=" * 80)
-            print("ERROR EN FINALIZAR TEMA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Tema ID: {tema_id}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception(
+                'Error al finalizar tema (usuario %s, tema %s)',
+                request.user.username, tema_id
+            )
            
             return Response(
                 {'error': f'Error al finalizar tema: {str(e)}'},
@@ -649,33 +691,40 @@ class VolverAlTemaView(APIView):
 class ReintentarTemaView(APIView):
     """
     Vista para reintentar un tema.
-    Borra las respuestas del intento actual y resetea el progreso.
+    Abre un intento nuevo y resetea el progreso. Las respuestas de los
+    intentos anteriores se conservan (RespuestaEjercicio.numero_intento).
     Endpoint: POST /api/temas/<id>/reintentar/
     """
     permission_classes = [IsAuthenticated]
    
     def post(self, request, tema_id):
         try:
-            tema = get_object_or_404(Tema, id=tema_id, is_active=True)
+            tema = indice_contenido.tema(tema_id)
+            if tema is None or not tema.is_active:
+                return Response(
+                    {'error': 'Tema no encontrado'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
            
-            # Obtener progreso del tema
-            progreso_tema = get_object_or_404(
-                ProgresoTema,
+            # Un solo UPDATE: se abre el intento siguiente al que estaba en
+            # curso (aunque no se haya finalizado, para que sus respuestas no
+            # sigan visibles) y el estado vuelve a INICIADO.
+            # NO modificar intentos_realizados aquí, se incrementa en finalizar
+            actualizados = ProgresoTema.objects.filter(
                 usuario=request.user,
-                tema=tema
+                tema_id=tema.id
+            ).update(
+                intento_actual=models.F('intento_actual') + 1,
+                estado='INICIADO',
+                fecha_inicio=timezone.now(),
+                version=models.F('version') + 1
             )
-           
-            # Borrar todas las respuestas del intento actual
-            RespuestaEjercicio.objects.filter(
-                usuario=request.user,
-                progreso_tema=progreso_tema
-            ).delete()
-           
-            # Resetear estado del progreso (no incrementar intentos aún)
-            progreso_tema.estado = 'INICIADO'
-            progreso_tema.fecha_inicio = timezone.now()
-            # NO modificar intentos_realizados aquí, se incrementa en finalizar
-            progreso_tema.save()
+            if not actualizados:
+                return Response(
+                    {'error': 'No hay progreso en este tema'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            invalidar_snapshot(request.user)
            
             return Response({
                 'mensaje': 'Tema reiniciado correctamente',
@@ -683,14 +732,10 @@ class ReintentarTemaView(APIView):
             }, status=status.HTTP_200_OK)
            
         except Exception as e:
-            import traceback
-            print("=" * 80)
-            print("ERROR EN REINTENTAR TEMA:")
-            print(f"Usuario: {request.user.username}")
-            print(f"Tema ID: {tema_id}")
-            print(f"Error: {str(e)}")
-            print(traceback.format_exc())
-            print("=" * 80)
+            logger.exception(
+                'Error al reintentar tema (usuario %s, tema %s)',
+                request.user.username, tema_id
+            )
            
             return Response(
                 {'error': f'Error al reintentar tema: {str(e)}'},
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MatelogBackendConfig(AppConfig):
+    name = 'matelog_backend'
+    verbose_name = 'MateLog'
+
+    def ready(self):
+        from .conexiones import aplicar_pragmas_sqlite
+        connection_created.connect(aplicar_pragmas_sqlite, dispatch_uid='matelog_pragmas_sqlite')
@@ -0,0 +1,35 @@
+# matelog_backend/conexiones.py
+"""
+Ajustes por conexión a la base de datos.
+
+SQLite guarda casi toda su configuración por conexión, así que los PRAGMA
+de settings.SQLITE_PRAGMAS (WAL, busy_timeout, synchronous, cache y mmap)
+se aplican cada vez que Django abre una, con la señal connection_created.
+Con CONN_MAX_AGE las conexiones se reutilizan entre peticiones y el costo
+se paga una sola vez por conexión.
+
+Otros motores (Postgres) no se tocan.
+Medición: python benchmark_concurrencia_respuestas.py
+"""
+from django.conf import settings
+
+
+def aplicar_pragmas_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        for pragma, valor in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {valor}')
+
+
+def pragmas_actuales(connection):
+    """
+    {pragma: valor} leído de la conexión, para diagnóstico y pruebas. None
+    si SQLite no lo informa (p. ej. mmap_size en una base en memoria).
+    """
+    valores = {}
+    with connection.cursor() as cursor:
+        for pragma in settings.SQLITE_PRAGMAS:
+            fila = cursor.execute(f'PRAGMA {pragma}').fetchone()
+            valores[pragma] = fila[0] if fila else None
+    return valores
@@ -0,0 +1,34 @@
+# matelog_backend/pruebas.py
+"""
+Runner de `python manage.py test` (settings.TEST_RUNNER).
+
+Los tests limpian el cache con cache.clear() y cuentan consultas, así que
+corren siempre con cache en memoria del proceso, sin importar CACHE_URL.
+También insertan el tracking en la propia petición (sin el hilo de
+escritura diferida) para poder leer los registros apenas responde la vista.
+"""
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+AJUSTES_PRUEBAS = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'matelog-pruebas',
+        }
+    },
+    'TRACKING_ESCRITURA_DIFERIDA': False,
+}
+
+
+class RunnerPruebas(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._ajustes = override_settings(**AJUSTES_PRUEBAS)
+        self._ajustes.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._ajustes.disable()
+        super().teardown_test_environment(**kwargs)
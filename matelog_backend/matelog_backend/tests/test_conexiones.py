@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+from matelog_backend.conexiones import pragmas_actuales
+
+
+class PerfilConexionTestCase(TestCase):
+    def _conexion_nueva(self):
+        conexion = connections.create_connection('default')
+        conexion.ensure_connection()
+        self.addCleanup(conexion.close)
+        return conexion
+
+    def test_pragmas_al_abrir_conexion(self):
+        """Cada conexión SQLite sale con los PRAGMA del perfil"""
+        pragmas = pragmas_actuales(self._conexion_nueva())
+
+        self.assertEqual(pragmas['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(pragmas['synchronous'], 1)  # NORMAL
+        self.assertEqual(pragmas['cache_size'], settings.SQLITE_PRAGMAS['cache_size'])
+        self.assertEqual(pragmas['temp_store'], 2)  # MEMORY
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_sin_pragmas_deja_valores_de_sqlite(self):
+        with self._conexion_nueva().cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 2)  # FULL
+
+    def test_transacciones_inmediatas(self):
+        self.assertEqual(connection.settings_dict['OPTIONS'].get('transaction_mode'), 'IMMEDIATE')
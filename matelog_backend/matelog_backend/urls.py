@@ -23,9 +23,9 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, Sp
 
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     # Vistas personalizadas del admin de tracking (ANTES de admin.site.urls para que funcionen)
     path('admin/tracking/', include('tracking.admin_urls')),
+    path('admin/', admin.site.urls),
 
     # API endpoints
     path('api/users/', include('users.urls')),
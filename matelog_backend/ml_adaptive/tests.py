@@ -1,3 +1,74 @@
 from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from ml_adaptive.models import PerfilUsuario, RespuestaEscala
 
-# Create your tests here.
+
+class GuardarRespuestasEscalaTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.perfil = PerfilUsuario.objects.create(
+            user=self.usuario,
+            grupo='EXPERIMENTAL',
+            codigo_usado='EXP001'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def guardar_autoeficacia(self, respuesta):
+        return self.client.post('/api/ml-adaptive/autoeficacia/guardar/', {
+            'tipo': 'PRE',
+            'respuestas': [
+                {'pregunta_numero': numero, 'respuesta': respuesta}
+                for numero in range(1, 11)
+            ]
+        }, format='json')
+
+    def test_autoeficacia_en_un_solo_insert(self):
+        """Las 10 respuestas se guardan con una sola sentencia"""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.guardar_autoeficacia(4)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['clasificacion'], 'ALTO')
+
+        sentencias = [
+            q['sql'] for q in contexto.captured_queries
+            if 'ml_adaptive_respuestaescala' in q['sql']
+        ]
+        self.assertEqual(len(sentencias), 1)
+        self.assertEqual(RespuestaEscala.objects.filter(usuario=self.usuario).count(), 10)
+
+    def test_reenvio_actualiza_respuestas(self):
+        """Reenviar la escala actualiza las respuestas sin duplicarlas"""
+        self.guardar_autoeficacia(4)
+        self.guardar_autoeficacia(2)
+
+        respuestas = RespuestaEscala.objects.filter(
+            usuario=self.usuario, tipo_escala='AUTOEFICACIA_PRE'
+        )
+        self.assertEqual(respuestas.count(), 10)
+        self.assertEqual(set(respuestas.values_list('respuesta', flat=True)), {2})
+
+    def test_examen_guarda_correctas(self):
+        """El examen guarda 1/0 por pregunta y marca el perfil"""
+        response = self.client.post('/api/ml-adaptive/examen/guardar/', {
+            'tipo': 'DIAGNOSTICO',
+            'respuestas': [
+                {'pregunta_numero': 1, 'correcta': True},
+                {'pregunta_numero': 2, 'correcta': False},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            dict(RespuestaEscala.objects.filter(tipo_escala='DIAGNOSTICO')
+                 .values_list('pregunta_numero', 'respuesta')),
+            {1: 1, 2: 0}
+        )
+        self.perfil.refresh_from_db()
+        self.assertTrue(self.perfil.completo_diagnostico)
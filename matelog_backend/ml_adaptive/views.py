@@ -67,6 +67,29 @@ OPCIONES_AUTOEFICACIA = [
 ]
 
 
+def guardar_respuestas_escala(usuario, tipo_escala, respuestas):
+    """
+    Guarda {pregunta_numero: respuesta} de una escala o examen con un solo
+    INSERT ... ON CONFLICT DO UPDATE, sin importar cuántas preguntas sean.
+    Si la pregunta ya estaba respondida solo se actualiza la respuesta
+    (fecha_respuesta conserva la original, igual que update_or_create).
+    """
+    RespuestaEscala.objects.bulk_create(
+        [
+            RespuestaEscala(
+                usuario=usuario,
+                tipo_escala=tipo_escala,
+                pregunta_numero=pregunta_numero,
+                respuesta=respuesta
+            )
+            for pregunta_numero, respuesta in respuestas.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['usuario', 'tipo_escala', 'pregunta_numero'],
+        update_fields=['respuesta'],
+    )
+
+
 class ObtenerPreguntasAutoeficaciaView(APIView):
     """
     Vista para obtener las preguntas de la escala de autoeficacia.
@@ -131,14 +154,12 @@ class GuardarRespuestasAutoeficaciaView(APIView):
         # Determinar tipo de escala
         tipo_escala = 'AUTOEFICACIA_PRE' if tipo == 'PRE' else 'AUTOEFICACIA_POST'
 
-        # Guardar respuestas
-        for resp in respuestas:
-            RespuestaEscala.objects.update_or_create(
-                usuario=request.user,
-                tipo_escala=tipo_escala,
-                pregunta_numero=resp['pregunta_numero'],
-                defaults={'respuesta': resp['respuesta']}
-            )
+        # Guardar respuestas (un solo INSERT ... ON CONFLICT)
+        guardar_respuestas_escala(
+            request.user,
+            tipo_escala,
+            {resp['pregunta_numero']: resp['respuesta'] for resp in respuestas}
+        )
 
         # Calcular puntaje total (suma de todas las respuestas)
         puntaje_total = sum(r['respuesta'] for r in respuestas)
@@ -239,13 +260,14 @@ class GuardarRespuestasExamenView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Guardar respuestas (1 = correcta, 0 = incorrecta)
-        for resp in respuestas:
-            RespuestaEscala.objects.update_or_create(
-                usuario=request.user,
-                tipo_escala=tipo,
-                pregunta_numero=resp['pregunta_numero'],
-                defaults={'respuesta': 1 if resp.get('correcta', False) else 0}
-            )
+        guardar_respuestas_escala(
+            request.user,
+            tipo,
+            {
+                resp['pregunta_numero']: 1 if resp.get('correcta', False) else 0
+                for resp in respuestas
+            }
+        )
 
         # Calcular puntaje
         total_preguntas = len(respuestas)
@@ -387,8 +409,9 @@ class GuardarRespuestasExamenAbiertoView(APIView):
 
         resultados = []
         total_similitud = 0
+        respuestas_obj = {}
 
-        # Procesar cada respuesta
+        # Procesar cada respuesta (se valida todo antes de escribir)
         for resp in respuestas:
             pregunta_num = resp.get('pregunta_numero')
             respuesta_estudiante = resp.get('respuesta', '').strip()
@@ -417,19 +440,16 @@ class GuardarRespuestasExamenAbiertoView(APIView):
             # Determinar aprobación automática (70% de similitud o más)
             aprobada_auto = similitud >= 70.0
 
-            # Guardar en base de datos
-            respuesta_obj, created = RespuestaExamenAbierta.objects.update_or_create(
+            respuestas_obj[pregunta_num] = RespuestaExamenAbierta(
                 usuario=request.user,
                 tipo_examen='FINAL',
                 pregunta_numero=pregunta_num,
-                defaults={
-                    'pregunta_texto': pregunta_data['texto'],
-                    'respuesta_esperada': pregunta_data['respuesta_esperada'],
-                    'respuesta_estudiante': respuesta_estudiante,
-                    'similitud_automatica': similitud,
-                    'aprobada_automatica': aprobada_auto,
-                    'estado_revision': 'PENDIENTE' if not aprobada_auto else 'APROBADA'
-                }
+                pregunta_texto=pregunta_data['texto'],
+                respuesta_esperada=pregunta_data['respuesta_esperada'],
+                respuesta_estudiante=respuesta_estudiante,
+                similitud_automatica=similitud,
+                aprobada_automatica=aprobada_auto,
+                estado_revision='PENDIENTE' if not aprobada_auto else 'APROBADA'
             )
 
             resultados.append({
@@ -440,6 +460,18 @@ class GuardarRespuestasExamenAbiertoView(APIView):
 
             total_similitud += similitud
 
+        # Guardar en base de datos (un solo INSERT ... ON CONFLICT)
+        RespuestaExamenAbierta.objects.bulk_create(
+            list(respuestas_obj.values()),
+            update_conflicts=True,
+            unique_fields=['usuario', 'tipo_examen', 'pregunta_numero'],
+            update_fields=[
+                'pregunta_texto', 'respuesta_esperada', 'respuesta_estudiante',
+                'similitud_automatica', 'aprobada_automatica', 'estado_revision',
+                'fecha_modificacion'
+            ],
+        )
+
         # Calcular similitud promedio
         similitud_promedio = total_similitud / len(respuestas) if respuestas else 0
 
@@ -3,6 +3,7 @@
 
 
 from django.contrib import admin
+from django.db.models import Q
 from .models import (
     SesionEstudio,
     ProgresoLeccion,
@@ -13,10 +14,43 @@ from .models import (
     TiempoPantalla,  # NUEVO
     ClicBoton,       # NUEVO
 )
+from .exportacion import exportar_csv, fecha_hora, si_no, texto_o_vacio, etiqueta
+
+
+class TelemetriaAdminMixin:
+    """
+    Admin para modelos de telemetría, que pueden vivir en otra base
+    (tracking/routers.py) y no admiten JOIN con usuarios ni temas:
+    - las FK de list_display se cargan con prefetch_related (una consulta
+      por relación en su propia base) en lugar de select_related;
+    - search_fields del tipo 'usuario__username' se resuelven buscando
+      primero los ids en el modelo relacionado.
+    """
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        relaciones = [
+            campo.name for campo in self.model._meta.concrete_fields
+            if campo.many_to_one and campo.name in self.list_display
+        ]
+        return super().get_queryset(request).prefetch_related(*relaciones)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        filtro = Q()
+        for lookup in self.get_search_fields(request):
+            relacion, _, campo_remoto = lookup.partition('__')
+            campo = self.model._meta.get_field(relacion)
+            ids = campo.related_model._default_manager.filter(
+                **{f'{campo_remoto}__icontains': search_term}
+            ).values_list('pk', flat=True)
+            filtro |= Q(**{f'{campo.attname}__in': list(ids)})
+        return queryset.filter(filtro), False
 
 
 @admin.register(SesionEstudio)
-class SesionEstudioAdmin(admin.ModelAdmin):
+class SesionEstudioAdmin(TelemetriaAdminMixin, admin.ModelAdmin):
     list_display = ('usuario', 'fecha_inicio', 'fecha_fin', 'duracion_display', 'tipo_cierre')
     list_filter = ('fecha_inicio', 'tipo_cierre', 'usuario')
     search_fields = ('usuario__username',)
@@ -53,58 +87,17 @@ class SesionEstudioAdmin(admin.ModelAdmin):
         """
         Exporta las sesiones de estudio seleccionadas a CSV.
         Formato ACUMULATIVO: Una fila por sesión completa.
+        Se envía en streaming (ver tracking/exportacion.py).
         """
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        # Advertencia si hay muchos registros
-        total_registros = queryset.count()
-        if total_registros > 10000:
-            self.message_user(
-                request,
-                f"⚠️ Tienes {total_registros} sesiones seleccionadas. "
-                f"La exportación puede tardar 15-30 segundos. "
-                f"Considera usar filtros para reducir la cantidad.",
-                level='warning'
-            )
-
-        # Configurar respuesta HTTP
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="sesiones_estudio_{timestamp}.csv"'
-
-        # UTF-8 BOM para que Excel reconozca correctamente los caracteres especiales
-        response.write('\ufeff')
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Fecha Inicio',
-            'Fecha Fin',
-            'Duración (segundos)',
-            'Duración (minutos)',
-            'Tipo Cierre',
-            'Última Actividad'
-        ])
-
-        # Optimización: select_related para reducir consultas a la BD
-        queryset_optimizado = queryset.select_related('usuario')
-
-        # Exportar datos
-        for sesion in queryset_optimizado:
-            writer.writerow([
-                sesion.usuario.username,
-                sesion.fecha_inicio.strftime('%Y-%m-%d %H:%M:%S') if sesion.fecha_inicio else '',
-                sesion.fecha_fin.strftime('%Y-%m-%d %H:%M:%S') if sesion.fecha_fin else '',
-                sesion.duracion_segundos,
-                sesion.duracion_minutos,
-                sesion.get_tipo_cierre_display() if sesion.tipo_cierre else '',
-                sesion.ultima_actividad.strftime('%Y-%m-%d %H:%M:%S') if sesion.ultima_actividad else ''
-            ])
-
-        self.message_user(request, f'✅ Se exportaron {total_registros} sesiones correctamente.')
-        return response
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Fecha Inicio', 'fecha_inicio', fecha_hora),
+            ('Fecha Fin', 'fecha_fin', fecha_hora),
+            ('Duración (segundos)', 'duracion_segundos', None),
+            ('Duración (minutos)', 'duracion_minutos', None),
+            ('Tipo Cierre', 'tipo_cierre', etiqueta(SesionEstudio.TIPO_CIERRE_CHOICES)),
+            ('Última Actividad', 'ultima_actividad', fecha_hora),
+        ], 'sesiones_estudio')
 
     exportar_sesiones_csv.short_description = "📊 Exportar sesiones seleccionadas a CSV"
 
@@ -151,7 +144,7 @@ class ProgresoTemaAdmin(admin.ModelAdmin):
             'fields': ('usuario', 'tema', 'estado', 'desbloqueado')
         }),
         ('Progreso', {
-            'fields': ('porcentaje_acierto', 'intentos_realizados')
+            'fields': ('porcentaje_acierto', 'intentos_realizados', 'intento_actual', 'intento_finalizado')
         }),
         ('Fechas', {
             'fields': ('fecha_inicio', 'fecha_completado')
@@ -166,76 +159,26 @@ class ProgresoTemaAdmin(admin.ModelAdmin):
         Exporta el progreso de temas seleccionado a CSV.
         Formato ACUMULATIVO: Una fila por usuario/tema con contadores totales.
         Incluye tiempos acumulados y contadores de clics.
+        Se envía en streaming (ver tracking/exportacion.py).
         """
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        # Advertencia si hay muchos registros
-        total_registros = queryset.count()
-        if total_registros > 10000:
-            self.message_user(
-                request,
-                f"⚠️ Tienes {total_registros} registros de progreso seleccionados. "
-                f"La exportación puede tardar 15-30 segundos. "
-                f"Considera usar filtros para reducir la cantidad.",
-                level='warning'
-            )
-
-        # Configurar respuesta HTTP
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="progreso_tema_{timestamp}.csv"'
-
-        # UTF-8 BOM para Excel
-        response.write('\ufeff')
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Tema',
-            'Lección',
-            'Estado',
-            'Desbloqueado',
-            '% Acierto',
-            'Intentos Realizados',
-            'Tiempo Total Teoría (seg)',
-            'Tiempo Total Ejemplos (seg)',
-            'Clics Ver Otro Ejemplo',
-            'Clics Regresar',
-            'Clics Volver Tema',
-            'Clics Ir Ejercicios',
-            'Clics Ayuda',
-            'Fecha Inicio',
-            'Fecha Completado'
-        ])
-
-        # Optimización: select_related para reducir consultas
-        queryset_optimizado = queryset.select_related('usuario', 'tema', 'tema__leccion')
-
-        # Exportar datos
-        for progreso in queryset_optimizado:
-            writer.writerow([
-                progreso.usuario.username,
-                progreso.tema.titulo,
-                progreso.tema.leccion.titulo if progreso.tema.leccion else '',
-                progreso.get_estado_display(),
-                'Sí' if progreso.desbloqueado else 'No',
-                float(progreso.porcentaje_acierto),
-                progreso.intentos_realizados,
-                progreso.tiempo_total_teoria_segundos,
-                progreso.tiempo_total_ejemplos_segundos,
-                progreso.clics_ver_otro_ejemplo,
-                progreso.clics_regresar,
-                progreso.clics_volver_tema,
-                progreso.clics_ir_ejercicios,
-                progreso.clics_ayuda,
-                progreso.fecha_inicio.strftime('%Y-%m-%d %H:%M:%S') if progreso.fecha_inicio else '',
-                progreso.fecha_completado.strftime('%Y-%m-%d %H:%M:%S') if progreso.fecha_completado else ''
-            ])
-
-        self.message_user(request, f'✅ Se exportaron {total_registros} registros de progreso correctamente.')
-        return response
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Tema', 'tema__titulo', None),
+            ('Lección', 'tema__leccion__titulo', texto_o_vacio),
+            ('Estado', 'estado', etiqueta(ProgresoTema.ESTADO_CHOICES)),
+            ('Desbloqueado', 'desbloqueado', si_no),
+            ('% Acierto', 'porcentaje_acierto', float),
+            ('Intentos Realizados', 'intentos_realizados', None),
+            ('Tiempo Total Teoría (seg)', 'tiempo_total_teoria_segundos', None),
+            ('Tiempo Total Ejemplos (seg)', 'tiempo_total_ejemplos_segundos', None),
+            ('Clics Ver Otro Ejemplo', 'clics_ver_otro_ejemplo', None),
+            ('Clics Regresar', 'clics_regresar', None),
+            ('Clics Volver Tema', 'clics_volver_tema', None),
+            ('Clics Ir Ejercicios', 'clics_ir_ejercicios', None),
+            ('Clics Ayuda', 'clics_ayuda', None),
+            ('Fecha Inicio', 'fecha_inicio', fecha_hora),
+            ('Fecha Completado', 'fecha_completado', fecha_hora),
+        ], 'progreso_tema')
 
     exportar_progreso_tema_csv.short_description = "📊 Exportar progreso seleccionado a CSV (ACUMULATIVO)"
 
@@ -251,6 +194,7 @@ class RespuestaEjercicioAdmin(admin.ModelAdmin):
     list_display = (
         'usuario',
         'ejercicio_breve',
+        'numero_intento',
         'es_correcta',
         'uso_ayuda',
         'tiempo_respuesta_segundos',
@@ -272,67 +216,20 @@ class RespuestaEjercicioAdmin(admin.ModelAdmin):
         """
         Exporta las respuestas de ejercicios seleccionadas a CSV.
         Formato INDIVIDUAL: Una fila por cada respuesta registrada.
+        Se envía en streaming (ver tracking/exportacion.py).
         """
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        # Advertencia si hay muchos registros
-        total_registros = queryset.count()
-        if total_registros > 10000:
-            self.message_user(
-                request,
-                f"⚠️ Tienes {total_registros} respuestas seleccionadas. "
-                f"La exportación puede tardar 15-30 segundos. "
-                f"Considera usar filtros para reducir la cantidad.",
-                level='warning'
-            )
-
-        # Configurar respuesta HTTP
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="respuestas_ejercicios_{timestamp}.csv"'
-
-        # UTF-8 BOM para Excel
-        response.write('\ufeff')
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Ejercicio',
-            'Tema',
-            'Lección',
-            'Respuesta Usuario',
-            'Es Correcta',
-            'Usó Ayuda',
-            'Tiempo Respuesta (seg)',
-            'Fecha/Hora Respuesta'
-        ])
-
-        # Optimización: select_related para reducir consultas
-        queryset_optimizado = queryset.select_related(
-            'usuario',
-            'ejercicio',
-            'ejercicio__tema',
-            'ejercicio__tema__leccion'
-        )
-
-        # Exportar datos
-        for respuesta in queryset_optimizado:
-            writer.writerow([
-                respuesta.usuario.username,
-                respuesta.ejercicio.enunciado,
-                respuesta.ejercicio.tema.titulo if respuesta.ejercicio.tema else '',
-                respuesta.ejercicio.tema.leccion.titulo if respuesta.ejercicio.tema and respuesta.ejercicio.tema.leccion else '',
-                respuesta.respuesta_usuario,
-                'Sí' if respuesta.es_correcta else 'No',
-                'Sí' if respuesta.uso_ayuda else 'No',
-                respuesta.tiempo_respuesta_segundos,
-                respuesta.fecha_respuesta.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        self.message_user(request, f'✅ Se exportaron {total_registros} respuestas correctamente.')
-        return response
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Ejercicio', 'ejercicio__enunciado', None),
+            ('Tema', 'ejercicio__tema__titulo', texto_o_vacio),
+            ('Lección', 'ejercicio__tema__leccion__titulo', texto_o_vacio),
+            ('Intento', 'numero_intento', None),
+            ('Respuesta Usuario', 'respuesta_usuario', None),
+            ('Es Correcta', 'es_correcta', si_no),
+            ('Usó Ayuda', 'uso_ayuda', si_no),
+            ('Tiempo Respuesta (seg)', 'tiempo_respuesta_segundos', None),
+            ('Fecha/Hora Respuesta', 'fecha_respuesta', fecha_hora),
+        ], 'respuestas_ejercicios')
 
     exportar_respuestas_csv.short_description = "📊 Exportar respuestas seleccionadas a CSV (INDIVIDUAL)"
 
@@ -458,45 +355,25 @@ class IntentoTemaAdmin(admin.ModelAdmin):
     actions = ['exportar_intentos_csv']
    
     def exportar_intentos_csv(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-       
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="intentos_temas.csv"'
-       
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Tema',
-            'Número Intento',
-            'Porcentaje Acierto',
-            'Aprobado',
-            'Correctos',
-            'Incorrectos',
-            'Con Ayuda',
-            'Tiempo Total (seg)',
-            'Tiempo Promedio (seg)',
-            'Mejora %',
-            'Fecha Finalización'
-        ])
-       
-        for intento in queryset:
-            writer.writerow([
-                intento.usuario.username,
-                intento.tema.titulo,
-                intento.numero_intento,
-                intento.porcentaje_acierto,
-                'Sí' if intento.aprobado else 'No',
-                intento.ejercicios_correctos,
-                intento.ejercicios_incorrectos,
-                intento.ejercicios_con_ayuda,
-                intento.tiempo_total_segundos,
-                intento.tiempo_promedio_por_ejercicio,
-                intento.mejora_porcentaje or 0,
-                intento.fecha_finalizacion.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-       
-        return response
+        """
+        Exporta los intentos de temas seleccionados a CSV.
+        Se envía en streaming (ver tracking/exportacion.py); conserva el
+        formato de siempre de este archivo: intentos_temas.csv, sin BOM.
+        """
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Tema', 'tema__titulo', None),
+            ('Número Intento', 'numero_intento', None),
+            ('Porcentaje Acierto', 'porcentaje_acierto', None),
+            ('Aprobado', 'aprobado', si_no),
+            ('Correctos', 'ejercicios_correctos', None),
+            ('Incorrectos', 'ejercicios_incorrectos', None),
+            ('Con Ayuda', 'ejercicios_con_ayuda', None),
+            ('Tiempo Total (seg)', 'tiempo_total_segundos', None),
+            ('Tiempo Promedio (seg)', 'tiempo_promedio_por_ejercicio', None),
+            ('Mejora %', 'mejora_porcentaje', lambda mejora: mejora or 0),
+            ('Fecha Finalización', 'fecha_finalizacion', fecha_hora),
+        ], 'intentos_temas', bom=False, con_fecha=False)
    
     exportar_intentos_csv.short_description = "Exportar intentos seleccionados a CSV"
 
@@ -504,7 +381,7 @@ class IntentoTemaAdmin(admin.ModelAdmin):
 # ==================== NUEVOS MODELOS DE TRACKING ====================
 
 @admin.register(TiempoPantalla)
-class TiempoPantallaAdmin(admin.ModelAdmin):
+class TiempoPantallaAdmin(TelemetriaAdminMixin, admin.ModelAdmin):
     """
     Admin para TiempoPantalla - Eventos individuales de tiempo en pantalla.
     Muestra registros individuales, pero las vistas matriciales se implementarán como vistas personalizadas.
@@ -553,74 +430,27 @@ class TiempoPantallaAdmin(admin.ModelAdmin):
         """
         Exporta los registros de tiempo en pantalla seleccionados a CSV.
         Formato INDIVIDUAL: Una fila por cada evento de tiempo registrado.
+        Se envía en streaming (ver tracking/exportacion.py).
         """
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        # Advertencia si hay muchos registros
-        total_registros = queryset.count()
-        if total_registros > 10000:
-            self.message_user(
-                request,
-                f"⚠️ Tienes {total_registros} eventos de tiempo seleccionados. "
-                f"La exportación puede tardar 15-30 segundos. "
-                f"Considera usar filtros para reducir la cantidad.",
-                level='warning'
-            )
-
-        # Configurar respuesta HTTP
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="tiempo_pantalla_{timestamp}.csv"'
-
-        # UTF-8 BOM para Excel
-        response.write('\ufeff')
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Tema',
-            'Lección',
-            'Tipo Contenido',
-            'Número',
-            'Nombre Completo',
-            'Tiempo (seg)',
-            'Cambió Pestaña',
-            'Fecha/Hora'
-        ])
-
-        # Optimización: select_related para reducir consultas
-        queryset_optimizado = queryset.select_related(
-            'usuario',
-            'tema',
-            'tema__leccion',
-            'contenido',
-            'ejercicio'
-        )
-
-        # Exportar datos
-        for tiempo in queryset_optimizado:
-            writer.writerow([
-                tiempo.usuario.username,
-                tiempo.tema.titulo,
-                tiempo.tema.leccion.titulo if tiempo.tema.leccion else '',
-                tiempo.get_tipo_contenido_display(),
-                tiempo.numero,
-                tiempo.nombre_completo,
-                tiempo.tiempo_segundos,
-                'Sí' if tiempo.cambio_pestana else 'No',
-                tiempo.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        self.message_user(request, f'✅ Se exportaron {total_registros} eventos de tiempo correctamente.')
-        return response
+        tipo_contenido = etiqueta(TiempoPantalla.TIPO_CONTENIDO_CHOICES)
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Tema', 'tema__titulo', None),
+            ('Lección', 'tema__leccion__titulo', texto_o_vacio),
+            ('Tipo Contenido', 'tipo_contenido', tipo_contenido),
+            ('Número', 'numero', None),
+            ('Nombre Completo', ('tipo_contenido', 'numero'),
+             lambda tipo, numero: f"{tipo_contenido(tipo)} {numero}"),
+            ('Tiempo (seg)', 'tiempo_segundos', None),
+            ('Cambió Pestaña', 'cambio_pestana', si_no),
+            ('Fecha/Hora', 'timestamp', fecha_hora),
+        ], 'tiempo_pantalla')
 
     exportar_tiempo_pantalla_csv.short_description = "📊 Exportar tiempos seleccionados a CSV (INDIVIDUAL)"
 
 
 @admin.register(ClicBoton)
-class ClicBotonAdmin(admin.ModelAdmin):
+class ClicBotonAdmin(TelemetriaAdminMixin, admin.ModelAdmin):
     """
     Admin para ClicBoton - Eventos individuales de clics en botones.
     Muestra registros individuales, pero las vistas matriciales se implementarán como vistas personalizadas.
@@ -658,58 +488,15 @@ class ClicBotonAdmin(admin.ModelAdmin):
         """
         Exporta los clics en botones seleccionados a CSV.
         Formato INDIVIDUAL: Una fila por cada clic registrado.
+        Se envía en streaming (ver tracking/exportacion.py).
         """
-        import csv
-        from django.http import HttpResponse
-        from datetime import datetime
-
-        # Advertencia si hay muchos registros
-        total_registros = queryset.count()
-        if total_registros > 10000:
-            self.message_user(
-                request,
-                f"⚠️ Tienes {total_registros} clics seleccionados. "
-                f"La exportación puede tardar 15-30 segundos. "
-                f"Considera usar filtros para reducir la cantidad.",
-                level='warning'
-            )
-
-        # Configurar respuesta HTTP
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="clics_botones_{timestamp}.csv"'
-
-        # UTF-8 BOM para Excel
-        response.write('\ufeff')
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Usuario',
-            'Tema',
-            'Lección',
-            'Tipo de Botón',
-            'Fecha/Hora'
-        ])
-
-        # Optimización: select_related para reducir consultas
-        queryset_optimizado = queryset.select_related(
-            'usuario',
-            'tema',
-            'tema__leccion'
-        )
-
-        # Exportar datos
-        for clic in queryset_optimizado:
-            writer.writerow([
-                clic.usuario.username,
-                clic.tema.titulo if clic.tema else '',
-                clic.tema.leccion.titulo if clic.tema and clic.tema.leccion else '',
-                clic.get_tipo_boton_display(),
-                clic.timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-
-        self.message_user(request, f'✅ Se exportaron {total_registros} clics correctamente.')
-        return response
+        return exportar_csv(queryset, [
+            ('Usuario', 'usuario__username', None),
+            ('Tema', 'tema__titulo', texto_o_vacio),
+            ('Lección', 'tema__leccion__titulo', texto_o_vacio),
+            ('Tipo de Botón', 'tipo_boton', etiqueta(ClicBoton.TIPO_BOTON_CHOICES)),
+            ('Fecha/Hora', 'timestamp', fecha_hora),
+        ], 'clics_botones')
 
     exportar_clics_csv.short_description = "📊 Exportar clics seleccionados a CSV (INDIVIDUAL)"
 
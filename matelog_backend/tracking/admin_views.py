@@ -1,130 +1,211 @@
 # tracking/admin_views.py
 # Vistas personalizadas para el admin de tracking con visualización matricial
 
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.db.models import Sum, Count
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from lessons.models import Tema
 from .models import TiempoPantalla, ClicBoton
 import csv
 
-User = get_user_model()
 
+def _clave_resumen(prefijo, tema_id):
+    return f"{prefijo}:{tema_id or 'todos'}"
 
-@staff_member_required
-def resumen_tiempos_view(request):
+
+def _con_username(agregados, orden):
     """
-    Vista matricial de tiempo por pantalla.
-    Muestra: Usuario | Teoría 1 | Teoría 2 | Ejemplo 1 | ... | Total
+    La telemetría puede estar en otra base (tracking/routers.py), así que se
+    agrupa por usuario_id y los nombres se traen con una sola consulta.
+    Agrega 'username' a cada fila y las ordena por (username, *orden).
     """
-    # Obtener tema seleccionado del filtro
-    tema_id = request.GET.get('tema')
-    exportar = request.GET.get('exportar')
+    agregados = list(agregados)
+    nombres = dict(
+        get_user_model().objects
+        .filter(id__in={item['usuario_id'] for item in agregados})
+        .values_list('id', 'username')
+    ) if agregados else {}
+    for item in agregados:
+        item['username'] = nombres.get(item['usuario_id'], f"usuario {item['usuario_id']}")
+    agregados.sort(key=lambda item: (item['username'], *(item[campo] for campo in orden)))
+    return agregados
+
+
+def matriz_tiempos(tema_id=None):
+    """
+    Construye la matriz usuario x contenido de tiempos por pantalla.
 
-    # Obtener todos los temas para el dropdown
-    temas = Tema.objects.all().order_by('leccion__orden', 'orden')
+    Una sola consulta agrupada por (usuario, tipo_contenido, numero), más
+    una para los nombres de usuario, se pivotea en memoria; los totales por
+    fila y por columna se acumulan en la misma pasada. El resultado se guarda
+    en cache por filtro de tema durante RESUMEN_ADMIN_TIMEOUT segundos.
+    """
+    clave = _clave_resumen('resumen_tiempos', tema_id)
+    matriz = cache.get(clave)
+    if matriz is not None:
+        return matriz
 
-    # Construir query base
     tiempos_query = TiempoPantalla.objects.all()
-
     if tema_id:
         tiempos_query = tiempos_query.filter(tema_id=tema_id)
-        tema_seleccionado = Tema.objects.get(id=tema_id)
-    else:
-        tema_seleccionado = None
 
-    # Obtener estructura de contenidos del tema seleccionado
-    contenidos_estructura = []
-    if tema_seleccionado:
-        # Obtener todos los registros del tema para saber qué contenidos existen
-        contenidos_distintos = (
-            tiempos_query
-            .values('tipo_contenido', 'numero')
-            .distinct()
-            .order_by('tipo_contenido', 'numero')
-        )
+    agregados = _con_username(
+        tiempos_query
+        .values('usuario_id', 'tipo_contenido', 'numero')
+        .annotate(tiempo_total=Sum('tiempo_segundos'))
+        .order_by(),
+        orden=('tipo_contenido', 'numero')
+    )
 
-        for item in contenidos_distintos:
-            tipo = item['tipo_contenido']
-            numero = item['numero']
-            tipo_display = dict(TiempoPantalla.TIPO_CONTENIDO_CHOICES)[tipo]
+    # La estructura de columnas solo se muestra con un tema seleccionado
+    contenidos_estructura = []
+    if tema_id:
+        nombres_tipo = dict(TiempoPantalla.TIPO_CONTENIDO_CHOICES)
+        columnas = sorted({(item['tipo_contenido'], item['numero']) for item in agregados})
+        for tipo, numero in columnas:
             contenidos_estructura.append({
                 'tipo': tipo,
                 'numero': numero,
-                'nombre': f"{tipo_display} {numero}"
+                'nombre': f"{nombres_tipo[tipo]} {numero}"
             })
+    indice_columna = {
+        f"{contenido['tipo']}_{contenido['numero']}": posicion
+        for posicion, contenido in enumerate(contenidos_estructura)
+    }
 
-    # Obtener datos agregados por usuario
-    datos_usuarios = []
-    usuarios = User.objects.filter(tiempos_pantalla__in=tiempos_query).distinct()
-
-    for usuario in usuarios:
-        fila = {
-            'usuario': usuario.username,
-            'contenidos': {},
-            'contenidos_lista': [],  # Lista ordenada para el template
-            'total': 0
-        }
-
-        # Obtener tiempo por cada tipo de contenido
-        tiempos_usuario = (
-            tiempos_query
-            .filter(usuario=usuario)
-            .values('tipo_contenido', 'numero')
-            .annotate(tiempo_total=Sum('tiempo_segundos'))
-        )
+    filas = {}
+    totales_lista = [0] * len(contenidos_estructura)
+    for item in agregados:
+        username = item['username']
+        fila = filas.get(username)
+        if fila is None:
+            fila = filas[username] = {
+                'usuario': username,
+                'contenidos': {},
+                'contenidos_lista': [0] * len(contenidos_estructura),
+                'total': 0
+            }
+        key = f"{item['tipo_contenido']}_{item['numero']}"
+        segundos = item['tiempo_total'] or 0
+        fila['contenidos'][key] = fila['contenidos'].get(key, 0) + segundos
+        fila['total'] += segundos
+
+        posicion = indice_columna.get(key)
+        if posicion is not None:
+            fila['contenidos_lista'][posicion] += segundos
+            totales_lista[posicion] += segundos
+
+    totales_columnas = dict(zip(indice_columna, totales_lista))
+    matriz = {
+        'contenidos_estructura': contenidos_estructura,
+        'datos_usuarios': list(filas.values()),
+        'totales_columnas': totales_columnas,
+        'totales_lista': totales_lista,
+        'total_general': sum(totales_lista),
+    }
+    cache.set(clave, matriz, settings.RESUMEN_ADMIN_TIMEOUT)
+    return matriz
 
-        for tiempo in tiempos_usuario:
-            key = f"{tiempo['tipo_contenido']}_{tiempo['numero']}"
-            segundos = tiempo['tiempo_total']
-            fila['contenidos'][key] = segundos
-            fila['total'] += segundos
 
-        # Crear lista ordenada de contenidos para el template
-        for contenido in contenidos_estructura:
-            key = f"{contenido['tipo']}_{contenido['numero']}"
-            fila['contenidos_lista'].append(fila['contenidos'].get(key, 0))
+def matriz_clics(tema_id=None):
+    """
+    Construye la matriz usuario x tipo de botón de clics.
 
-        datos_usuarios.append(fila)
+    Igual que matriz_tiempos: una consulta agrupada por (usuario, tipo_boton),
+    pivote en memoria y cache por filtro de tema.
+    """
+    clave = _clave_resumen('resumen_clics', tema_id)
+    matriz = cache.get(clave)
+    if matriz is not None:
+        return matriz
 
-    # Calcular totales por columna
-    totales_columnas = {}
-    totales_lista = []  # Lista ordenada para el template
-    total_general = 0
+    clics_query = ClicBoton.objects.all()
+    if tema_id:
+        clics_query = clics_query.filter(tema_id=tema_id)
 
-    for contenido in contenidos_estructura:
-        key = f"{contenido['tipo']}_{contenido['numero']}"
-        total_col = sum(
-            usuario['contenidos'].get(key, 0)
-            for usuario in datos_usuarios
-        )
-        totales_columnas[key] = total_col
-        totales_lista.append(total_col)
-        total_general += total_col
+    agregados = _con_username(
+        clics_query
+        .values('usuario_id', 'tipo_boton')
+        .annotate(cantidad=Count('id'))
+        .order_by(),
+        orden=('tipo_boton',)
+    )
+
+    indice_columna = {
+        tipo_key: posicion
+        for posicion, (tipo_key, tipo_display) in enumerate(ClicBoton.TIPO_BOTON_CHOICES)
+    }
+
+    filas = {}
+    totales_lista = [0] * len(indice_columna)
+    for item in agregados:
+        username = item['username']
+        fila = filas.get(username)
+        if fila is None:
+            fila = filas[username] = {
+                'usuario': username,
+                'botones': {},
+                'botones_lista': [0] * len(indice_columna),
+                'total': 0
+            }
+        tipo = item['tipo_boton']
+        cantidad = item['cantidad']
+        fila['botones'][tipo] = cantidad
+        fila['total'] += cantidad
+
+        posicion = indice_columna.get(tipo)
+        if posicion is not None:
+            fila['botones_lista'][posicion] = cantidad
+            totales_lista[posicion] += cantidad
+
+    totales_columnas = dict(zip(indice_columna, totales_lista))
+    matriz = {
+        'datos_usuarios': list(filas.values()),
+        'totales_columnas': totales_columnas,
+        'totales_lista': totales_lista,
+        'total_general': sum(totales_lista),
+    }
+    cache.set(clave, matriz, settings.RESUMEN_ADMIN_TIMEOUT)
+    return matriz
+
+
+@staff_member_required
+def resumen_tiempos_view(request):
+    """
+    Vista matricial de tiempo por pantalla.
+    Muestra: Usuario | Teoría 1 | Teoría 2 | Ejemplo 1 | ... | Total
+    """
+    # Obtener tema seleccionado del filtro
+    tema_id = request.GET.get('tema')
+    exportar = request.GET.get('exportar')
+
+    # Obtener todos los temas para el dropdown
+    temas = Tema.objects.all().order_by('leccion__orden', 'orden')
+
+    tema_seleccionado = Tema.objects.get(id=tema_id) if tema_id else None
+    matriz = matriz_tiempos(tema_seleccionado.id if tema_seleccionado else None)
 
     # Manejar exportación
     if exportar == 'csv':
         return exportar_tiempos_csv(
-            datos_usuarios, contenidos_estructura, totales_columnas,
-            total_general, tema_seleccionado
+            matriz['datos_usuarios'], matriz['contenidos_estructura'],
+            matriz['totales_columnas'], matriz['total_general'], tema_seleccionado
         )
     elif exportar == 'excel':
         return exportar_tiempos_excel(
-            datos_usuarios, contenidos_estructura, totales_columnas,
-            total_general, tema_seleccionado
+            matriz['datos_usuarios'], matriz['contenidos_estructura'],
+            matriz['totales_columnas'], matriz['total_general'], tema_seleccionado
         )
 
     context = {
         'title': 'Resumen de Tiempos por Pantalla',
         'temas': temas,
         'tema_seleccionado': tema_seleccionado,
-        'contenidos_estructura': contenidos_estructura,
-        'datos_usuarios': datos_usuarios,
-        'totales_columnas': totales_columnas,
-        'totales_lista': totales_lista,
-        'total_general': total_general,
+        **matriz,
     }
 
     return render(request, 'admin/tracking/resumen_tiempos.html', context)
@@ -143,74 +224,22 @@ def resumen_clics_view(request):
     # Obtener todos los temas para el dropdown
     temas = Tema.objects.all().order_by('leccion__orden', 'orden')
 
-    # Construir query base
-    clics_query = ClicBoton.objects.all()
-
-    if tema_id:
-        clics_query = clics_query.filter(tema_id=tema_id)
-        tema_seleccionado = Tema.objects.get(id=tema_id)
-    else:
-        tema_seleccionado = None
+    tema_seleccionado = Tema.objects.get(id=tema_id) if tema_id else None
+    matriz = matriz_clics(tema_seleccionado.id if tema_seleccionado else None)
 
     # Tipos de botones (siempre los mismos 5)
     tipos_botones = ClicBoton.TIPO_BOTON_CHOICES
 
-    # Obtener datos agregados por usuario
-    datos_usuarios = []
-    usuarios = User.objects.filter(clics_botones__in=clics_query).distinct()
-
-    for usuario in usuarios:
-        fila = {
-            'usuario': usuario.username,
-            'botones': {},
-            'botones_lista': [],  # Lista ordenada para el template
-            'total': 0
-        }
-
-        # Obtener clics por cada tipo de botón
-        clics_usuario = (
-            clics_query
-            .filter(usuario=usuario)
-            .values('tipo_boton')
-            .annotate(cantidad=Count('id'))
-        )
-
-        for clic in clics_usuario:
-            tipo = clic['tipo_boton']
-            cantidad = clic['cantidad']
-            fila['botones'][tipo] = cantidad
-            fila['total'] += cantidad
-
-        # Crear lista ordenada de botones para el template
-        for tipo_key, tipo_display in tipos_botones:
-            fila['botones_lista'].append(fila['botones'].get(tipo_key, 0))
-
-        datos_usuarios.append(fila)
-
-    # Calcular totales por columna
-    totales_columnas = {}
-    totales_lista = []  # Lista ordenada para el template
-    total_general = 0
-
-    for tipo_key, tipo_display in tipos_botones:
-        total_col = sum(
-            usuario['botones'].get(tipo_key, 0)
-            for usuario in datos_usuarios
-        )
-        totales_columnas[tipo_key] = total_col
-        totales_lista.append(total_col)
-        total_general += total_col
-
     # Manejar exportación
     if exportar == 'csv':
         return exportar_clics_csv(
-            datos_usuarios, tipos_botones, totales_columnas,
-            total_general, tema_seleccionado
+            matriz['datos_usuarios'], tipos_botones, matriz['totales_columnas'],
+            matriz['total_general'], tema_seleccionado
         )
     elif exportar == 'excel':
         return exportar_clics_excel(
-            datos_usuarios, tipos_botones, totales_columnas,
-            total_general, tema_seleccionado
+            matriz['datos_usuarios'], tipos_botones, matriz['totales_columnas'],
+            matriz['total_general'], tema_seleccionado
         )
 
     context = {
@@ -218,10 +247,7 @@ def resumen_clics_view(request):
         'temas': temas,
         'tema_seleccionado': tema_seleccionado,
         'tipos_botones': tipos_botones,
-        'datos_usuarios': datos_usuarios,
-        'totales_columnas': totales_columnas,
-        'totales_lista': totales_lista,
-        'total_general': total_general,
+        **matriz,
     }
 
     return render(request, 'admin/tracking/resumen_clics.html', context)
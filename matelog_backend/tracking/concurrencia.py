@@ -0,0 +1,74 @@
+# tracking/concurrencia.py
+"""
+Concurrencia optimista para ProgresoTema y ProgresoLeccion.
+
+Cada fila tiene un campo `version`. Quien modifica el estado de la fila
+(estado, fechas, porcentaje, intentos, desbloqueo, aportes) lo hace con un
+compare-and-swap:
+
+    UPDATE ... SET <campos>, version = version + 1
+    WHERE id = <id> AND version = <versión leída>
+
+Si otra petición escribió antes, el UPDATE no afecta filas: se relee la fila
+y se vuelve a calcular el cambio sobre el estado nuevo, hasta MAX_REINTENTOS
+veces. Nadie bloquea la fila mientras calcula (select_for_update no hace nada
+en SQLite) y solo se escriben los campos que cambian, así que dos escritores
+no se pisan campos ajenos.
+
+Los contadores agregados de ProgresoTema (tiempos y clics de tracking) solo
+se modifican con incrementos F() conmutativos (incrementar_agregados) y
+ningún compare-and-swap los escribe, así que no incrementan la versión.
+"""
+from django.db import models
+
+
+MAX_REINTENTOS = 5
+
+
+class ConflictoConcurrencia(Exception):
+    """Otra escritura se adelantó en cada uno de los reintentos."""
+
+    def __init__(self, instancia):
+        self.instancia = instancia
+        super().__init__(
+            f'{type(instancia).__name__} {instancia.pk} cambió en otra petición '
+            f'{MAX_REINTENTOS} veces seguidas'
+        )
+
+
+def guardar_con_version(instancia, campos):
+    """
+    Guarda `campos` de la instancia solo si la fila sigue en instancia.version.
+    Devuelve True si se aplicó (y avanza instancia.version), False si otra
+    escritura se adelantó.
+    """
+    actualizados = type(instancia).objects.filter(
+        pk=instancia.pk,
+        version=instancia.version
+    ).update(
+        version=models.F('version') + 1,
+        **{campo: getattr(instancia, campo) for campo in campos}
+    )
+    if actualizados:
+        instancia.version += 1
+    return bool(actualizados)
+
+
+def modificar(instancia, cambios):
+    """
+    Aplica cambios(instancia) con compare-and-swap. `cambios` modifica la
+    instancia en memoria a partir de su estado actual y devuelve los campos
+    que tocó (vacío si no hay nada que cambiar). Si la fila cambió mientras
+    tanto, se relee y se vuelve a llamar a `cambios`.
+
+    Devuelve True si escribió y False si no había cambios. Lanza
+    ConflictoConcurrencia si se agotan los reintentos.
+    """
+    for _ in range(MAX_REINTENTOS):
+        campos = cambios(instancia)
+        if not campos:
+            return False
+        if guardar_con_version(instancia, campos):
+            return True
+        instancia.refresh_from_db()
+    raise ConflictoConcurrencia(instancia)
@@ -0,0 +1,213 @@
+# tracking/escritura_diferida.py
+"""
+Escritura diferida (write-behind) de los registros de tracking.
+
+TiempoPantalla, ClicBoton y EventoTracking solo se agregan y nunca se leen
+en el camino del estudiante, así que no hace falta insertarlos dentro de la
+petición. guardar() los deja en una cola acotada del proceso y un hilo de
+fondo los inserta con bulk_create cada TRACKING_LOTE_ESCRITURA registros o
+cada TRACKING_INTERVALO_ESCRITURA_MS milisegundos, lo que ocurra primero.
+
+- Contrapresión: si la cola está llena, guardar() espera hasta
+  TRACKING_ESPERA_COLA_LLENA_MS; si sigue llena, inserta en la propia
+  petición (más lento, pero no se pierde nada).
+- Cierre: al terminar el proceso (atexit) se detiene el hilo y se escribe lo
+  que quede en la cola.
+- Errores: si un lote falla se reintenta fila por fila; solo se descartan
+  las filas que fallan solas (p. ej. un tema borrado).
+- Contadores: estadisticas() devuelve encolados, escritos, descartados,
+  sincronos (escritos en la petición) y lotes.
+
+Con TRACKING_ESCRITURA_DIFERIDA = False (el caso de los tests, ver
+matelog_backend/pruebas.py) guardar() inserta de inmediato, así que los
+registros se pueden leer al volver.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, router, transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def _insertar(instancias):
+    """
+    bulk_create agrupando por modelo, en una transacción por base de datos
+    (la telemetría puede tener la suya, ver tracking/routers.py). Devuelve
+    la cantidad insertada.
+    """
+    por_base = defaultdict(lambda: defaultdict(list))
+    for instancia in instancias:
+        modelo = type(instancia)
+        por_base[router.db_for_write(modelo)][modelo].append(instancia)
+    for alias, por_modelo in por_base.items():
+        with transaction.atomic(using=alias):
+            for modelo, filas in por_modelo.items():
+                modelo.objects.using(alias).bulk_create(filas)
+    return len(instancias)
+
+
+class EscritorDiferido:
+    """
+    Cola acotada más un hilo que la vacía con bulk_create. Con
+    iniciar_hilo=False nadie la vacía salvo vaciar() o detener().
+    """
+
+    def __init__(self, maximo=10000, lote=200, intervalo_ms=500, espera_ms=50, iniciar_hilo=True):
+        self.iniciar_hilo = iniciar_hilo
+        self.lote = lote
+        self.intervalo = intervalo_ms / 1000
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue(maxsize=maximo)
+        self._hilo = None
+        self._pid = None
+        self._detener = threading.Event()
+        self._candado = threading.Lock()
+        self._contadores = dict.fromkeys(
+            ('encolados', 'escritos', 'descartados', 'sincronos', 'lotes'), 0
+        )
+
+    # ---------- API ----------
+
+    def encolar(self, instancias):
+        """Deja las instancias (sin guardar) para el próximo lote."""
+        if self.iniciar_hilo:
+            self._asegurar_hilo()
+        pendientes = list(instancias)
+        for posicion, instancia in enumerate(pendientes):
+            try:
+                self._cola.put(instancia, timeout=self.espera)
+            except queue.Full:
+                # Contrapresión agotada: el resto se escribe en esta petición
+                resto = pendientes[posicion:]
+                self._escribir(resto, contador='sincronos')
+                break
+            self._sumar('encolados', 1)
+
+    def vaciar(self):
+        """Escribe en el hilo actual todo lo que haya en la cola."""
+        while True:
+            lote = self._tomar(esperar=False)
+            if not lote:
+                return
+            self._escribir(lote)
+
+    def detener(self, timeout=5):
+        """Detiene el hilo y escribe lo pendiente."""
+        self._detener.set()
+        hilo = self._hilo
+        if hilo is not None and hilo.is_alive() and self._pid == os.getpid():
+            hilo.join(timeout)
+        self.vaciar()
+
+    def estadisticas(self):
+        with self._candado:
+            datos = dict(self._contadores)
+        datos['en_cola'] = self._cola.qsize()
+        return datos
+
+    # ---------- Interno ----------
+
+    def _sumar(self, contador, cantidad):
+        with self._candado:
+            self._contadores[contador] += cantidad
+
+    def _asegurar_hilo(self):
+        # Tras un fork (p. ej. gunicorn --preload) el hilo del padre no existe en el hijo
+        if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+            return
+        with self._candado:
+            if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+                return
+            self._detener.clear()
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(
+                target=self._ejecutar, name='tracking-escritura-diferida', daemon=True
+            )
+            self._hilo.start()
+
+    def _tomar(self, esperar=True):
+        """Hasta `lote` instancias; espera como mucho el intervalo si se pide."""
+        lote = []
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.lote:
+            try:
+                if esperar:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    lote.append(self._cola.get(timeout=restante))
+                else:
+                    lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _ejecutar(self):
+        while not self._detener.is_set():
+            lote = self._tomar()
+            if lote:
+                close_old_connections()
+                self._escribir(lote)
+        close_old_connections()
+
+    def _escribir(self, instancias, contador='escritos'):
+        try:
+            self._sumar(contador, _insertar(instancias))
+            self._sumar('lotes', 1)
+            return
+        except Exception:
+            logger.exception('Falló el lote de %d registros de tracking; se reintenta por fila', len(instancias))
+
+        for instancia in instancias:
+            try:
+                self._sumar(contador, _insertar([instancia]))
+            except Exception:
+                logger.exception('Se descarta un registro de tracking: %r', instancia)
+                self._sumar('descartados', 1)
+
+
+_escritor = None
+_candado_global = threading.Lock()
+
+
+def obtener_escritor():
+    """Escritor del proceso, creado con la configuración de settings."""
+    global _escritor
+    if _escritor is None:
+        with _candado_global:
+            if _escritor is None:
+                _escritor = EscritorDiferido(
+                    maximo=settings.TRACKING_BUFFER_MAXIMO,
+                    lote=settings.TRACKING_LOTE_ESCRITURA,
+                    intervalo_ms=settings.TRACKING_INTERVALO_ESCRITURA_MS,
+                    espera_ms=settings.TRACKING_ESPERA_COLA_LLENA_MS,
+                )
+                atexit.register(_escritor.detener)
+    return _escritor
+
+
+def guardar(instancias):
+    """
+    Guarda registros de tracking nuevos: en diferido si está activado, o de
+    inmediato con bulk_create si no.
+    """
+    instancias = list(instancias)
+    if not instancias:
+        return
+    if settings.TRACKING_ESCRITURA_DIFERIDA:
+        obtener_escritor().encolar(instancias)
+    else:
+        _insertar(instancias)
+
+
+def estadisticas():
+    """Contadores del escritor de este proceso (vacío si nunca se usó)."""
+    return _escritor.estadisticas() if _escritor is not None else {}
@@ -0,0 +1,175 @@
+# tracking/exportacion.py
+"""
+Motor de exportación CSV en streaming para las acciones del admin de tracking.
+
+En lugar de construir todo el archivo en memoria con HttpResponse, cada
+exportación declara sus columnas y el motor:
+- lee solo los campos necesarios con values_list (tuplas, no instancias),
+- recorre la query con iterator(chunk_size=...) para no cargarla completa,
+- envía el CSV por bloques con StreamingHttpResponse, de modo que la
+  descarga empieza de inmediato y la memoria se mantiene constante.
+
+Cada columna es (encabezado, campos, formato):
+- campos: nombre de campo (admite lookups 'usuario__username') o tupla de campos
+- formato: función opcional que recibe el/los valores y devuelve el texto
+
+Los lookups que cruzan a otra base de datos (p. ej. 'usuario__username' de
+la telemetría, ver tracking/routers.py) no pueden resolverse con un JOIN:
+se lee la llave foránea y el valor se busca con una consulta pk__in por
+relación y por bloque.
+"""
+import csv
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import router
+from django.http import StreamingHttpResponse
+
+
+# Filas que se leen de la BD por viaje y que se envían por bloque
+TAMANO_BLOQUE = 2000
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def fecha_hora(valor):
+    return valor.strftime('%Y-%m-%d %H:%M:%S') if valor else ''
+
+
+def si_no(valor):
+    return 'Sí' if valor else 'No'
+
+
+def texto_o_vacio(valor):
+    return '' if valor is None else valor
+
+
+def etiqueta(choices):
+    """Formato que muestra la etiqueta de un campo con choices (get_FOO_display)."""
+    etiquetas = dict(choices)
+    return lambda valor: etiquetas.get(valor, valor) if valor else ''
+
+
+def _campos_remotos(queryset, campos):
+    """
+    Lookups cuyo primer tramo es una FK a un modelo de otra base de datos.
+    Devuelve {campo: (campo FK, resto del lookup)}.
+    """
+    remotos = {}
+    for campo in campos:
+        relacion, _, resto = campo.partition('__')
+        if not resto:
+            continue
+        try:
+            campo_modelo = queryset.model._meta.get_field(relacion)
+        except FieldDoesNotExist:
+            continue
+        if campo_modelo.many_to_one and router.db_for_read(campo_modelo.related_model) != queryset.db:
+            remotos[campo] = (campo_modelo, resto)
+    return remotos
+
+
+def _resolver_remotos(filas, posiciones, remotos):
+    """
+    Agrega a cada fila del bloque el valor de cada campo remoto (en el orden
+    de `remotos`), con una consulta por relación.
+    """
+    restos_por_fk = defaultdict(list)
+    for campo_modelo, resto in remotos.values():
+        if resto not in restos_por_fk[campo_modelo]:
+            restos_por_fk[campo_modelo].append(resto)
+
+    valores = {}
+    for campo_modelo, restos in restos_por_fk.items():
+        posicion = posiciones[campo_modelo.attname]
+        ids = {fila[posicion] for fila in filas if fila[posicion] is not None}
+        encontrados = campo_modelo.related_model._default_manager.filter(
+            pk__in=ids
+        ).values_list('pk', *restos)
+        for pk, *datos in encontrados:
+            for resto, dato in zip(restos, datos):
+                valores[(campo_modelo.attname, resto, pk)] = dato
+
+    return [
+        fila + tuple(
+            valores.get((campo_modelo.attname, resto, fila[posiciones[campo_modelo.attname]]))
+            for campo_modelo, resto in remotos.values()
+        )
+        for fila in filas
+    ]
+
+
+def _filas_csv(queryset, columnas, bom=True):
+    campos = []
+    for _, campos_columna, _ in columnas:
+        for campo in (campos_columna if isinstance(campos_columna, tuple) else (campos_columna,)):
+            if campo not in campos:
+                campos.append(campo)
+
+    # Los campos remotos se leen como su FK y se agregan al final de cada
+    # fila al resolverlos por bloque
+    remotos = _campos_remotos(queryset, campos)
+    consulta = [campo for campo in campos if campo not in remotos]
+    for campo_modelo, _ in remotos.values():
+        if campo_modelo.attname not in consulta:
+            consulta.append(campo_modelo.attname)
+    posiciones = {campo: posicion for posicion, campo in enumerate(consulta)}
+    for posicion, campo in enumerate(remotos, start=len(consulta)):
+        posiciones[campo] = posicion
+
+    # Por columna: índices de sus campos dentro de cada fila
+    extractores = []
+    for _, campos_columna, formato in columnas:
+        if not isinstance(campos_columna, tuple):
+            campos_columna = (campos_columna,)
+        extractores.append((tuple(posiciones[campo] for campo in campos_columna), formato))
+
+    writer = csv.writer(_Eco())
+    encabezados = writer.writerow([encabezado for encabezado, _, _ in columnas])
+    # UTF-8 BOM para que Excel reconozca correctamente los caracteres especiales
+    bloque = ['\ufeff' + encabezados if bom else encabezados]
+
+    filas = queryset.values_list(*consulta).iterator(chunk_size=TAMANO_BLOQUE)
+    while True:
+        lote = list(islice(filas, TAMANO_BLOQUE))
+        if not lote:
+            break
+        if remotos:
+            lote = _resolver_remotos(lote, posiciones, remotos)
+        for fila in lote:
+            valores = []
+            for indices, formato in extractores:
+                argumentos = [fila[i] for i in indices]
+                valores.append(formato(*argumentos) if formato else argumentos[0])
+            bloque.append(writer.writerow(valores))
+        yield ''.join(bloque)
+        bloque = []
+
+    if bloque:
+        yield ''.join(bloque)
+
+
+def exportar_csv(queryset, columnas, prefijo_archivo, bom=True, con_fecha=True):
+    """
+    Devuelve un StreamingHttpResponse con el CSV de queryset según columnas.
+    El archivo se llama <prefijo_archivo>_<AAAAMMDD_HHMMSS>.csv, o
+    <prefijo_archivo>.csv con con_fecha=False. Con bom=False el archivo no
+    empieza con el BOM de UTF-8.
+    """
+    response = StreamingHttpResponse(
+        _filas_csv(queryset, columnas, bom),
+        content_type='text/csv; charset=utf-8'
+    )
+    if con_fecha:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        nombre = f'{prefijo_archivo}_{timestamp}.csv'
+    else:
+        nombre = f'{prefijo_archivo}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return response
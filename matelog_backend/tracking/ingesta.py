@@ -0,0 +1,160 @@
+# tracking/ingesta.py
+"""
+Ingesta rápida de tracking con vistas de Django simples (sin DRF).
+
+Clics, tiempos de pantalla y heartbeats de sesión son las peticiones más
+frecuentes durante una clase. Sus equivalentes en tracking/views.py pasan
+por todo APIView (negociación de contenido, render de Response, historial
+del throttle y un serializer para tres o cuatro escalares). Estas vistas:
+
+- usan la misma sesión de Django (AuthenticationMiddleware) y conservan la
+  protección CSRF del middleware;
+- parsean el JSON una sola vez y validan contra las choices de los modelos;
+- resuelven tema/contenido/ejercicio con el índice en memoria;
+- dejan clics y tiempos en la escritura diferida (tracking/escritura_diferida.py);
+- responden 204 sin cuerpo, o {"error": ...} con 400/403/404.
+
+Mismo contrato de entrada que las vistas DRF, bajo /api/tracking/ingesta/.
+Medición: python benchmark_ingesta_tracking.py
+"""
+import json
+from functools import wraps
+
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from lessons import indice_contenido
+from .models import SesionEstudio, TiempoPantalla, ClicBoton
+from . import escritura_diferida
+
+
+TIPOS_BOTON = frozenset(dict(ClicBoton.TIPO_BOTON_CHOICES))
+TIPOS_CONTENIDO = frozenset(dict(TiempoPantalla.TIPO_CONTENIDO_CHOICES))
+
+
+def _error(mensaje, status=400):
+    return JsonResponse({'error': mensaje}, status=status)
+
+
+def _sin_contenido():
+    return HttpResponse(status=204)
+
+
+def _entero(datos, campo, requerido=True):
+    """
+    Entero >= 0 de datos[campo]. Devuelve (valor, error); valor es None si
+    el campo es opcional y no viene.
+    """
+    valor = datos.get(campo)
+    if valor is None or valor == '':
+        return None, (f'Se requiere {campo}' if requerido else None)
+    if isinstance(valor, bool):
+        return None, f'{campo} debe ser un entero'
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return None, f'{campo} debe ser un entero'
+    if valor < 0:
+        return None, f'{campo} no puede ser negativo'
+    return valor, None
+
+
+def vista_ingesta(vista):
+    """
+    POST autenticado con cuerpo JSON. La vista recibe (request, datos) con
+    el objeto ya parseado.
+    """
+    @require_POST
+    @wraps(vista)
+    def envoltura(request):
+        if not request.user.is_authenticated:
+            return _error('Se requiere autenticación', status=403)
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError:
+            return _error('El cuerpo debe ser JSON válido')
+        if not isinstance(datos, dict):
+            return _error('El cuerpo debe ser un objeto JSON')
+        return vista(request, datos)
+    return envoltura
+
+
+@vista_ingesta
+def registrar_clic_boton(request, datos):
+    """
+    Endpoint: POST /api/tracking/ingesta/clic-boton/
+    Body: {"tipo_boton": "REGRESAR", "tema_id": 1}  (tema_id opcional)
+    """
+    tipo_boton = datos.get('tipo_boton')
+    if tipo_boton not in TIPOS_BOTON:
+        return _error(f'tipo_boton debe ser uno de: {", ".join(sorted(TIPOS_BOTON))}')
+
+    tema_id, error = _entero(datos, 'tema_id', requerido=False)
+    if error:
+        return _error(error)
+    if tema_id is not None and indice_contenido.tema(tema_id) is None:
+        return _error('Tema no encontrado', status=404)
+
+    escritura_diferida.guardar([
+        ClicBoton(usuario_id=request.user.id, tema_id=tema_id, tipo_boton=tipo_boton)
+    ])
+    return _sin_contenido()
+
+
+@vista_ingesta
+def registrar_tiempo_pantalla(request, datos):
+    """
+    Endpoint: POST /api/tracking/ingesta/tiempo-pantalla/
+    Body: mismo formato que /api/tracking/tiempo-pantalla/
+    """
+    tipo_contenido = datos.get('tipo_contenido')
+    if tipo_contenido not in TIPOS_CONTENIDO:
+        return _error(f'tipo_contenido debe ser uno de: {", ".join(sorted(TIPOS_CONTENIDO))}')
+
+    valores = {}
+    for campo, requerido in (
+        ('tema_id', True), ('numero', True), ('tiempo_segundos', True),
+        ('contenido_id', False), ('ejercicio_id', False),
+    ):
+        valores[campo], error = _entero(datos, campo, requerido)
+        if error:
+            return _error(error)
+
+    if indice_contenido.tema(valores['tema_id']) is None:
+        return _error('Tema no encontrado', status=404)
+    if valores['contenido_id'] and indice_contenido.contenido(valores['contenido_id']) is None:
+        return _error('Contenido no encontrado', status=404)
+    if valores['ejercicio_id'] and indice_contenido.ejercicio(valores['ejercicio_id']) is None:
+        return _error('Ejercicio no encontrado', status=404)
+
+    escritura_diferida.guardar([TiempoPantalla(
+        usuario_id=request.user.id,
+        tema_id=valores['tema_id'],
+        contenido_id=valores['contenido_id'] or None,
+        ejercicio_id=valores['ejercicio_id'] or None,
+        tipo_contenido=tipo_contenido,
+        numero=valores['numero'],
+        tiempo_segundos=valores['tiempo_segundos'],
+        cambio_pestana=datos.get('cambio_pestana') is True,
+    )])
+    return _sin_contenido()
+
+
+@vista_ingesta
+def actualizar_actividad_sesion(request, datos):
+    """
+    Heartbeat de sesión con un solo UPDATE.
+    Endpoint: POST /api/tracking/ingesta/sesion/actividad/
+    Body: {"sesion_id": 1}
+    """
+    sesion_id, error = _entero(datos, 'sesion_id')
+    if error:
+        return _error(error)
+
+    actualizadas = SesionEstudio.objects.filter(
+        id=sesion_id, usuario_id=request.user.id
+    ).update(ultima_actividad=timezone.now())
+    if not actualizadas:
+        return _error('Sesión no encontrada', status=404)
+    return _sin_contenido()
@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+
+from tracking.models import SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla, ClicBoton
+from tracking.routers import ALIAS_TRACKING, base_separada
+
+
+MODELOS = (SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla, ClicBoton)
+
+
+@contextmanager
+def _sin_fechas_automaticas(modelo):
+    """Conserva las fechas originales: auto_now_add las pisaría al insertar."""
+    campos = [campo for campo in modelo._meta.concrete_fields if getattr(campo, 'auto_now_add', False)]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia la telemetría histórica de la base default a la base de tracking '
+        '(ver tracking/routers.py). Conserva los ids y solo copia filas con id mayor '
+        'al último ya copiado, así que se puede repetir'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=2000,
+            help='Filas por bulk_create (2000 por defecto)',
+        )
+
+    def handle(self, *args, **options):
+        if not base_separada():
+            raise CommandError("No hay base 'tracking' en DATABASES (TRACKING_DATABASE_URL)")
+
+        tablas_origen = set(connections['default'].introspection.table_names())
+        lote = options['lote']
+
+        self.stdout.write("=" * 80)
+        for modelo in MODELOS:
+            nombre = modelo._meta.verbose_name_plural
+            if modelo._meta.db_table not in tablas_origen:
+                self.stdout.write(f"{nombre:<28}{'sin tabla en default':>24}")
+                continue
+
+            ultimo = modelo.objects.using(ALIAS_TRACKING).aggregate(ultimo=Max('pk'))['ultimo'] or 0
+            origen = modelo.objects.using('default').filter(pk__gt=ultimo).order_by('pk')
+            copiadas = 0
+            pendientes = []
+            with _sin_fechas_automaticas(modelo), transaction.atomic(using=ALIAS_TRACKING):
+                for fila in origen.iterator(chunk_size=lote):
+                    pendientes.append(fila)
+                    if len(pendientes) >= lote:
+                        modelo.objects.using(ALIAS_TRACKING).bulk_create(pendientes)
+                        copiadas += len(pendientes)
+                        pendientes = []
+                if pendientes:
+                    modelo.objects.using(ALIAS_TRACKING).bulk_create(pendientes)
+                    copiadas += len(pendientes)
+            self.stdout.write(f"{nombre:<28}{copiadas:>24}")
+
+        # Con ids explícitos, Postgres necesita reajustar las secuencias
+        conexion = connections[ALIAS_TRACKING]
+        with conexion.cursor() as cursor:
+            for sql in conexion.ops.sequence_reset_sql(no_style(), MODELOS):
+                cursor.execute(sql)
+
+        self.stdout.write("=" * 80)
+        self.stdout.write(self.style.SUCCESS('>>> Telemetría copiada'))
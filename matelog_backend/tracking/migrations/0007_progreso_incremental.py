@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:23
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def poblar_progreso(apps, schema_editor):
+    """Calcula progreso_total y suma_progreso_temas para los datos existentes."""
+    ProgresoTema = apps.get_model('tracking', 'ProgresoTema')
+    ProgresoLeccion = apps.get_model('tracking', 'ProgresoLeccion')
+    Tema = apps.get_model('lessons', 'Tema')
+    centesima = Decimal('0.01')
+
+    progresos = ProgresoTema.objects.select_related('tema').annotate(
+        vistos=Count('contenidos_vistos', filter=~Q(contenidos_vistos__tipo='EJEMPLO_EXTRA'))
+    )
+    sumas = {}
+    for progreso in progresos:
+        totales = progreso.tema.contenidos_contables
+        contenido = Decimal(progreso.vistos) * 100 / totales if totales else Decimal('0')
+        aporte = (contenido * Decimal('0.5') + Decimal(progreso.porcentaje_acierto or 0) * Decimal('0.5')).quantize(centesima)
+        ProgresoTema.objects.filter(pk=progreso.pk).update(progreso_total=aporte)
+        if progreso.tema.is_active:
+            clave = (progreso.usuario_id, progreso.tema.leccion_id)
+            sumas[clave] = sumas.get(clave, Decimal('0')) + aporte
+
+    temas_por_leccion = dict(
+        Tema.objects.filter(is_active=True).values('leccion_id')
+        .annotate(total=Count('id')).values_list('leccion_id', 'total')
+    )
+    for progreso in ProgresoLeccion.objects.all():
+        suma = sumas.get((progreso.usuario_id, progreso.leccion_id), Decimal('0'))
+        total_temas = temas_por_leccion.get(progreso.leccion_id, 0)
+        ProgresoLeccion.objects.filter(pk=progreso.pk).update(
+            suma_progreso_temas=suma,
+            porcentaje_completado=(suma / total_temas).quantize(centesima) if total_temas else Decimal('0')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0006_actividadpantalla_tracking_ac_usuario_c25fac_idx_and_more'),
+        ('lessons', '0004_tema_contadores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progresoleccion',
+            name='suma_progreso_temas',
+            field=models.DecimalField(decimal_places=2, default=0.0, help_text='Suma de ProgresoTema.progreso_total de los temas de la lección (ver lessons/progreso.py)', max_digits=7),
+        ),
+        migrations.AddField(
+            model_name='progresotema',
+            name='progreso_total',
+            field=models.DecimalField(decimal_places=2, default=0.0, help_text='Aporte del tema al progreso de la lección: contenido 50% + ejercicios 50%', max_digits=5),
+        ),
+        migrations.RunPython(poblar_progreso, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0007_version_contenido'),
+        ('tracking', '0007_progreso_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='actividadpantalla',
+            name='usuario',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='actividades_pantalla', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='clicboton',
+            name='tema',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Tema relacionado (null si es navegación global)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='clics_botones', to='lessons.tema'),
+        ),
+        migrations.AlterField(
+            model_name='clicboton',
+            name='usuario',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='clics_botones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='eventotracking',
+            name='tema',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='eventos_tracking', to='lessons.tema'),
+        ),
+        migrations.AlterField(
+            model_name='eventotracking',
+            name='usuario',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='eventos_tracking', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='sesionestudio',
+            name='usuario',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sesiones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tiempopantalla',
+            name='contenido',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Referencia al contenido específico (Teoría o Ejemplo)', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tiempos_registrados', to='lessons.contenidotema'),
+        ),
+        migrations.AlterField(
+            model_name='tiempopantalla',
+            name='ejercicio',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Referencia al ejercicio específico', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tiempos_registrados', to='lessons.ejercicio'),
+        ),
+        migrations.AlterField(
+            model_name='tiempopantalla',
+            name='tema',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tiempos_pantalla', to='lessons.tema'),
+        ),
+        migrations.AlterField(
+            model_name='tiempopantalla',
+            name='usuario',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='tiempos_pantalla', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0008_referencias_blandas_telemetria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progresoleccion',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Se incrementa en cada escritura; ver tracking/concurrencia.py'),
+        ),
+        migrations.AddField(
+            model_name='progresotema',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Se incrementa en cada escritura salvo los contadores agregados; ver tracking/concurrencia.py'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+
+def etiquetar_intento_actual(apps, schema_editor):
+    """
+    Hasta ahora no se guardaban IntentoTema y reintentar borraba las
+    respuestas, así que las que quedan son del intento en curso. Los
+    intentos_realizados ya contados pasan a estar finalizados; el intento en
+    curso es el siguiente si se reconoce que el tema se reinició después de
+    finalizar (sin respuestas, o aprobado y vuelto a INICIADO), y si no el
+    último finalizado, que se recalifica al finalizar de nuevo sin contar
+    otro intento.
+    """
+    ProgresoTema = apps.get_model('tracking', 'ProgresoTema')
+    RespuestaEjercicio = apps.get_model('tracking', 'RespuestaEjercicio')
+
+    finalizados = ProgresoTema.objects.filter(intentos_realizados__gt=0)
+    finalizados.update(
+        intento_actual=F('intentos_realizados'),
+        intento_finalizado=F('intentos_realizados')
+    )
+    con_respuestas = RespuestaEjercicio.objects.filter(progreso_tema=OuterRef('pk'))
+    finalizados.filter(
+        ~Exists(con_respuestas)
+        | Q(estado='INICIADO', fecha_completado__lt=F('fecha_inicio'))
+    ).update(
+        intento_actual=F('intentos_realizados') + 1
+    )
+    RespuestaEjercicio.objects.filter(progreso_tema__isnull=False).update(
+        numero_intento=Subquery(
+            ProgresoTema.objects.filter(pk=OuterRef('progreso_tema_id')).values('intento_actual')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0007_version_contenido'),
+        ('tracking', '0009_version_progreso'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='respuestaejercicio',
+            name='tracking_re_progres_190b4b_idx',
+        ),
+        migrations.AddField(
+            model_name='progresotema',
+            name='intento_actual',
+            field=models.PositiveIntegerField(default=1, help_text='Intento en curso; las respuestas nuevas se guardan con este número'),
+        ),
+        migrations.AddField(
+            model_name='progresotema',
+            name='intento_finalizado',
+            field=models.PositiveIntegerField(default=0, help_text='Último intento calificado al finalizar el tema (0 si ninguno)'),
+        ),
+        migrations.AddField(
+            model_name='respuestaejercicio',
+            name='numero_intento',
+            field=models.PositiveIntegerField(default=1, help_text='ProgresoTema.intento_actual al responder; reintentar no borra respuestas'),
+        ),
+        migrations.AddIndex(
+            model_name='respuestaejercicio',
+            index=models.Index(fields=['progreso_tema', 'numero_intento', 'ejercicio'], name='tracking_re_progres_b2015b_idx'),
+        ),
+        migrations.RunPython(etiquetar_intento_actual, migrations.RunPython.noop),
+    ]
@@ -2,11 +2,19 @@
 # ACTUALIZACIÓN: Agregar estos campos al modelo ActividadPantalla existente
 
 
+from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from lessons.models import Leccion, Tema, Ejercicio, ContenidoTema
 
 
+# Los modelos de telemetría (SesionEstudio, ActividadPantalla, EventoTracking,
+# TiempoPantalla y ClicBoton) pueden vivir en otra base (tracking/routers.py).
+# Sus FK a usuarios y contenido son referencias blandas: sin restricción en la
+# BD y sin cascada del ORM; tracking/signals.py borra sus filas al borrar el
+# usuario, tema, contenido o ejercicio.
+
+
 class SesionEstudio(models.Model):
     """
     Modelo para registrar las sesiones de estudio de los usuarios.
@@ -21,7 +29,8 @@ class SesionEstudio(models.Model):
 
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='sesiones'
     )
     fecha_inicio = models.DateTimeField(auto_now_add=True)
@@ -104,6 +113,16 @@ class ProgresoLeccion(models.Model):
         default=0.00,
         help_text="Porcentaje de temas completados en la lección"
     )
+    suma_progreso_temas = models.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        default=0.00,
+        help_text="Suma de ProgresoTema.progreso_total de los temas de la lección (ver lessons/progreso.py)"
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text="Se incrementa en cada escritura; ver tracking/concurrencia.py"
+    )
 
 
 
@@ -171,6 +190,24 @@ class ProgresoTema(models.Model):
         default=0,
         help_text="Número de veces que el usuario ha intentado completar este tema"
     )
+    intento_actual = models.PositiveIntegerField(
+        default=1,
+        help_text="Intento en curso; las respuestas nuevas se guardan con este número"
+    )
+    intento_finalizado = models.PositiveIntegerField(
+        default=0,
+        help_text="Último intento calificado al finalizar el tema (0 si ninguno)"
+    )
+    progreso_total = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0.00,
+        help_text="Aporte del tema al progreso de la lección: contenido 50% + ejercicios 50%"
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text="Se incrementa en cada escritura salvo los contadores agregados; ver tracking/concurrencia.py"
+    )
 
     contenidos_vistos = models.ManyToManyField(
         'lessons.ContenidoTema',
@@ -224,25 +261,23 @@ class ProgresoTema(models.Model):
         return f"{self.usuario.username} - {self.tema.titulo} ({self.estado})"
 
 
-    def calcular_progreso_contenido(self):
+    def calcular_progreso_contenido(self, contenidos_vistos=None):
         """
         Calcula el porcentaje de contenido completado.
         NO cuenta EJEMPLO_EXTRA.
+        El total sale del contador desnormalizado Tema.contenidos_contables;
+        si se pasa contenidos_vistos (p. ej. anotado en la query) no se
+        hace ninguna consulta.
         """
-        # Total de contenidos (sin EJEMPLO_EXTRA)
-        contenidos_totales = self.tema.contenidos.exclude(
-            tipo='EJEMPLO_EXTRA'
-        ).count()
+        contenidos_totales = self.tema.contenidos_contables
        
         if contenidos_totales == 0:
             return 0
        
-        # Contenidos vistos (sin EJEMPLO_EXTRA)
-        contenidos_vistos_count = self.contenidos_vistos.exclude(
-            tipo='EJEMPLO_EXTRA'
-        ).count()
+        if contenidos_vistos is None:
+            contenidos_vistos = self.contenido_completado
        
-        return (contenidos_vistos_count / contenidos_totales) * 100
+        return (contenidos_vistos / contenidos_totales) * 100
    
     @property
     def contenido_completado(self):
@@ -252,7 +287,23 @@ class ProgresoTema(models.Model):
     @property
     def contenidos_count(self):
         """Total de contenidos (sin EJEMPLO_EXTRA)"""
-        return self.tema.contenidos.exclude(tipo='EJEMPLO_EXTRA').count()
+        return self.tema.contenidos_contables
+
+    def incrementar_agregados(self, incrementos):
+        """
+        Suma {campo: cantidad} a los campos agregados en un solo UPDATE con F(),
+        sin leer ni reescribir el resto de la fila. Dos eventos simultáneos
+        nunca pierden un incremento. No toca `version`: ningún compare-and-swap
+        escribe estos campos, así que no hace falta que los demás reintenten.
+        Los valores en memoria de esta instancia no se actualizan.
+        """
+        incrementos = {campo: cantidad for campo, cantidad in incrementos.items() if cantidad}
+        if not incrementos:
+            return 0
+        return ProgresoTema.objects.filter(pk=self.pk).update(**{
+            campo: models.F(campo) + cantidad
+            for campo, cantidad in incrementos.items()
+        })
 
 
 
@@ -288,6 +339,10 @@ class RespuestaEjercicio(models.Model):
         default=0,
         help_text="Tiempo que tardó el usuario en responder (en segundos)"
     )
+    numero_intento = models.PositiveIntegerField(
+        default=1,
+        help_text="ProgresoTema.intento_actual al responder; reintentar no borra respuestas"
+    )
     fecha_respuesta = models.DateTimeField(auto_now_add=True)
 
 
@@ -299,7 +354,8 @@ class RespuestaEjercicio(models.Model):
         ordering = ['-fecha_respuesta']
         indexes = [
             models.Index(fields=['usuario', 'ejercicio']),
-            models.Index(fields=['progreso_tema', 'es_correcta']),
+            # Respuestas del intento en curso (validar, detalle y finalizar tema)
+            models.Index(fields=['progreso_tema', 'numero_intento', 'ejercicio']),
             models.Index(fields=['fecha_respuesta']),
         ]
 
@@ -329,7 +385,8 @@ class ActividadPantalla(models.Model):
 
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='actividades_pantalla',
         null=True,
         blank=True
@@ -488,24 +545,64 @@ class IntentoTema(models.Model):
     def __str__(self):
         return f"{self.usuario.username} - {self.tema.titulo} - Intento {self.numero_intento} ({self.porcentaje_acierto}%)"
    
-    def calcular_mejora(self):
+    def calcular_mejora(self, porcentaje_anterior=None):
         """
         Calcula la mejora respecto al intento anterior.
+        Si se pasa porcentaje_anterior (p. ej. el porcentaje_acierto que tenía
+        ProgresoTema antes de este intento) no se consulta el intento anterior.
         """
         if self.numero_intento > 1:
-            intento_anterior = IntentoTema.objects.filter(
-                usuario=self.usuario,
-                tema=self.tema,
-                numero_intento=self.numero_intento - 1
-            ).first()
+            if porcentaje_anterior is None:
+                intento_anterior = IntentoTema.objects.filter(
+                    usuario=self.usuario,
+                    tema=self.tema,
+                    numero_intento=self.numero_intento - 1
+                ).first()
+                if intento_anterior:
+                    porcentaje_anterior = intento_anterior.porcentaje_acierto
            
-            if intento_anterior:
-                self.mejora_porcentaje = self.porcentaje_acierto - intento_anterior.porcentaje_acierto
+            if porcentaje_anterior is not None:
+                self.mejora_porcentaje = Decimal(self.porcentaje_acierto) - Decimal(porcentaje_anterior)
             else:
                 self.mejora_porcentaje = 0
         else:
             self.mejora_porcentaje = 0
 
+# Campo agregado de ProgresoTema que actualiza cada tipo de evento.
+# 'TIEMPO' suma el tiempo_segundos del evento, 'CLIC' suma 1.
+CAMPOS_AGREGADOS_POR_EVENTO = {
+    'TEORIA_VISTA': ('tiempo_total_teoria_segundos', 'TIEMPO'),
+    'EJEMPLO_VISTO': ('tiempo_total_ejemplos_segundos', 'TIEMPO'),
+    'CLIC_VER_OTRO_EJEMPLO': ('clics_ver_otro_ejemplo', 'CLIC'),
+    'CLIC_REGRESAR': ('clics_regresar', 'CLIC'),
+    'CLIC_VOLVER_TEMA': ('clics_volver_tema', 'CLIC'),
+    'CLIC_IR_EJERCICIOS': ('clics_ir_ejercicios', 'CLIC'),
+    'CLIC_AYUDA': ('clics_ayuda', 'CLIC'),
+}
+
+
+def incrementos_por_evento(tipo_evento, tiempo_segundos, acumulado=None):
+    """
+    Traduce un evento a incrementos {campo: cantidad} de ProgresoTema.
+    Si se pasa `acumulado`, suma sobre ese diccionario (útil para lotes).
+    """
+    incrementos = {} if acumulado is None else acumulado
+    destino = CAMPOS_AGREGADOS_POR_EVENTO.get(tipo_evento)
+    if destino is None:
+        return incrementos
+
+    campo, modo = destino
+    if modo == 'TIEMPO':
+        if tiempo_segundos is None:
+            return incrementos
+        cantidad = tiempo_segundos
+    else:
+        cantidad = 1
+
+    incrementos[campo] = incrementos.get(campo, 0) + cantidad
+    return incrementos
+
+
 class EventoTracking(models.Model):
     """
     Modelo para registrar eventos individuales de tracking.
@@ -525,12 +622,14 @@ class EventoTracking(models.Model):
     
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='eventos_tracking'
     )
     tema = models.ForeignKey(
         Tema,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='eventos_tracking'
     )
     tipo_evento = models.CharField(
@@ -603,17 +702,20 @@ class TiempoPantalla(models.Model):
 
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='tiempos_pantalla'
     )
     tema = models.ForeignKey(
         Tema,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='tiempos_pantalla'
     )
     contenido = models.ForeignKey(
         ContenidoTema,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='tiempos_registrados',
         null=True,
         blank=True,
@@ -621,7 +723,8 @@ class TiempoPantalla(models.Model):
     )
     ejercicio = models.ForeignKey(
         Ejercicio,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='tiempos_registrados',
         null=True,
         blank=True,
@@ -684,12 +787,14 @@ class ClicBoton(models.Model):
 
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='clics_botones'
     )
     tema = models.ForeignKey(
         Tema,
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
         related_name='clics_botones',
         null=True,
         blank=True,
@@ -0,0 +1,77 @@
+# tracking/routers.py
+"""
+Router que manda la telemetría a su propia base de datos.
+
+SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla y ClicBoton
+solo reciben inserciones (y algún UPDATE de sesión). En SQLite hay un único
+escritor por archivo, así que una ráfaga de tracking bloqueaba también a
+ValidarRespuestaView y FinalizarTemaView. Con el alias 'tracking' en
+DATABASES (ver settings.TRACKING_DATABASE_URL) estos modelos se leen,
+escriben y migran solo allí; todo lo demás queda en 'default'. Sin ese
+alias el router no opina y todo vive en 'default', como antes.
+
+Como las dos bases no pueden tener llaves foráneas entre sí, las FK de la
+telemetría a usuarios y contenido son referencias blandas (db_constraint=False,
+on_delete=DO_NOTHING); el borrado en cascada lo hace tracking/signals.py.
+Las consultas no pueden hacer JOIN entre bases: 'usuario__username' y
+similares se resuelven aparte (ver tracking/exportacion.py y admin_views.py).
+"""
+from django.conf import settings
+
+
+ALIAS_TRACKING = 'tracking'
+
+MODELOS_TELEMETRIA = frozenset({
+    'sesionestudio',
+    'actividadpantalla',
+    'eventotracking',
+    'tiempopantalla',
+    'clicboton',
+})
+
+
+def base_separada():
+    """True si la telemetría vive en su propia base."""
+    return ALIAS_TRACKING in settings.DATABASES
+
+
+def es_telemetria(modelo):
+    """Acepta un modelo o una instancia (también request.user, que es perezoso)."""
+    opciones = modelo._meta
+    return opciones.app_label == 'tracking' and opciones.model_name in MODELOS_TELEMETRIA
+
+
+class TrackingRouter:
+    """Ubica los modelos de telemetría en el alias 'tracking' si existe."""
+
+    def _base(self, model, hints):
+        if not base_separada():
+            return None
+        if es_telemetria(model):
+            return ALIAS_TRACKING
+        # Sin esto Django usaría la base de la instancia de origen al seguir
+        # una FK blanda (p. ej. clic.tema), y el tema vive en 'default'
+        instancia = hints.get('instance')
+        if instancia is not None and es_telemetria(instancia):
+            return 'default'
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._base(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._base(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las FK blandas de la telemetría apuntan a objetos de 'default'
+        if es_telemetria(obj1) or es_telemetria(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not base_separada():
+            return None
+        if app_label == 'tracking' and model_name in MODELOS_TELEMETRIA:
+            return db == ALIAS_TRACKING
+        # Nada más (ni RunPython sin modelo) se migra en la base de tracking
+        return db != ALIAS_TRACKING
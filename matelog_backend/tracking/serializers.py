@@ -5,7 +5,8 @@
 from rest_framework import serializers
 from .models import (
     ProgresoLeccion, ProgresoTema, RespuestaEjercicio, 
-    ActividadPantalla, SesionEstudio, IntentoTema, EventoTracking
+    ActividadPantalla, SesionEstudio, IntentoTema, EventoTracking,
+    TiempoPantalla, ClicBoton
 )
 
 
@@ -62,9 +63,9 @@ class RespuestaEjercicioSerializer(serializers.ModelSerializer):
    
     class Meta:
         model = RespuestaEjercicio
-        fields = ['id', 'ejercicio', 'ejercicio_titulo', 'respuesta_usuario',
-                 'es_correcta', 'uso_ayuda', 'tiempo_respuesta_segundos',
-                 'fecha_respuesta']
+        fields = ['id', 'ejercicio', 'ejercicio_titulo', 'numero_intento',
+                 'respuesta_usuario', 'es_correcta', 'uso_ayuda',
+                 'tiempo_respuesta_segundos', 'fecha_respuesta']
        
 
 
@@ -145,6 +146,29 @@ class RegistrarEventoSerializer(serializers.Serializer):
     numero_intento = serializers.IntegerField(required=False, allow_null=True)
     tiempo_segundos = serializers.IntegerField(required=False, allow_null=True)
     cambio_pestana = serializers.BooleanField(default=False)
+
+
+class TiempoPantallaLoteSerializer(serializers.Serializer):
+    """
+    Serializer para un registro de TiempoPantalla dentro de un lote.
+    """
+    tema_id = serializers.IntegerField()
+    tipo_contenido = serializers.ChoiceField(choices=TiempoPantalla.TIPO_CONTENIDO_CHOICES)
+    numero = serializers.IntegerField(min_value=0)
+    tiempo_segundos = serializers.IntegerField(min_value=0)
+    contenido_id = serializers.IntegerField(required=False, allow_null=True)
+    ejercicio_id = serializers.IntegerField(required=False, allow_null=True)
+    cambio_pestana = serializers.BooleanField(default=False)
+
+
+class ClicBotonLoteSerializer(serializers.Serializer):
+    """
+    Serializer para un registro de ClicBoton dentro de un lote.
+    """
+    tipo_boton = serializers.ChoiceField(choices=ClicBoton.TIPO_BOTON_CHOICES)
+    tema_id = serializers.IntegerField(required=False, allow_null=True)
+
+
 class ProgresoTemaTrackingSerializer(serializers.ModelSerializer):
     """
     Serializer para leer datos de tracking agregados de ProgresoTema.
@@ -0,0 +1,41 @@
+# tracking/signals.py
+"""
+Cascada manual para las referencias blandas de la telemetría.
+
+Las FK de SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla y
+ClicBoton no tienen restricción en la BD (pueden estar en otra base, ver
+tracking/routers.py), así que el ORM no las borra en cascada. Estas señales
+borran la telemetría antes de borrar el usuario, tema, contenido o ejercicio
+al que apunta, igual que hacía el CASCADE original.
+
+queryset.delete() de lecciones o temas sí dispara pre_delete por cada fila
+que borra en cascada, así que también quedan cubiertos.
+"""
+from django.conf import settings
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from lessons.models import Tema, ContenidoTema, Ejercicio
+from .models import SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla, ClicBoton
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def borrar_telemetria_usuario(sender, instance, **kwargs):
+    for modelo in (SesionEstudio, ActividadPantalla, EventoTracking, TiempoPantalla, ClicBoton):
+        modelo.objects.filter(usuario_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Tema)
+def borrar_telemetria_tema(sender, instance, **kwargs):
+    for modelo in (EventoTracking, TiempoPantalla, ClicBoton):
+        modelo.objects.filter(tema_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=ContenidoTema)
+def borrar_telemetria_contenido(sender, instance, **kwargs):
+    TiempoPantalla.objects.filter(contenido_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=Ejercicio)
+def borrar_telemetria_ejercicio(sender, instance, **kwargs):
+    TiempoPantalla.objects.filter(ejercicio_id=instance.pk).delete()
@@ -0,0 +1,88 @@
+from unittest import skipUnless
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema, ContenidoTema
+from tracking.models import SesionEstudio, TiempoPantalla, ClicBoton, ProgresoTema
+from tracking.routers import TrackingRouter, base_separada
+
+
+class BaseTrackingTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        User = get_user_model()
+        self.usuario = User.objects.create_user(username='estudiante', password='testpass123')
+        self.staff = User.objects.create_superuser(username='admin', password='testpass123')
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.contenido = ContenidoTema.objects.create(
+            tema=self.tema, tipo='TEORIA', orden=1, contenido_texto='<p>T</p>'
+        )
+
+    @skipUnless(base_separada(), 'la telemetría está en la base default')
+    def test_router_separa_telemetria(self):
+        """La telemetría se lee, escribe y migra solo en la base 'tracking'"""
+        router = TrackingRouter()
+        self.assertEqual(router.db_for_write(ClicBoton), 'tracking')
+        self.assertEqual(router.db_for_read(SesionEstudio), 'tracking')
+        self.assertIsNone(router.db_for_write(ProgresoTema))
+        self.assertTrue(router.allow_migrate('tracking', 'tracking', model_name='clicboton'))
+        self.assertFalse(router.allow_migrate('default', 'tracking', model_name='clicboton'))
+        self.assertFalse(router.allow_migrate('tracking', 'tracking', model_name='progresotema'))
+        self.assertFalse(router.allow_migrate('tracking', 'lessons'))
+
+        clic = ClicBoton.objects.create(usuario=self.usuario, tema=self.tema, tipo_boton='REGRESAR')
+        self.assertEqual(clic._state.db, 'tracking')
+        # Al seguir la FK blanda desde una fila leída, el tema sale de 'default'
+        clic = ClicBoton.objects.get(pk=clic.pk)
+        self.assertEqual(clic.tema.titulo, 'Tema de Prueba')
+
+    def test_borrar_tema_borra_su_telemetria(self):
+        """Las referencias blandas se borran en cascada con el tema o el contenido"""
+        TiempoPantalla.objects.create(
+            usuario=self.usuario, tema=self.tema, contenido=self.contenido,
+            tipo_contenido='TEORIA', numero=1, tiempo_segundos=10
+        )
+        ClicBoton.objects.create(usuario=self.usuario, tema=self.tema, tipo_boton='REGRESAR')
+        ClicBoton.objects.create(usuario=self.usuario, tipo_boton='VOLVER')
+
+        self.contenido.delete()
+        self.assertFalse(TiempoPantalla.objects.exists())
+
+        self.leccion.delete()
+        self.assertEqual(list(ClicBoton.objects.values_list('tipo_boton', flat=True)), ['VOLVER'])
+
+    def test_borrar_usuario_borra_su_telemetria(self):
+        SesionEstudio.objects.create(usuario=self.usuario)
+        ClicBoton.objects.create(usuario=self.usuario, tipo_boton='VOLVER')
+        SesionEstudio.objects.create(usuario=self.staff)
+
+        self.usuario.delete()
+
+        self.assertEqual(list(SesionEstudio.objects.values_list('usuario_id', flat=True)), [self.staff.id])
+        self.assertFalse(ClicBoton.objects.exists())
+
+    def test_admin_lista_y_busca_sin_join(self):
+        """El admin de telemetría busca por usuario y tema sin cruzar bases"""
+        ClicBoton.objects.create(usuario=self.usuario, tema=self.tema, tipo_boton='REGRESAR')
+        ClicBoton.objects.create(usuario=self.staff, tipo_boton='VOLVER')
+        self.client.force_login(self.staff)
+
+        response = self.client.get('/admin/tracking/clicboton/', {'q': 'estudi'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertContains(response, 'Tema de Prueba')
+
+        response = self.client.get('/admin/tracking/clicboton/', {'q': 'prueba'})
+        self.assertEqual(response.context['cl'].result_count, 1)
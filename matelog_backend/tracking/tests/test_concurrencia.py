@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema
+from tracking.concurrencia import MAX_REINTENTOS, ConflictoConcurrencia, guardar_con_version, modificar
+from tracking.models import ProgresoTema
+
+
+class ConcurrenciaOptimistaTestCase(TestCase):
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        leccion = Leccion.objects.create(orden=1, titulo="Leccion de Prueba", descripcion="Descripcion")
+        self.tema = Tema.objects.create(leccion=leccion, orden=1, titulo="Tema de Prueba", descripcion="Descripcion")
+        self.progreso = ProgresoTema.objects.create(usuario=self.usuario, tema=self.tema)
+
+    def leer(self):
+        return ProgresoTema.objects.get(pk=self.progreso.pk)
+
+    def test_version_vieja_no_sobrescribe(self):
+        """Quien escribe con una versión vieja no pisa lo que guardó otro"""
+        primero, segundo = self.leer(), self.leer()
+
+        primero.desbloqueado = True
+        self.assertTrue(guardar_con_version(primero, ['desbloqueado']))
+        segundo.desbloqueado = False
+        segundo.porcentaje_acierto = Decimal('50.00')
+        self.assertFalse(guardar_con_version(segundo, ['desbloqueado', 'porcentaje_acierto']))
+
+        progreso = self.leer()
+        self.assertTrue(progreso.desbloqueado)
+        self.assertEqual(progreso.porcentaje_acierto, Decimal('0.00'))
+        self.assertEqual(progreso.version, 1)
+
+    def test_modificar_reaplica_sobre_la_fila_releida(self):
+        """Dos incrementos simultáneos de intentos no se pierden"""
+        viejo = self.leer()
+        llamadas = []
+
+        def sumar_intento(progreso):
+            llamadas.append(progreso.version)
+            progreso.intentos_realizados += 1
+            return ['intentos_realizados']
+
+        modificar(self.leer(), sumar_intento)
+        self.assertTrue(modificar(viejo, sumar_intento))
+
+        self.assertEqual(llamadas, [0, 0, 1])
+        self.assertEqual(self.leer().intentos_realizados, 2)
+        self.assertEqual(viejo.version, 2)
+
+    def test_sin_cambios_no_escribe(self):
+        self.assertFalse(modificar(self.progreso, lambda progreso: []))
+        self.assertEqual(self.leer().version, 0)
+
+    def test_agota_reintentos(self):
+        """Si otra escritura se adelanta siempre, se lanza ConflictoConcurrencia"""
+        llamadas = []
+
+        def cambio_perdido(progreso):
+            llamadas.append(progreso.version)
+            ProgresoTema.objects.filter(pk=progreso.pk).update(version=progreso.version + 1)
+            progreso.desbloqueado = True
+            return ['desbloqueado']
+
+        with self.assertRaises(ConflictoConcurrencia):
+            modificar(self.progreso, cambio_perdido)
+        self.assertEqual(len(llamadas), MAX_REINTENTOS)
+        self.assertFalse(self.leer().desbloqueado)
+
+    def test_agregados_no_cambian_version(self):
+        """Los contadores de tracking suman con F() sin invalidar a los demás escritores"""
+        progreso = self.leer()
+        progreso.incrementar_agregados({'clics_regresar': 2, 'tiempo_total_teoria_segundos': 30})
+
+        progreso.estado = 'INICIADO'
+        self.assertTrue(guardar_con_version(progreso, ['estado']))
+
+        progreso = self.leer()
+        self.assertEqual(progreso.clics_regresar, 2)
+        self.assertEqual(progreso.tiempo_total_teoria_segundos, 30)
+        self.assertEqual(progreso.estado, 'INICIADO')
@@ -0,0 +1,90 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema
+from tracking.models import ClicBoton, TiempoPantalla, EventoTracking
+from tracking import escritura_diferida
+from tracking.escritura_diferida import EscritorDiferido
+
+
+class EscritorDiferidoTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        leccion = Leccion.objects.create(orden=1, titulo='Lección', descripcion='Desc')
+        self.tema = Tema.objects.create(leccion=leccion, orden=1, titulo='Tema', descripcion='D')
+
+    def clic(self, tipo='VOLVER'):
+        return ClicBoton(usuario=self.usuario, tema=self.tema, tipo_boton=tipo)
+
+    def test_lotes_por_modelo(self):
+        """La cola se vacía en lotes de bulk_create agrupando por modelo"""
+        escritor = EscritorDiferido(lote=2, iniciar_hilo=False)
+        escritor.encolar([
+            self.clic(),
+            TiempoPantalla(usuario=self.usuario, tema=self.tema, tipo_contenido='TEORIA',
+                           numero=1, tiempo_segundos=10),
+            EventoTracking(usuario=self.usuario, tema=self.tema, tipo_evento='CLIC_AYUDA'),
+        ])
+        self.assertEqual(ClicBoton.objects.count(), 0)
+
+        escritor.vaciar()
+
+        self.assertEqual(ClicBoton.objects.count(), 1)
+        self.assertEqual(TiempoPantalla.objects.count(), 1)
+        self.assertEqual(EventoTracking.objects.count(), 1)
+        estadisticas = escritor.estadisticas()
+        self.assertEqual(estadisticas['encolados'], 3)
+        self.assertEqual(estadisticas['escritos'], 3)
+        self.assertEqual(estadisticas['lotes'], 2)
+        self.assertEqual(estadisticas['en_cola'], 0)
+
+    def test_contrapresion(self):
+        """Con la cola llena, lo que no cabe se escribe en la petición"""
+        escritor = EscritorDiferido(maximo=2, espera_ms=1, iniciar_hilo=False)
+        escritor.encolar([self.clic() for _ in range(5)])
+
+        self.assertEqual(ClicBoton.objects.count(), 3)
+        estadisticas = escritor.estadisticas()
+        self.assertEqual((estadisticas['encolados'], estadisticas['sincronos']), (2, 3))
+
+        escritor.vaciar()
+        self.assertEqual(ClicBoton.objects.count(), 5)
+
+    def test_fila_invalida_se_descarta_sola(self):
+        """Si un lote falla se reintenta fila por fila"""
+        escritor = EscritorDiferido(iniciar_hilo=False)
+        escritor.encolar([self.clic(), self.clic(tipo=None), self.clic()])
+
+        with self.assertLogs('tracking.escritura_diferida', level='ERROR'):
+            escritor.vaciar()
+
+        self.assertEqual(ClicBoton.objects.count(), 2)
+        estadisticas = escritor.estadisticas()
+        self.assertEqual((estadisticas['escritos'], estadisticas['descartados']), (2, 1))
+
+    @override_settings(TRACKING_ESCRITURA_DIFERIDA=False)
+    def test_desactivada_escribe_de_inmediato(self):
+        """Sin escritura diferida guardar() inserta en el momento"""
+        escritura_diferida.guardar([self.clic(), self.clic()])
+        self.assertEqual(ClicBoton.objects.count(), 2)
+
+
+class HiloEscrituraDiferidaTestCase(TransactionTestCase):
+    databases = '__all__'
+
+    def test_hilo_escribe_y_detener_vacia(self):
+        """El hilo de fondo escribe los lotes y detener() escribe lo pendiente"""
+        usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        escritor = EscritorDiferido(lote=10, intervalo_ms=20)
+        escritor.encolar([ClicBoton(usuario=usuario, tipo_boton='VOLVER') for _ in range(25)])
+
+        escritor.detener()
+
+        self.assertEqual(ClicBoton.objects.count(), 25)
+        self.assertEqual(escritor.estadisticas()['escritos'], 25)
+        self.assertEqual(escritor.estadisticas()['descartados'], 0)
@@ -0,0 +1,79 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema
+from tracking.models import ProgresoTema, EventoTracking, incrementos_por_evento
+
+
+class RegistrarEventoTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def test_incrementos_por_evento(self):
+        """Cada tipo de evento se traduce al campo agregado correcto"""
+        self.assertEqual(incrementos_por_evento('CLIC_AYUDA', None), {'clics_ayuda': 1})
+        self.assertEqual(
+            incrementos_por_evento('TEORIA_VISTA', 40),
+            {'tiempo_total_teoria_segundos': 40}
+        )
+        # Tiempo nulo (cambio de pestaña) no suma nada
+        self.assertEqual(incrementos_por_evento('EJEMPLO_VISTO', None), {})
+        # Eventos sin campo agregado
+        self.assertEqual(incrementos_por_evento('CAMBIO_PESTANA', 10), {})
+
+    def test_incrementos_no_se_pierden_con_instancias_desactualizadas(self):
+        """Dos escritores con la misma lectura no se pisan los incrementos"""
+        progreso = ProgresoTema.objects.create(usuario=self.usuario, tema=self.tema)
+        lector_a = ProgresoTema.objects.get(pk=progreso.pk)
+        lector_b = ProgresoTema.objects.get(pk=progreso.pk)
+
+        lector_a.incrementar_agregados({'clics_ayuda': 1})
+        lector_b.incrementar_agregados({'clics_ayuda': 1, 'clics_regresar': 1})
+
+        progreso.refresh_from_db()
+        self.assertEqual(progreso.clics_ayuda, 2)
+        self.assertEqual(progreso.clics_regresar, 1)
+
+    def test_registrar_evento_actualiza_agregados(self):
+        """El endpoint crea el evento y suma al agregado del tema"""
+        for _ in range(3):
+            response = self.client.post('/api/tracking/evento/', {
+                'tipo_evento': 'CLIC_VER_OTRO_EJEMPLO',
+                'tema_id': self.tema.id,
+            }, format='json')
+            self.assertEqual(response.status_code, 201)
+
+        response = self.client.post('/api/tracking/evento/', {
+            'tipo_evento': 'EJEMPLO_VISTO',
+            'tema_id': self.tema.id,
+            'tiempo_segundos': 25,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.clics_ver_otro_ejemplo, 3)
+        self.assertEqual(progreso.tiempo_total_ejemplos_segundos, 25)
+        self.assertEqual(EventoTracking.objects.count(), 4)
+
+        # Solo el primer evento creó el ProgresoTema e invalidó el snapshot
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.version_progreso, 1)
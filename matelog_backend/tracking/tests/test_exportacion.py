@@ -0,0 +1,92 @@
+import csv
+import io
+from unittest import mock
+from django.test import TestCase, RequestFactory
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from lessons.models import Leccion, Tema
+from tracking.models import ClicBoton, TiempoPantalla, ProgresoTema, IntentoTema
+from tracking.admin import ClicBotonAdmin, TiempoPantallaAdmin, IntentoTemaAdmin
+
+
+class ExportacionCSVTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.request = RequestFactory().post('/admin/')
+
+    def leer_csv(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(contenido.startswith('\ufeff'))
+        return list(csv.reader(io.StringIO(contenido[1:])))
+
+    def test_exportar_clics_por_bloques(self):
+        """El CSV se genera en varios bloques con las mismas filas"""
+        ClicBoton.objects.bulk_create([
+            ClicBoton(usuario=self.usuario, tema=self.tema if i % 2 else None, tipo_boton='VER_AYUDA')
+            for i in range(5)
+        ])
+        modelo_admin = ClicBotonAdmin(ClicBoton, admin.site)
+
+        with mock.patch('tracking.exportacion.TAMANO_BLOQUE', 2):
+            response = modelo_admin.exportar_clics_csv(self.request, ClicBoton.objects.all())
+            filas = self.leer_csv(response)
+
+        self.assertEqual(filas[0], ['Usuario', 'Tema', 'Lección', 'Tipo de Botón', 'Fecha/Hora'])
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(sorted(fila[1] for fila in filas[1:]), ['', '', '', 'Tema de Prueba', 'Tema de Prueba'])
+        self.assertEqual({fila[3] for fila in filas[1:]}, {'Ver Ayuda'})
+
+    def test_exportar_tiempo_pantalla_nombre_completo(self):
+        """Las columnas calculadas usan las etiquetas de los choices"""
+        TiempoPantalla.objects.create(
+            usuario=self.usuario, tema=self.tema, tipo_contenido='TEORIA',
+            numero=2, tiempo_segundos=30, cambio_pestana=True
+        )
+        modelo_admin = TiempoPantallaAdmin(TiempoPantalla, admin.site)
+
+        filas = self.leer_csv(
+            modelo_admin.exportar_tiempo_pantalla_csv(self.request, TiempoPantalla.objects.all())
+        )
+
+        self.assertEqual(filas[1][:8], [
+            'estudiante', 'Tema de Prueba', 'Leccion de Prueba', 'Teoría', '2', 'Teoría 2', '30', 'Sí'
+        ])
+
+    def test_exportar_intentos_conserva_nombre_y_sin_bom(self):
+        """El CSV de intentos mantiene su nombre fijo y no lleva BOM"""
+        progreso = ProgresoTema.objects.create(usuario=self.usuario, tema=self.tema)
+        IntentoTema.objects.create(
+            usuario=self.usuario, tema=self.tema, progreso_tema=progreso, numero_intento=1,
+            porcentaje_acierto=80, aprobado=True, ejercicios_correctos=4, ejercicios_totales=5,
+            fecha_inicio=timezone.now()
+        )
+        modelo_admin = IntentoTemaAdmin(IntentoTema, admin.site)
+
+        response = modelo_admin.exportar_intentos_csv(self.request, IntentoTema.objects.all())
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="intentos_temas.csv"')
+        contenido = b''.join(response.streaming_content).decode('utf-8')
+        self.assertFalse(contenido.startswith('\ufeff'))
+        filas = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(filas[0][:3], ['Usuario', 'Tema', 'Número Intento'])
+        self.assertEqual(filas[1][:5], ['estudiante', 'Tema de Prueba', '1', '80.00', 'Sí'])
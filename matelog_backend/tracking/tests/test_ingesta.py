@@ -0,0 +1,95 @@
+import json
+
+from django.test import TestCase, Client
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema, ContenidoTema
+from tracking.models import SesionEstudio, TiempoPantalla, ClicBoton
+
+
+class IngestaTrackingTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(orden=1, titulo='Lección', descripcion='Desc')
+        self.tema = Tema.objects.create(leccion=self.leccion, orden=1, titulo='Tema', descripcion='D')
+        self.contenido = ContenidoTema.objects.create(
+            tema=self.tema, orden=1, tipo='TEORIA', contenido_texto='<p>T</p>'
+        )
+        self.client = Client()
+        self.client.force_login(self.usuario)
+
+    def post(self, url, datos, client=None):
+        return (client or self.client).post(
+            f'/api/tracking/ingesta/{url}', json.dumps(datos), content_type='application/json'
+        )
+
+    def test_clic_boton(self):
+        """Un clic válido se guarda y responde 204 sin cuerpo"""
+        response = self.post('clic-boton/', {'tipo_boton': 'VER_AYUDA', 'tema_id': self.tema.id})
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+        clic = ClicBoton.objects.get()
+        self.assertEqual((clic.usuario_id, clic.tema_id), (self.usuario.id, self.tema.id))
+
+        response = self.post('clic-boton/', {'tipo_boton': 'BAILAR'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tipo_boton', response.json()['error'])
+        response = self.post('clic-boton/', {'tipo_boton': 'VOLVER', 'tema_id': 999999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tiempo_pantalla(self):
+        """Mismo contrato que /api/tracking/tiempo-pantalla/"""
+        response = self.post('tiempo-pantalla/', {
+            'tema_id': self.tema.id, 'tipo_contenido': 'TEORIA', 'numero': 1,
+            'contenido_id': self.contenido.id, 'tiempo_segundos': 42, 'cambio_pestana': True,
+        })
+
+        self.assertEqual(response.status_code, 204)
+        tiempo = TiempoPantalla.objects.get()
+        self.assertEqual(tiempo.contenido_id, self.contenido.id)
+        self.assertEqual(tiempo.tiempo_segundos, 42)
+        self.assertTrue(tiempo.cambio_pestana)
+
+        for datos in [
+            {'tema_id': self.tema.id, 'tipo_contenido': 'TEORIA', 'numero': 1},
+            {'tema_id': self.tema.id, 'tipo_contenido': 'TEORIA', 'numero': 1, 'tiempo_segundos': -3},
+            {'tema_id': 'x', 'tipo_contenido': 'TEORIA', 'numero': 1, 'tiempo_segundos': 3},
+            {'tema_id': self.tema.id, 'tipo_contenido': 'VIDEO', 'numero': 1, 'tiempo_segundos': 3},
+        ]:
+            self.assertEqual(self.post('tiempo-pantalla/', datos).status_code, 400)
+        self.assertEqual(TiempoPantalla.objects.count(), 1)
+
+    def test_actividad_sesion(self):
+        """El heartbeat actualiza solo sesiones del propio usuario"""
+        sesion = SesionEstudio.objects.create(usuario=self.usuario)
+        otro = get_user_model().objects.create_user(username='otro', password='testpass123')
+        ajena = SesionEstudio.objects.create(usuario=otro)
+
+        self.assertEqual(self.post('sesion/actividad/', {'sesion_id': sesion.id}).status_code, 204)
+        sesion.refresh_from_db()
+        self.assertIsNotNone(sesion.ultima_actividad)
+        self.assertEqual(self.post('sesion/actividad/', {'sesion_id': ajena.id}).status_code, 404)
+
+    def test_autenticacion_csrf_y_metodo(self):
+        """Sin sesión 403; la protección CSRF del middleware se mantiene; solo POST"""
+        anonimo = Client()
+        self.assertEqual(self.post('clic-boton/', {'tipo_boton': 'VOLVER'}, anonimo).status_code, 403)
+
+        estricto = Client(enforce_csrf_checks=True)
+        estricto.force_login(self.usuario)
+        self.assertEqual(self.post('clic-boton/', {'tipo_boton': 'VOLVER'}, estricto).status_code, 403)
+
+        self.assertEqual(self.client.get('/api/tracking/ingesta/clic-boton/').status_code, 405)
+        response = self.client.post(
+            '/api/tracking/ingesta/clic-boton/', 'no es json', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ClicBoton.objects.count(), 0)
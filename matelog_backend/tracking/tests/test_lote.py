@@ -0,0 +1,112 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from lessons.models import Leccion, Tema, ContenidoTema
+from tracking.models import TiempoPantalla, ClicBoton, EventoTracking, ProgresoTema
+
+
+class RegistrarLoteTrackingTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.usuario = get_user_model().objects.create_user(
+            username='estudiante',
+            password='testpass123'
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.contenido = ContenidoTema.objects.create(
+            tema=self.tema,
+            orden=1,
+            tipo='TEORIA',
+            contenido_texto="<p>Teoria</p>"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def test_lote_heterogeneo_se_inserta(self):
+        """Tiempos, clics y eventos de un lote se guardan juntos"""
+        response = self.client.post('/api/tracking/lote/', {
+            'registros': [
+                {'tipo': 'TIEMPO_PANTALLA', 'tema_id': self.tema.id, 'tipo_contenido': 'TEORIA',
+                 'numero': 1, 'tiempo_segundos': 30, 'contenido_id': self.contenido.id},
+                {'tipo': 'CLIC_BOTON', 'tema_id': self.tema.id, 'tipo_boton': 'REGRESAR'},
+                {'tipo': 'CLIC_BOTON', 'tipo_boton': 'VER_AYUDA'},
+                {'tipo': 'EVENTO', 'tema_id': self.tema.id, 'tipo_evento': 'CLIC_AYUDA'},
+                {'tipo': 'EVENTO', 'tema_id': self.tema.id, 'tipo_evento': 'TEORIA_VISTA',
+                 'tiempo_segundos': 12},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['aceptados'], 5)
+        self.assertEqual(response.data['rechazados'], 0)
+        self.assertEqual(TiempoPantalla.objects.count(), 1)
+        self.assertEqual(ClicBoton.objects.count(), 2)
+        self.assertEqual(EventoTracking.objects.count(), 2)
+
+        progreso = ProgresoTema.objects.get(usuario=self.usuario, tema=self.tema)
+        self.assertEqual(progreso.clics_ayuda, 1)
+        self.assertEqual(progreso.tiempo_total_teoria_segundos, 12)
+
+    def test_lote_que_crea_progreso_invalida_el_snapshot(self):
+        """Si un evento desbloquea un tema nuevo el progreso cambia de versión, una vez por lote"""
+        lote = {'registros': [
+            {'tipo': 'EVENTO', 'tema_id': self.tema.id, 'tipo_evento': 'CLIC_AYUDA'},
+            {'tipo': 'EVENTO', 'tema_id': self.tema.id, 'tipo_evento': 'CLIC_AYUDA'},
+        ]}
+        self.client.post('/api/tracking/lote/', lote, format='json')
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.version_progreso, 1)
+
+        # Con el ProgresoTema ya creado solo cambian agregados que el snapshot no usa
+        self.client.post('/api/tracking/lote/', lote, format='json')
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.version_progreso, 1)
+
+    def test_lote_reporta_rechazos_por_registro(self):
+        """Los registros inválidos se rechazan sin afectar a los válidos"""
+        response = self.client.post('/api/tracking/lote/', {
+            'registros': [
+                {'tipo': 'CLIC_BOTON', 'tema_id': self.tema.id, 'tipo_boton': 'REGRESAR'},
+                {'tipo': 'CLIC_BOTON', 'tipo_boton': 'NO_EXISTE'},
+                {'tipo': 'TIEMPO_PANTALLA', 'tema_id': 9999, 'tipo_contenido': 'TEORIA',
+                 'numero': 1, 'tiempo_segundos': 5},
+                {'tipo': 'DESCONOCIDO'},
+                {'tipo': []},
+                {'tipo': {}},
+                'no es un objeto',
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['aceptados'], 1)
+        self.assertEqual(response.data['rechazados'], 6)
+        resultados = response.data['resultados']
+        self.assertTrue(resultados[0]['aceptado'])
+        self.assertIn('tipo_boton', resultados[1]['errores'])
+        self.assertIn('tema_id', resultados[2]['errores'])
+        for resultado in resultados[3:]:
+            self.assertIn('tipo', resultado['errores'])
+        self.assertEqual(ClicBoton.objects.count(), 1)
+        self.assertEqual(TiempoPantalla.objects.count(), 0)
+
+    def test_lote_vacio_o_demasiado_grande(self):
+        """Un lote vacío o que excede el máximo se rechaza completo"""
+        response = self.client.post('/api/tracking/lote/', {'registros': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        registros = [{'tipo': 'CLIC_BOTON', 'tipo_boton': 'REGRESAR'}] * 501
+        response = self.client.post('/api/tracking/lote/', {'registros': registros}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ClicBoton.objects.count(), 0)
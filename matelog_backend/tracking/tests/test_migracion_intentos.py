@@ -0,0 +1,63 @@
+from datetime import timedelta
+from importlib import import_module
+from django.apps import apps
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from lessons.models import Leccion, Tema, Ejercicio
+from tracking.models import ProgresoTema, RespuestaEjercicio
+
+
+etiquetar_intento_actual = import_module(
+    'tracking.migrations.0010_respuestas_por_intento'
+).etiquetar_intento_actual
+
+
+class EtiquetarIntentoActualTestCase(TestCase):
+    """Datos de antes de IntentoTema: solo quedan los contadores de ProgresoTema"""
+
+    def setUp(self):
+        self.usuario = get_user_model().objects.create_user(username='estudiante', password='testpass123')
+        leccion = Leccion.objects.create(orden=1, titulo="Leccion de Prueba", descripcion="Descripcion")
+        self.temas = [
+            Tema.objects.create(leccion=leccion, orden=orden, titulo=f"Tema {orden}", descripcion="Descripcion")
+            for orden in (1, 2, 3, 4)
+        ]
+        self.ahora = timezone.now()
+
+    def progreso(self, tema, respuestas=0, **campos):
+        progreso = ProgresoTema.objects.create(usuario=self.usuario, tema=tema, **campos)
+        for orden in range(respuestas):
+            ejercicio = Ejercicio.objects.create(
+                tema=tema, orden=orden + 1, tipo='ABIERTO', dificultad='FACIL',
+                instruccion="Resuelve", enunciado="p", respuesta_correcta="p"
+            )
+            RespuestaEjercicio.objects.create(
+                usuario=self.usuario, ejercicio=ejercicio, progreso_tema=progreso,
+                respuesta_usuario="p", es_correcta=True
+            )
+        return progreso
+
+    def test_intento_en_curso_segun_el_reinicio(self):
+        sin_finalizar = self.progreso(self.temas[0], respuestas=1)
+        finalizado = self.progreso(self.temas[1], respuestas=1, intentos_realizados=2)
+        reiniciado = self.progreso(self.temas[2], intentos_realizados=2)
+        aprobado_y_reiniciado = self.progreso(
+            self.temas[3], respuestas=1, intentos_realizados=1, estado='INICIADO',
+            fecha_completado=self.ahora - timedelta(days=1), fecha_inicio=self.ahora
+        )
+
+        etiquetar_intento_actual(apps, None)
+
+        esperado = {
+            sin_finalizar.pk: (1, 0),
+            finalizado.pk: (2, 2),
+            reiniciado.pk: (3, 2),
+            aprobado_y_reiniciado.pk: (2, 1),
+        }
+        for progreso in ProgresoTema.objects.all():
+            self.assertEqual((progreso.intento_actual, progreso.intento_finalizado), esperado[progreso.pk])
+        self.assertEqual(
+            dict(RespuestaEjercicio.objects.values_list('progreso_tema_id', 'numero_intento')),
+            {sin_finalizar.pk: 1, finalizado.pk: 2, aprobado_y_reiniciado.pk: 2}
+        )
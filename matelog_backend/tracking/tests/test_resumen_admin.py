@@ -0,0 +1,117 @@
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from lessons.models import Leccion, Tema
+from tracking.models import TiempoPantalla, ClicBoton
+
+
+class ResumenAdminTestCase(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        cache.clear()
+        User = get_user_model()
+        self.staff = User.objects.create_user(
+            username='admin', password='testpass123', is_staff=True
+        )
+        self.leccion = Leccion.objects.create(
+            orden=1,
+            titulo="Leccion de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.tema = Tema.objects.create(
+            leccion=self.leccion,
+            orden=1,
+            titulo="Tema de Prueba",
+            descripcion="Descripcion de prueba"
+        )
+        self.usuarios = [
+            User.objects.create_user(username=f'estudiante{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.client.force_login(self.staff)
+
+    def _registrar(self, usuarios):
+        for usuario in usuarios:
+            TiempoPantalla.objects.create(
+                usuario=usuario, tema=self.tema, tipo_contenido='TEORIA',
+                numero=1, tiempo_segundos=10
+            )
+            TiempoPantalla.objects.create(
+                usuario=usuario, tema=self.tema, tipo_contenido='TEORIA',
+                numero=1, tiempo_segundos=5
+            )
+            TiempoPantalla.objects.create(
+                usuario=usuario, tema=self.tema, tipo_contenido='EJEMPLO',
+                numero=1, tiempo_segundos=7
+            )
+            ClicBoton.objects.create(usuario=usuario, tema=self.tema, tipo_boton='REGRESAR')
+            ClicBoton.objects.create(usuario=usuario, tema=self.tema, tipo_boton='REGRESAR')
+
+    def test_matriz_tiempos_y_totales(self):
+        """La matriz pivotea por usuario y acumula totales por columna"""
+        self._registrar(self.usuarios)
+
+        response = self.client.get(f'/admin/tracking/resumen-tiempos/?tema={self.tema.id}')
+
+        self.assertEqual(response.status_code, 200)
+        nombres = [c['nombre'] for c in response.context['contenidos_estructura']]
+        self.assertEqual(nombres, ['Ejemplo 1', 'Teoría 1'])
+        fila = response.context['datos_usuarios'][0]
+        self.assertEqual(fila['usuario'], 'estudiante0')
+        self.assertEqual(fila['contenidos_lista'], [7, 15])
+        self.assertEqual(fila['total'], 22)
+        self.assertEqual(response.context['totales_lista'], [21, 45])
+        self.assertEqual(response.context['total_general'], 66)
+
+    def test_matriz_clics_y_totales(self):
+        """Los clics se cuentan por tipo de botón en el orden de las opciones"""
+        self._registrar(self.usuarios)
+
+        response = self.client.get(f'/admin/tracking/resumen-clics/?tema={self.tema.id}')
+
+        self.assertEqual(response.status_code, 200)
+        posicion = [k for k, _ in ClicBoton.TIPO_BOTON_CHOICES].index('REGRESAR')
+        fila = response.context['datos_usuarios'][0]
+        self.assertEqual(fila['botones_lista'][posicion], 2)
+        self.assertEqual(fila['total'], 2)
+        self.assertEqual(response.context['totales_lista'][posicion], 6)
+        self.assertEqual(response.context['total_general'], 6)
+
+    def _get_contando(self, url):
+        """GET que cuenta las consultas de todas las bases (la telemetría puede tener la suya)"""
+        with ExitStack() as pila:
+            capturas = [
+                pila.enter_context(CaptureQueriesContext(connections[alias]))
+                for alias in settings.DATABASES
+            ]
+            response = self.client.get(url)
+        return response, sum(len(captura) for captura in capturas)
+
+    def test_consultas_constantes_por_cohorte(self):
+        """El número de consultas no depende de la cantidad de usuarios"""
+        self._registrar(self.usuarios[:1])
+        url = f'/admin/tracking/resumen-tiempos/?tema={self.tema.id}'
+        _, consultas = self._get_contando(url)
+        self.assertEqual(consultas, 8)
+
+        self._registrar(self.usuarios[1:])
+        cache.clear()
+        response, consultas = self._get_contando(url)
+        self.assertEqual(consultas, 8)
+        self.assertEqual(len(response.context['datos_usuarios']), 3)
+
+    def test_matriz_se_guarda_en_cache_por_tema(self):
+        """Una segunda visita con el mismo filtro no vuelve a agregar"""
+        self._registrar(self.usuarios)
+        url = f'/admin/tracking/resumen-clics/?tema={self.tema.id}'
+        self.client.get(url)
+
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(response.context['total_general'], 6)
@@ -17,7 +17,9 @@ from .views import (
     FinalizarSesionMejoradaView,
     RegistrarTiempoPantallaView,
     RegistrarClicBotonView,
+    RegistrarLoteTrackingView,
 )
+from . import ingesta
 
 
 urlpatterns = [
@@ -44,6 +46,14 @@ urlpatterns = [
     # Tracking de tiempo y clics
     path('tiempo-pantalla/', RegistrarTiempoPantallaView.as_view(), name='registrar-tiempo-pantalla'),
     path('clic-boton/', RegistrarClicBotonView.as_view(), name='registrar-clic-boton'),
+
+    # Ingesta por lotes (tiempos, clics y eventos en una sola petición)
+    path('lote/', RegistrarLoteTrackingView.as_view(), name='registrar-lote-tracking'),
+
+    # Ingesta rápida sin DRF (mismo cuerpo, responde 204); ver tracking/ingesta.py
+    path('ingesta/clic-boton/', ingesta.registrar_clic_boton, name='ingesta-clic-boton'),
+    path('ingesta/tiempo-pantalla/', ingesta.registrar_tiempo_pantalla, name='ingesta-tiempo-pantalla'),
+    path('ingesta/sesion/actividad/', ingesta.actualizar_actividad_sesion, name='ingesta-actividad-sesion'),
 ]
 
 
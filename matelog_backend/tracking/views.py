@@ -7,14 +7,21 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.utils import timezone
 from django.db import transaction
 from .models import (
     SesionEstudio, ActividadPantalla, EventoTracking, ProgresoTema,
-    TiempoPantalla, ClicBoton  # NUEVOS modelos
+    TiempoPantalla, ClicBoton,  # NUEVOS modelos
+    incrementos_por_evento
+)
+from lessons import indice_contenido
+from lessons.progreso_cache import invalidar_snapshot
+from . import escritura_diferida
+from .serializers import (
+    RegistrarEventoSerializer, EventoTrackingSerializer,
+    TiempoPantallaLoteSerializer, ClicBotonLoteSerializer
 )
-from lessons.models import Tema, ContenidoTema
-from .serializers import RegistrarEventoSerializer, EventoTrackingSerializer
 
 
 class IniciarSesionView(APIView):
@@ -320,6 +327,7 @@ class RegistrarIrAEjerciciosView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+
 class RegistrarEventoView(APIView):
     """
     Vista para registrar eventos de tracking.
@@ -339,31 +347,33 @@ class RegistrarEventoView(APIView):
         tipo_evento = validated_data['tipo_evento']
         tema_id = validated_data['tema_id']
         
-        try:
-            tema = Tema.objects.get(id=tema_id)
-        except Tema.DoesNotExist:
+        # El tema se resuelve con el índice en memoria, sin consultar la BD
+        if indice_contenido.tema(tema_id) is None:
             return Response(
                 {'error': 'Tema no encontrado'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
         # Obtener o crear ProgresoTema
-        progreso_tema, _ = ProgresoTema.objects.get_or_create(
+        progreso_tema, creado = ProgresoTema.objects.get_or_create(
             usuario=request.user,
-            tema=tema,
+            tema_id=tema_id,
             defaults={
                 'desbloqueado': True,
                 'estado': 'INICIADO',
                 'fecha_inicio': timezone.now()
             }
         )
+        if creado:
+            # El tema recién desbloqueado cambia el snapshot de progreso
+            invalidar_snapshot(request.user)
         
         # Usar transacción para asegurar consistencia
         with transaction.atomic():
             # Crear evento de tracking
             evento = EventoTracking.objects.create(
                 usuario=request.user,
-                tema=tema,
+                tema_id=tema_id,
                 tipo_evento=tipo_evento,
                 contenido_id=validated_data.get('contenido_id'),
                 ejercicio_id=validated_data.get('ejercicio_id'),
@@ -373,29 +383,10 @@ class RegistrarEventoView(APIView):
             )
             
             # Actualizar campos agregados en ProgresoTema según el tipo de evento
-            if tipo_evento == 'TEORIA_VISTA' and validated_data.get('tiempo_segundos') is not None:
-                progreso_tema.tiempo_total_teoria_segundos += validated_data['tiempo_segundos']
-            
-            elif tipo_evento == 'EJEMPLO_VISTO' and validated_data.get('tiempo_segundos') is not None:
-                progreso_tema.tiempo_total_ejemplos_segundos += validated_data['tiempo_segundos']
-            
-            elif tipo_evento == 'CLIC_VER_OTRO_EJEMPLO':
-                progreso_tema.clics_ver_otro_ejemplo += 1
-            
-            elif tipo_evento == 'CLIC_REGRESAR':
-                progreso_tema.clics_regresar += 1
-            
-            elif tipo_evento == 'CLIC_VOLVER_TEMA':
-                progreso_tema.clics_volver_tema += 1
-            
-            elif tipo_evento == 'CLIC_IR_EJERCICIOS':
-                progreso_tema.clics_ir_ejercicios += 1
-            
-            elif tipo_evento == 'CLIC_AYUDA':
-                progreso_tema.clics_ayuda += 1
-            
-            # Guardar cambios en ProgresoTema
-            progreso_tema.save()
+            # (un solo UPDATE con F(), sin read-modify-write de la fila)
+            progreso_tema.incrementar_agregados(
+                incrementos_por_evento(tipo_evento, validated_data.get('tiempo_segundos'))
+            )
         
         # Serializar el evento creado
         evento_serializer = EventoTrackingSerializer(evento)
@@ -527,30 +518,35 @@ class RegistrarTiempoPantallaView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Obtener tema
-        tema = get_object_or_404(Tema, id=tema_id)
+        # Obtener tema (índice en memoria, sin consultar la BD)
+        tema = indice_contenido.tema(tema_id)
+        if tema is None:
+            raise Http404
 
         # Obtener referencias opcionales
         contenido_id = request.data.get('contenido_id')
         ejercicio_id = request.data.get('ejercicio_id')
         cambio_pestana = request.data.get('cambio_pestana', False)
 
-        # Obtener objetos relacionados si se proporcionan IDs
+        # Resolver referencias si se proporcionan IDs
         contenido = None
         if contenido_id:
-            contenido = get_object_or_404(ContenidoTema, id=contenido_id)
+            contenido = indice_contenido.contenido(contenido_id)
+            if contenido is None:
+                raise Http404
 
         ejercicio = None
         if ejercicio_id:
-            from lessons.models import Ejercicio
-            ejercicio = get_object_or_404(Ejercicio, id=ejercicio_id)
+            ejercicio = indice_contenido.ejercicio(ejercicio_id)
+            if ejercicio is None:
+                raise Http404
 
         # Crear registro de tiempo
         tiempo = TiempoPantalla.objects.create(
             usuario=request.user,
-            tema=tema,
-            contenido=contenido,
-            ejercicio=ejercicio,
+            tema_id=tema.id,
+            contenido_id=contenido.id if contenido else None,
+            ejercicio_id=ejercicio.id if ejercicio else None,
             tipo_contenido=tipo_contenido,
             numero=numero,
             tiempo_segundos=tiempo_segundos,
@@ -600,12 +596,14 @@ class RegistrarClicBotonView(APIView):
         tema_id = request.data.get('tema_id')
         tema = None
         if tema_id:
-            tema = get_object_or_404(Tema, id=tema_id)
+            tema = indice_contenido.tema(tema_id)
+            if tema is None:
+                raise Http404
 
         # Crear registro de clic
         clic = ClicBoton.objects.create(
             usuario=request.user,
-            tema=tema,
+            tema_id=tema.id if tema else None,
             tipo_boton=tipo_boton
         )
 
@@ -615,3 +613,183 @@ class RegistrarClicBotonView(APIView):
             'tipo_boton': clic.get_tipo_boton_display()
         }, status=status.HTTP_201_CREATED)
 
+
+
+# ==================== INGESTA POR LOTES ====================
+
+# Máximo de registros aceptados en una sola petición de lote
+MAX_REGISTROS_LOTE = 500
+
+SERIALIZERS_LOTE = {
+    'TIEMPO_PANTALLA': TiempoPantallaLoteSerializer,
+    'CLIC_BOTON': ClicBotonLoteSerializer,
+    'EVENTO': RegistrarEventoSerializer,
+}
+
+
+class RegistrarLoteTrackingView(APIView):
+    """
+    Vista para registrar muchos registros de tracking en una sola petición.
+    Endpoint: POST /api/tracking/lote/
+
+    Body:
+    {
+        "registros": [
+            {"tipo": "TIEMPO_PANTALLA", "tema_id": 1, "tipo_contenido": "TEORIA",
+             "numero": 1, "tiempo_segundos": 45, "contenido_id": 5, "cambio_pestana": false},
+            {"tipo": "CLIC_BOTON", "tema_id": 1, "tipo_boton": "REGRESAR"},
+            {"tipo": "EVENTO", "tema_id": 1, "tipo_evento": "CLIC_AYUDA"}
+        ]
+    }
+
+    Valida todos los registros en una pasada, resuelve tema/contenido/ejercicio
+    con el índice en memoria (lessons/indice_contenido.py) y los inserta con
+    bulk_create (en diferido, ver tracking/escritura_diferida.py).
+    Responde con el resultado de cada registro (aceptado o rechazado con errores).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        registros = request.data.get('registros')
+
+        if not isinstance(registros, list) or not registros:
+            return Response(
+                {'error': 'Se requiere una lista no vacía en "registros"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(registros) > MAX_REGISTROS_LOTE:
+            return Response(
+                {'error': f'Un lote admite como máximo {MAX_REGISTROS_LOTE} registros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 1. Validar la forma de cada registro
+        resultados = []
+        validos = []
+        for indice, registro in enumerate(registros):
+            tipo = registro.get('tipo') if isinstance(registro, dict) else None
+            # Un tipo que no es texto (lista, objeto) no puede ser llave del dict
+            serializer_class = SERIALIZERS_LOTE.get(tipo) if isinstance(tipo, str) else None
+            if serializer_class is None:
+                resultados.append({
+                    'indice': indice,
+                    'aceptado': False,
+                    'errores': {'tipo': [f'tipo debe ser uno de: {", ".join(SERIALIZERS_LOTE)}']}
+                })
+                continue
+
+            serializer = serializer_class(data=registro)
+            if not serializer.is_valid():
+                resultados.append({'indice': indice, 'aceptado': False, 'errores': serializer.errors})
+                continue
+
+            resultados.append({'indice': indice, 'aceptado': True})
+            validos.append((indice, tipo, serializer.validated_data))
+
+        # 2. Resolver referencias con el índice en memoria del contenido
+        tema_ids, contenido_ids, ejercicio_ids = set(), set(), set()
+        for _, _, datos in validos:
+            if datos.get('tema_id'):
+                tema_ids.add(datos['tema_id'])
+            if datos.get('contenido_id'):
+                contenido_ids.add(datos['contenido_id'])
+            if datos.get('ejercicio_id'):
+                ejercicio_ids.add(datos['ejercicio_id'])
+
+        temas = indice_contenido.existentes('temas', tema_ids)
+        contenidos = indice_contenido.existentes('contenidos', contenido_ids)
+        ejercicios = indice_contenido.existentes('ejercicios', ejercicio_ids)
+
+        # 3. Construir instancias de los registros que pasan la validación de referencias
+        tiempos, clics, eventos = [], [], []
+        for indice, tipo, datos in validos:
+            errores = {}
+            tema_id = datos.get('tema_id')
+            if tema_id and tema_id not in temas:
+                errores['tema_id'] = ['Tema no encontrado']
+            # EventoTracking guarda contenido_id/ejercicio_id como referencias blandas
+            if tipo == 'TIEMPO_PANTALLA':
+                if datos.get('contenido_id') and datos['contenido_id'] not in contenidos:
+                    errores['contenido_id'] = ['Contenido no encontrado']
+                if datos.get('ejercicio_id') and datos['ejercicio_id'] not in ejercicios:
+                    errores['ejercicio_id'] = ['Ejercicio no encontrado']
+
+            if errores:
+                resultados[indice] = {'indice': indice, 'aceptado': False, 'errores': errores}
+                continue
+
+            if tipo == 'TIEMPO_PANTALLA':
+                tiempos.append(TiempoPantalla(
+                    usuario=request.user,
+                    tema_id=tema_id,
+                    contenido_id=datos.get('contenido_id') or None,
+                    ejercicio_id=datos.get('ejercicio_id') or None,
+                    tipo_contenido=datos['tipo_contenido'],
+                    numero=datos['numero'],
+                    tiempo_segundos=datos['tiempo_segundos'],
+                    cambio_pestana=datos['cambio_pestana']
+                ))
+            elif tipo == 'CLIC_BOTON':
+                clics.append(ClicBoton(
+                    usuario=request.user,
+                    tema_id=tema_id or None,
+                    tipo_boton=datos['tipo_boton']
+                ))
+            else:
+                eventos.append(EventoTracking(
+                    usuario=request.user,
+                    tema_id=tema_id,
+                    tipo_evento=datos['tipo_evento'],
+                    contenido_id=datos.get('contenido_id'),
+                    ejercicio_id=datos.get('ejercicio_id'),
+                    numero_intento=datos.get('numero_intento'),
+                    tiempo_segundos=datos.get('tiempo_segundos'),
+                    cambio_pestana=datos.get('cambio_pestana', False)
+                ))
+
+        # 4. Insertar los registros (en diferido si está activado) y actualizar
+        #    los agregados de ProgresoTema en la petición, porque sí se leen
+        escritura_diferida.guardar(tiempos + clics + eventos)
+        if eventos:
+            with transaction.atomic():
+                self._actualizar_agregados(request.user, eventos)
+
+        aceptados = len(tiempos) + len(clics) + len(eventos)
+        return Response({
+            'mensaje': 'Lote procesado',
+            'aceptados': aceptados,
+            'rechazados': len(registros) - aceptados,
+            'resultados': resultados
+        }, status=status.HTTP_200_OK)
+
+    def _actualizar_agregados(self, usuario, eventos):
+        """
+        Actualiza los campos agregados de ProgresoTema una vez por tema,
+        acumulando primero los incrementos de todos los eventos del lote.
+        """
+        incrementos_por_tema = {}
+        for evento in eventos:
+            incrementos_por_evento(
+                evento.tipo_evento,
+                evento.tiempo_segundos,
+                acumulado=incrementos_por_tema.setdefault(evento.tema_id, {})
+            )
+
+        creados = False
+        for tema_id, incrementos in incrementos_por_tema.items():
+            progreso_tema, creado = ProgresoTema.objects.get_or_create(
+                usuario=usuario,
+                tema_id=tema_id,
+                defaults={
+                    'desbloqueado': True,
+                    'estado': 'INICIADO',
+                    'fecha_inicio': timezone.now()
+                }
+            )
+            creados = creados or creado
+            progreso_tema.incrementar_agregados(incrementos)
+
+        # Un tema recién desbloqueado cambia el snapshot de progreso (una vez por lote)
+        if creados:
+            invalidar_snapshot(usuario)
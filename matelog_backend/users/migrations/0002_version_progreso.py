@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='progreso_modificado',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='version_progreso',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
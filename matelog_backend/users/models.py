@@ -67,6 +67,11 @@ class CustomUser(AbstractUser):
         help_text="Edad del estudiante"
     )
 
+    # Versión del progreso para los ETag de lecciones y temas
+    # (lessons/progreso_cache.py): se incrementa con cada cambio de progreso
+    version_progreso = models.PositiveIntegerField(default=0, editable=False)
+    progreso_modificado = models.DateTimeField(null=True, blank=True, editable=False)
+
 
     class Meta:
         verbose_name = 'Usuario'